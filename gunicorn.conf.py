@@ -0,0 +1,44 @@
+"""gunicorn settings, read from the working directory on start.
+
+When PROMETHEUS_MULTIPROC_DIR is set, the workers share their metrics
+through files in that directory, see main/metrics.py.
+
+Every thread of a sync or gthread worker keeps its own database connection
+open, so the workers hold up to `workers * threads` connections. Set
+DATABASE_MAX_CONNECTIONS to the share of the server's max_connections the
+web workers may use, and gunicorn warns on start when they could use more.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    # Counters left by a previous run would be added to the new ones.
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+    check_connections(server)
+
+
+def check_connections(server):
+    limit = os.environ.get('DATABASE_MAX_CONNECTIONS')
+    if not limit or server.cfg.worker_class_str not in ('sync', 'gthread'):
+        return
+    threads = 1
+    if server.cfg.worker_class_str == 'gthread':
+        threads = server.cfg.threads
+    connections = server.cfg.workers * threads
+    if connections > int(limit):
+        server.log.warning(
+            '%d workers with %d threads may open %d database connections, '
+            'more than DATABASE_MAX_CONNECTIONS=%s', server.cfg.workers,
+            threads, connections, limit
+        )
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
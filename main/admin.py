@@ -1,11 +1,61 @@
+from django.conf import settings
 from django.contrib import admin
 
 from .models import Task
+from .pagination import EstimatedCountPaginator
+from .search import search_tasks
+
+
+def performance_mode():
+    """Whether the admin should avoid the queries that read the whole task
+    table, see TASKS_ADMIN_PERFORMANCE_MODE.
+    """
+    return getattr(settings, 'TASKS_ADMIN_PERFORMANCE_MODE', False)
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ['title', 'created_on', 'finished_on', 'do_before', 'done']
+    list_display = [
+        'title', 'user', 'created_on', 'finished_on', 'do_before', 'done'
+    ]
     list_filter = ['done', 'created_on', 'finished_on']
+    list_select_related = ['user']
     search_fields = ('title', 'description')
     prepopulated_fields = {'slug': ('title', )}
+    # Backed by task_created_on_idx.
+    date_hierarchy = 'created_on'
+    raw_id_fields = ['user']
+
+    @property
+    def show_full_result_count(self):
+        return not performance_mode()
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        if performance_mode():
+            return EstimatedCountPaginator(
+                queryset, per_page, orphans, allow_empty_first_page
+            )
+        return super(TaskAdmin, self).get_paginator(
+            request, queryset, per_page, orphans, allow_empty_first_page
+        )
+
+    def get_list_filter(self, request):
+        # Filtering on the dates scans the table, created_on can be browsed
+        # with the date hierarchy instead.
+        if performance_mode():
+            return ['done']
+        return super(TaskAdmin, self).get_list_filter(request)
+
+    def get_ordering(self, request):
+        # Tasks are ordered by deadline, which no index covers across users.
+        if performance_mode():
+            return ['-id']
+        return super(TaskAdmin, self).get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        if performance_mode() and search_term:
+            return search_tasks(queryset, search_term), False
+        return super(TaskAdmin, self).get_search_results(
+            request, queryset, search_term
+        )
@@ -1,6 +1,17 @@
-from rest_framework import serializers
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
-from ..models import Task
+from ..models import Task, BULK_ACTIONS
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        tasks = [Task(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            return Task.objects.bulk_create(tasks)
 
 
 class TaskBasicSerializer(serializers.ModelSerializer):
@@ -11,7 +22,113 @@ class TaskBasicSerializer(serializers.ModelSerializer):
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    """Accepts an optional `fields` argument restricting the output to a
+    subset of Meta.fields.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super(TaskSerializer, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     class Meta:
         model = Task
         fields = ['title', 'description', 'slug', 'created_on',
         		  'updated_on', 'do_before', 'done', 'finished_on']
+        read_only_fields = ['slug']
+        list_serializer_class = TaskListSerializer
+
+
+class TaskBulkActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=BULK_ACTIONS)
+    slugs = serializers.ListField(
+        child=serializers.CharField(max_length=255), allow_empty=False
+    )
+
+    def validate_slugs(self, slugs):
+        limit = getattr(settings, 'TASKS_BULK_LIMIT', 1000)
+        if len(slugs) > limit:
+            raise serializers.ValidationError(
+                f'Ensure this list has at most {limit} items.'
+            )
+        # Generated slugs are always lower case, so a plain IN lookup on the
+        # unique slug index finds them.
+        return [slug.lower() for slug in slugs]
+
+
+class TaskValuesSerializer:
+    """Read-only counterpart of TaskSerializer for rows of a values()
+    queryset.
+
+    It produces the same output as TaskSerializer for the same `fields`, but
+    skips building a model instance and running every field of every row
+    through DRF. Datetimes are the only values needing conversion.
+    """
+    def __init__(self, fields=None):
+        serializer_fields = TaskSerializer(fields=fields).fields
+        self.fields = list(serializer_fields)
+        self.columns = [
+            (name, self.datetime_converter(field)
+             if isinstance(field, serializers.DateTimeField) else None)
+            for name, field in serializer_fields.items()
+        ]
+
+    @staticmethod
+    def datetime_converter(field):
+        """Return a function formatting aware datetimes like
+        `field.to_representation()`, without its per value setting lookups.
+        """
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is None or isinstance(output_format, str) and \
+                output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        field_timezone = getattr(field, 'timezone', field.default_timezone())
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+    def to_representation(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for name, convert in self.columns:
+                value = row[name]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+FIELD_PRESETS = {
+    'basic': TaskBasicSerializer.Meta.fields,
+    'full': TaskSerializer.Meta.fields,
+}
+
+
+def parse_fields(value):
+    """Turn a `fields` query parameter, either a preset name or a comma
+    separated list of field names, into a list of TaskSerializer fields.
+    """
+    if not value:
+        return FIELD_PRESETS['full']
+    if value in FIELD_PRESETS:
+        return FIELD_PRESETS[value]
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(fields) - set(TaskSerializer.Meta.fields)
+    if unknown or not fields:
+        raise serializers.ValidationError({'fields': [
+            'Unknown fields: {}.'.format(', '.join(sorted(unknown)))
+            if unknown else 'No fields requested.'
+        ]})
+    return fields
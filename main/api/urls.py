@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+read_views = async_views if settings.TASKS_ASYNC_VIEWS else views
 
 app_name = 'api'
 urlpatterns = [
-	path('', views.task_list, name='task_list')
-]
\ No newline at end of file
+	path('bulk/', views.task_bulk_create, name='task_bulk_create'),
+	path('bulk/action/', views.task_bulk_action, name='task_bulk_action'),
+	path('sync/', views.task_sync, name='task_sync'),
+	path('counts/', views.task_counts, name='task_counts'),
+	path('search/', views.task_search, name='task_search'),
+	path('', read_views.task_list, name='task_list')
+]
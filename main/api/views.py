@@ -1,21 +1,172 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from .serializers import TaskSerializer
+from .serializers import (
+	TaskSerializer, TaskBulkActionSerializer, TaskValuesSerializer,
+	parse_fields
+)
 
-from ..models import Task
+from ..conditional import (
+	conditional_response, make_etag, task_list_validators
+)
+from ..models import Task, TaskCounter
+from ..pagination import KeysetPaginator, InvalidCursor
+from ..search import search_tasks
+from ..sync import InvalidSyncCursor, changes_since
+
+
+def cursor_url(request, cursor):
+	if(cursor is None):
+		return None
+	return replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+
+def task_list_etag(request, last_modified, count):
+	return make_etag(
+		request.user.pk, last_modified, count,
+		request.get_full_path(), request.META.get('HTTP_ACCEPT', '')
+	)
+
+def task_list_paginator(request, fields):
+	# Only load the requested columns, plus the pagination key, as plain
+	# values() rows.
+	tasks = Task.objects.filter(user=request.user).values(
+		'id', 'do_before', *fields
+	)
+	return KeysetPaginator(tasks, ['do_before', 'id'])
+
+def task_list_data(request, page, fields):
+	tasks_serializer = TaskValuesSerializer(fields=fields)
+	return {
+		'next': cursor_url(request, page.next_cursor),
+		'previous': cursor_url(request, page.previous_cursor),
+		'results': tasks_serializer.to_representation(page),
+	}
 
 @api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
 def task_list(request):
 	if(request.method == 'GET'):
-		tasks = Task.objects.all()
-		tasks_serializer = TaskSerializer(tasks, many=True)
-		return Response(tasks_serializer.data)
+		last_modified, count = task_list_validators(request.user)
+
+		def list_response():
+			fields = parse_fields(request.query_params.get('fields'))
+			paginator = task_list_paginator(request, fields)
+			try:
+				page = paginator.page(request.query_params.get('cursor'))
+			except InvalidCursor:
+				raise NotFound('Invalid cursor')
+			return Response(task_list_data(request, page, fields))
+
+		response = conditional_response(
+			request, list_response,
+			task_list_etag(request, last_modified, count), last_modified
+		)
+		patch_vary_headers(response, ['Accept'])
+		return response
 	elif(request.method == 'POST'):
-		print(request.data)
 		task_serializer = TaskSerializer(data=request.data)
 		if(task_serializer.is_valid()):
-			return Response(task_serializer, status=status.HTTP_201_CREATED)
+			task_serializer.save(user=request.user)
+			return Response(task_serializer.data, status=status.HTTP_201_CREATED)
 		else:
-			return Response(task_serializer, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+			return Response(task_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_bulk_create(request):
+	"""Create a JSON array of tasks with one INSERT in one transaction.
+
+	Nothing is created unless every item is valid, the errors are returned
+	as a list with one entry per submitted item.
+	"""
+	limit = getattr(settings, 'TASKS_BULK_LIMIT', 1000)
+	if(isinstance(request.data, list) and len(request.data) > limit):
+		return Response(
+			{'non_field_errors': [f'Ensure this list has at most {limit} items.']},
+			status=status.HTTP_400_BAD_REQUEST
+		)
+	tasks_serializer = TaskSerializer(data=request.data, many=True)
+	if(tasks_serializer.is_valid()):
+		tasks_serializer.save(user=request.user)
+		return Response(tasks_serializer.data, status=status.HTTP_201_CREATED)
+	else:
+		return Response(tasks_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_bulk_action(request):
+	"""Run a do, undo or delete action on a list of the user's tasks with
+	a single UPDATE or DELETE statement.
+	"""
+	action_serializer = TaskBulkActionSerializer(data=request.data)
+	if(action_serializer.is_valid()):
+		action = action_serializer.validated_data['action']
+		count = Task.objects.for_user(request.user).filter(
+			slug__in=action_serializer.validated_data['slugs']
+		).bulk_action(action)
+		return Response({'action': action, 'count': count})
+	else:
+		return Response(action_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_search(request):
+	"""Return the tasks matching the `q` parameter, best matches first,
+	paginated like the task list.
+	"""
+	query = request.query_params.get('q', '').strip()
+	if(not query):
+		raise ValidationError({'q': ['This parameter is required.']})
+	fields = parse_fields(request.query_params.get('fields'))
+	tasks = search_tasks(
+		Task.objects.filter(user=request.user).values('id', *fields), query
+	)
+	paginator = KeysetPaginator(tasks, ['-rank', 'id'])
+	try:
+		page = paginator.page(request.query_params.get('cursor'))
+	except InvalidCursor:
+		raise NotFound('Invalid cursor')
+	return Response(task_list_data(request, page, fields))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_counts(request):
+	"""Return the numbers of open, done and overdue tasks of the user."""
+	return Response(TaskCounter.objects.counts(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_sync(request):
+	"""Return the tasks created or updated and the slugs of the tasks deleted
+	since the `cursor` issued by the previous sync, or every task when no
+	cursor is given, with the cursor to use next. The tasks come a page at a
+	time: while `more` is true, sync again with the new cursor right away.
+	"""
+	fields = parse_fields(request.query_params.get('fields'))
+	if('slug' not in fields):
+		# Clients need the slug to match the rows with their copies.
+		fields = ['slug', *fields]
+	try:
+		tasks, deleted, cursor, more = changes_since(
+			request.user, request.query_params.get('cursor'), fields
+		)
+	except InvalidSyncCursor:
+		raise NotFound('Invalid or expired cursor, sync without one')
+	tasks_serializer = TaskValuesSerializer(fields=fields)
+	return Response({
+		'cursor': cursor,
+		'tasks': tasks_serializer.to_representation(tasks),
+		'deleted': deleted,
+		'more': more,
+	})
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MainConfig(AppConfig):
     name = 'main'
+
+    def ready(self):
+        # Counts the queries of every connection, see QueryCountMiddleware.
+        from . import middleware  # noqa: F401
+        # Drops the cached users when they change, see main.auth.
+        from . import auth  # noqa: F401
+        # Puts back the full-text search triggers migrations dropped.
+        from .search import restore_sqlite_triggers
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
@@ -0,0 +1,162 @@
+"""Async versions of the task read views, used when TASKS_ASYNC_VIEWS is
+on (see todo/asgi.py).
+
+They read the database with the async ORM, so under an ASGI server a worker
+keeps serving other requests while a query is running instead of blocking
+on it.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+from . import events
+from .cache import acached_fragment
+from .conditional import task_list_condition, task_detail_condition
+from .models import Task, TaskCounter
+from .pagination import KeysetPaginator, InvalidCursor
+from .sync import current_cursor
+from .views import render_task_list_page
+
+# Seconds between comments sent to keep idle event streams open.
+HEARTBEAT_INTERVAL = 15
+
+
+def login_required(view):
+    """Async counterpart of django.contrib.auth's login_required.
+
+    Loading request.user reads the session and user tables, which must not
+    be done from the event loop. It is loaded once in a thread, after which
+    the view can use it freely.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(
+            lambda: request.user.is_authenticated
+        )()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def render_task_list(request, template_name, fragment_template_name,
+                           queryset, ordering):
+    async def render_fragment():
+        paginator = KeysetPaginator(queryset, ordering)
+        try:
+            page = await paginator.apage(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        return render_to_string(fragment_template_name, {
+            'tasks': page.object_list,
+            'page': page,
+        }, request)
+
+    tasks_html, hit = await acached_fragment(
+        request, template_name, render_fragment
+    )
+    return render_task_list_page(
+        request, template_name, tasks_html, hit,
+        await TaskCounter.objects.acounts(request.user)
+    )
+
+
+@login_required
+@task_list_condition
+async def task_list(request):
+    return await render_task_list(
+        request,
+        'main/task_list.html',
+        'main/snippets/task_list_page.html',
+        Task.objects.filter(done=False, user=request.user),
+        ['do_before', 'id']
+    )
+
+
+@login_required
+@task_detail_condition
+async def task_detail(request, task_slug):
+    try:
+        task = await Task.objects.with_slug(task_slug).aget(
+            user=request.user
+        )
+    except Task.DoesNotExist:
+        raise Http404('No Task matches the given query.')
+    return render(request, 'main/task_detail.html', {'task': task})
+
+
+@login_required
+@task_list_condition
+async def done_task_list(request):
+    return await render_task_list(
+        request,
+        'main/done_task_list.html',
+        'main/snippets/done_task_list_page.html',
+        Task.objects.filter(done=True, user=request.user),
+        ['-finished_on', '-id']
+    )
+
+
+def server_sent_event(event, data):
+    return 'event: {}\ndata: {}\n\n'.format(
+        event, json.dumps(data, separators=(',', ':'))
+    )
+
+
+async def task_event_stream(user_id):
+    """Yield the user's task events as server-sent events.
+
+    The first event carries a sync cursor, from which a reconnecting client
+    can fetch what it missed with the sync API. The stream ends after
+    TASKS_EVENTS_STREAM_TIMEOUT seconds and the browser reconnects, so a
+    stream whose client went away silently is not kept forever.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(
+        settings, 'TASKS_EVENTS_STREAM_TIMEOUT', 300
+    )
+    async with events.get_backend().subscribe(user_id) as subscription:
+        yield 'retry: 5000\n' + server_sent_event(
+            'ready', {'cursor': current_cursor()}
+        )
+        while True:
+            remaining = deadline - loop.time()
+            if(remaining <= 0):
+                break
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), min(HEARTBEAT_INTERVAL, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield server_sent_event(message['type'], {
+                'slugs': message['slugs']
+            })
+
+
+@login_required
+async def task_events(request):
+    """Push the user's task changes to the browser as server-sent events.
+
+    Streams are only served under ASGI, where an open stream costs next to
+    nothing. A WSGI worker would be tied up by each one, so there the view
+    answers 204 No Content, which tells EventSource not to reconnect.
+    """
+    if(not isinstance(request, ASGIRequest)):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        task_event_stream(request.user.pk), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx and other proxies from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
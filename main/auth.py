@@ -0,0 +1,66 @@
+"""Authentication backends which keep the logged in users in the cache.
+
+Django loads the user of every authenticated request from the database,
+through the get_user() of the backend that logged them in. The backends
+here take it from the task cache for TASKS_USER_CACHE_TIMEOUT seconds
+instead. Every save or delete of a user drops the cached copy, so a
+password change still logs out the other sessions and a deactivated user
+is logged out, on the next request. Changes made with
+`User.objects.update()` send no signal and show up after the timeout.
+
+With several worker processes the cache must be shared by them, e.g.
+memcached or redis, or a worker could keep a user another one changed.
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import get_cache
+
+
+def _user_key(user_id):
+    return 'tasks:user:{}'.format(user_id)
+
+
+class CachedUserMixin:
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'TASKS_USER_CACHE_TIMEOUT', 300)
+        if(not timeout):
+            return super(CachedUserMixin, self).get_user(user_id)
+        cache = get_cache()
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if(user is None):
+            user = super(CachedUserMixin, self).get_user(user_id)
+            if(user is None):
+                return None
+            cache.set(key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    """allauth's backend, which also logs in with the email address."""
+
+
+def invalidate_user(user_id):
+    """Drop the cached user, again on commit inside a transaction so a
+    request reading the old row meanwhile can't cache it back.
+    """
+    key = _user_key(user_id)
+    get_cache().delete(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: get_cache().delete(key))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
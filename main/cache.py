@@ -0,0 +1,134 @@
+"""Per-user cache of rendered task list fragments.
+
+Every user has a version number stored in the cache. Cache keys for that
+user's fragments embed the version, so bumping it whenever one of the user's
+tasks changes makes all their cached fragments unreachable at once, without
+having to know which keys exist.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .metrics import CACHE_REQUESTS
+
+stats = {'hits': 0, 'misses': 0}
+
+
+def _count(hit):
+    if hit:
+        stats['hits'] += 1
+    else:
+        stats['misses'] += 1
+    CACHE_REQUESTS.labels('hit' if hit else 'miss').inc()
+
+
+def get_cache():
+    return caches[getattr(settings, 'TASKS_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return 'tasks:version:{}'.format(user_id)
+
+
+def _initial_version():
+    # A time based start value means a version key that was evicted never
+    # restarts at a number an older cached fragment still uses.
+    return int(time.time() * 1000)
+
+
+def get_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_ids):
+    cache = get_cache()
+    for user_id in user_ids:
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+def invalidate(user_ids):
+    """Drop the cached fragments of the given users.
+
+    Inside a transaction the version is bumped again on commit, so a request
+    which rendered the old rows before the commit can't leave them cached
+    under the new version.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _bump(user_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def _fragment_key(request, version, name):
+    cursor = request.GET.get('cursor', '')
+    return 'tasks:fragment:{}:{}:{}:{}'.format(
+        request.user.pk,
+        version,
+        name,
+        hashlib.md5(cursor.encode()).hexdigest()
+    )
+
+
+def cached_fragment(request, name, render):
+    """Return the HTML produced by `render()` for the current user, from the
+    cache when none of the user's tasks changed since it was stored, and
+    whether it was a cache hit. A TASKS_CACHE_TIMEOUT of 0 turns the cache
+    off.
+    """
+    timeout = getattr(settings, 'TASKS_CACHE_TIMEOUT', 60)
+    if not timeout:
+        return render(), False
+    cache = get_cache()
+    key = _fragment_key(request, get_version(request.user.pk), name)
+    html = cache.get(key)
+    if html is None:
+        _count(False)
+        html = render()
+        cache.set(key, html, timeout)
+        return html, False
+    _count(True)
+    return html, True
+
+
+async def aget_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _initial_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def acached_fragment(request, name, render):
+    """Async version of cached_fragment(), `render` is a coroutine
+    function.
+    """
+    timeout = getattr(settings, 'TASKS_CACHE_TIMEOUT', 60)
+    if not timeout:
+        return await render(), False
+    cache = get_cache()
+    key = _fragment_key(request, await aget_version(request.user.pk), name)
+    html = await cache.aget(key)
+    if html is None:
+        _count(False)
+        html = await render()
+        await cache.aset(key, html, timeout)
+        return html, False
+    _count(True)
+    return html, True
@@ -0,0 +1,188 @@
+"""Conditional GET support for the task pages and API.
+
+A user's task lists can only change when one of their tasks is created,
+updated or deleted, which is visible in MAX(updated_on), the number of tasks
+and the time of the latest TaskTombstone. Those three values are read with a
+single query and turned into an ETag and a Last-Modified date, so a client
+polling an unchanged list gets a 304 without the list being queried or
+serialized.
+"""
+import asyncio
+import hashlib
+import time
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    Count, DateTimeField, IntegerField, Max, OuterRef, Subquery
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Task, TaskTombstone
+
+
+def _validators_queryset(user):
+    tasks = Task.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    tombstones = TaskTombstone.objects.filter(
+        user=OuterRef('pk')
+    ).order_by().values('user')
+
+    return get_user_model().objects.filter(pk=user.pk).annotate(
+        last_updated=Subquery(
+            tasks.annotate(last=Max('updated_on')).values('last'),
+            output_field=DateTimeField()
+        ),
+        task_count=Subquery(
+            tasks.annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField()
+        ),
+        last_deleted=Subquery(
+            tombstones.annotate(last=Max('deleted_on')).values('last'),
+            output_field=DateTimeField()
+        ),
+    ).values('last_updated', 'task_count', 'last_deleted')
+
+
+def _list_validators(row):
+    dates = [
+        date for date in (row['last_updated'], row['last_deleted']) if date
+    ]
+    return (max(dates) if dates else None), row['task_count'] or 0
+
+
+def task_list_validators(user):
+    """Return `(last_modified, count)` for all of the user's tasks."""
+    return _list_validators(_validators_queryset(user).get())
+
+
+async def atask_list_validators(user):
+    return _list_validators(await _validators_queryset(user).aget())
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def _precondition(request, etag, last_modified):
+    etag = quote_etag(etag)
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    return etag, timestamp, response
+
+
+def _add_validators(request, response, etag, timestamp):
+    if request.method in ('GET', 'HEAD'):
+        if timestamp and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(timestamp)
+        if not response.has_header('ETag'):
+            response['ETag'] = etag
+        # Make browsers revalidate every time, and keep shared caches from
+        # storing a user's tasks.
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, response_func, etag, last_modified):
+    """Return a 304 (or 412) response when the request's validators match,
+    otherwise call `response_func()` and add the ETag and Last-Modified
+    headers to its response.
+    """
+    etag, timestamp, response = _precondition(request, etag, last_modified)
+    if response is None:
+        response = response_func()
+    return _add_validators(request, response, etag, timestamp)
+
+
+async def aconditional_response(request, response_func, etag, last_modified):
+    """Async version of conditional_response(), `response_func` is a
+    coroutine function.
+    """
+    etag, timestamp, response = _precondition(request, etag, last_modified)
+    if response is None:
+        response = await response_func()
+    return _add_validators(request, response, etag, timestamp)
+
+
+def _list_etag(request, last_modified, count):
+    period = getattr(settings, 'TASKS_CACHE_TIMEOUT', 60) or 1
+    return make_etag(
+        request.user.pk, last_modified, count,
+        request.get_full_path(), int(time.time() // period)
+    )
+
+
+def task_list_condition(view):
+    """Answer conditional GETs of a task list page from the user's list
+    validators. Works on both sync and async views.
+
+    The rendered rows include relative times ("3 days left"), so the ETag
+    also changes every TASKS_CACHE_TIMEOUT seconds, like the cached fragment.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            last_modified, count = await atask_list_validators(request.user)
+            return await aconditional_response(
+                request,
+                lambda: view(request, *args, **kwargs),
+                _list_etag(request, last_modified, count),
+                last_modified
+            )
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        last_modified, count = task_list_validators(request.user)
+        return conditional_response(
+            request,
+            lambda: view(request, *args, **kwargs),
+            _list_etag(request, last_modified, count),
+            last_modified
+        )
+    return wrapper
+
+
+def _task_updated_on(request, task_slug):
+    return Task.objects.with_slug(task_slug).filter(
+        user=request.user
+    ).values_list('updated_on', flat=True)
+
+
+def task_detail_condition(view):
+    """Answer conditional GETs of a task page from the task's updated_on.
+    Works on both sync and async views.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, task_slug, *args, **kwargs):
+            updated_on = await _task_updated_on(request, task_slug).afirst()
+            if updated_on is None:
+                return await view(request, task_slug, *args, **kwargs)
+            return await aconditional_response(
+                request,
+                lambda: view(request, task_slug, *args, **kwargs),
+                make_etag(request.user.pk, task_slug.lower(), updated_on),
+                updated_on
+            )
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, task_slug, *args, **kwargs):
+        updated_on = _task_updated_on(request, task_slug).first()
+        if updated_on is None:
+            # Let the view answer with its 404.
+            return view(request, task_slug, *args, **kwargs)
+        return conditional_response(
+            request,
+            lambda: view(request, task_slug, *args, **kwargs),
+            make_etag(request.user.pk, task_slug.lower(), updated_on),
+            updated_on
+        )
+    return wrapper
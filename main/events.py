@@ -0,0 +1,243 @@
+"""Task change events, pushed to browsers as server-sent events.
+
+Every write to tasks publishes an event naming the changed slugs to their
+owner, once its transaction commits. Events go through the backend named by
+TASKS_EVENTS_BACKEND:
+
+- InProcessBackend only reaches subscribers in the publishing process, which
+  is enough for development and single worker deployments.
+- PostgresBackend sends them with NOTIFY, and every process LISTENs for them,
+  so subscribers connected to any worker receive every event.
+
+Other backends, e.g. on Redis pub/sub, implement publish() and call
+deliver() for the messages they receive.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .metrics import TASK_EVENTS
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('created', 'updated', 'done', 'undone', 'deleted')
+
+# Keep messages well below PostgreSQL's 8000 byte NOTIFY payload limit.
+MAX_MESSAGE_BYTES = 4000
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_class = import_string(getattr(
+                settings, 'TASKS_EVENTS_BACKEND',
+                'main.events.InProcessBackend'
+            ))
+            _backend = backend_class()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'TASKS_EVENTS_BACKEND':
+        with _backend_lock:
+            if _backend is not None:
+                _backend.close()
+            _backend = None
+
+
+def _messages(event_type, slugs):
+    message, size = [], 0
+    for slug in slugs:
+        # Measured as JSON, which escapes non-ASCII slugs.
+        slug_size = len(json.dumps(slug)) + 1
+        if message and size + slug_size > MAX_MESSAGE_BYTES:
+            yield {'type': event_type, 'slugs': message}
+            message, size = [], 0
+        message.append(slug)
+        size += slug_size
+    if message:
+        yield {'type': event_type, 'slugs': message}
+
+
+def publish(event_type, rows, using=DEFAULT_DB_ALIAS):
+    """Publish an `event_type` event for the tasks given as `(user_id,
+    slug)` rows, once the current transaction commits.
+    """
+    slugs_by_user = {}
+    for user_id, slug in rows:
+        slugs_by_user.setdefault(user_id, []).append(slug)
+    if not slugs_by_user:
+        return
+
+    def send():
+        TASK_EVENTS.labels(event_type).inc(len(rows))
+        backend = get_backend()
+        for user_id, slugs in slugs_by_user.items():
+            for message in _messages(event_type, slugs):
+                backend.publish(user_id, message)
+    transaction.on_commit(send, using=using)
+
+
+class Subscription:
+    """The events of one user, received by one client, as returned by
+    `backend.subscribe(user_id)`. Use it as an async context manager.
+    """
+
+    def __init__(self, backend, user_id):
+        self.backend = backend
+        self.user_id = user_id
+        self.queue = asyncio.Queue()
+        self.loop = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.backend.add(self)
+        await self.backend.subscribed()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.backend.remove(self)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def put(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            # The subscriber's event loop was closed.
+            pass
+
+
+class InProcessBackend:
+    """Deliver events to the subscribers of the current process."""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        self.deliver(user_id, message)
+
+    def deliver(self, user_id, message):
+        """Hand `message` to the user's subscribers, from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def subscribe(self, user_id):
+        return Subscription(self, user_id)
+
+    def add(self, subscription):
+        with self._lock:
+            self._subscriptions.setdefault(
+                subscription.user_id, set()
+            ).add(subscription)
+
+    def remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    async def subscribed(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PostgresBackend(InProcessBackend):
+    """Publish events with NOTIFY on a database connection.
+
+    A thread of each process LISTENs on its own connection and delivers the
+    notifications to the local subscribers. It is started by the first
+    subscriber, so processes that only publish never hold the extra
+    connection.
+    """
+    channel = 'tasks_events'
+    poll_timeout = 5
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        super(PostgresBackend, self).__init__()
+        self.using = using
+        # LISTEN needs a session of its own, which a pgbouncer in transaction
+        # mode doesn't give; TASKS_EVENTS_LISTEN_DATABASE can name a direct
+        # connection to the server.
+        self.listen_using = getattr(
+            settings, 'TASKS_EVENTS_LISTEN_DATABASE', None
+        ) or using
+        self._listener = None
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+
+    def publish(self, user_id, message):
+        payload = json.dumps(dict(message, user=user_id))
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    async def subscribed(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._stopped.clear()
+                self._listener = threading.Thread(
+                    target=self.listen, name='tasks-events-listener',
+                    daemon=True
+                )
+                self._listener.start()
+        # Events published before the LISTEN would never arrive.
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._listening.wait, self.poll_timeout
+        )
+
+    def close(self):
+        self._stopped.set()
+        if self._listener is not None:
+            self._listener.join()
+
+    def listen(self):
+        while not self._stopped.is_set():
+            connection = connections.create_connection(self.listen_using)
+            try:
+                connection.ensure_connection()
+                connection.set_autocommit(True)
+                with connection.cursor() as cursor:
+                    cursor.execute('LISTEN {}'.format(self.channel))
+                self._listening.set()
+                self.receive(connection.connection)
+            except Exception:
+                logger.exception('Lost the task events connection')
+                time.sleep(1)
+            finally:
+                self._listening.clear()
+                connection.close()
+
+    def receive(self, raw_connection):
+        while not self._stopped.is_set():
+            readable, _, _ = select.select(
+                [raw_connection], [], [], self.poll_timeout
+            )
+            if not readable:
+                continue
+            raw_connection.poll()
+            while raw_connection.notifies:
+                notify = raw_connection.notifies.pop(0)
+                message = json.loads(notify.payload)
+                self.deliver(message.pop('user'), message)
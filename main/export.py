@@ -0,0 +1,76 @@
+import csv
+import json
+
+EXPORT_FIELDS = [
+    'title', 'slug', 'description', 'created_on', 'updated_on',
+    'do_before', 'done', 'finished_on'
+]
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class Echo:
+    """A file-like object whose write() returns the value instead of
+    storing it, so csv.writer can be used to produce chunks one by one.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    # Full isoformat() keeps microseconds, which DjangoJSONEncoder drops.
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _ndjson_line(row):
+    return json.dumps(
+        {field: _format_value(row[field]) for field in EXPORT_FIELDS},
+        ensure_ascii=False,
+        separators=(',', ':')
+    ) + '\n'
+
+
+def _csv_row(writer, row):
+    return writer.writerow(
+        [_format_value(row[field]) for field in EXPORT_FIELDS]
+    )
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield _ndjson_line(row)
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield _csv_row(writer, row)
+
+
+async def aexport_ndjson(rows):
+    async for row in rows:
+        yield _ndjson_line(row)
+
+
+async def aexport_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    async for row in rows:
+        yield _csv_row(writer, row)
+
+
+EXPORTERS = {
+    'ndjson': export_ndjson,
+    'csv': export_csv,
+}
+
+# The exporters over async iterators of rows, for ASGI responses.
+AEXPORTERS = {
+    'ndjson': aexport_ndjson,
+    'csv': aexport_csv,
+}
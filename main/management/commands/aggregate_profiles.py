@@ -0,0 +1,90 @@
+import json
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...profiling import read_profile_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Aggregate the request profiles saved by ProfilingMiddleware and '
+        'print the functions the sampled requests spent the most time in.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=getattr(settings, 'TASKS_PROFILE_DIR', None),
+            help='Directory of the profiles, TASKS_PROFILE_DIR by default.'
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--view', help='Only the profiles of this URL name, e.g. '
+                           'main:task_list.'
+        )
+        parser.add_argument(
+            '--slow', action='store_true',
+            help='Only the profiles of slow requests.'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['dir']
+        if not directory or not os.path.isdir(directory):
+            raise CommandError(
+                'No profile directory, set TASKS_PROFILE_DIR or use --dir'
+            )
+        if options['top'] < 1:
+            raise CommandError('--top must be positive')
+
+        own = Counter()
+        total = Counter()
+        samples = 0
+        views = {}
+        for name in read_profile_names(directory):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                # Rotated away or not a profile.
+                continue
+            if options['view'] and profile['view_name'] != options['view']:
+                continue
+            if options['slow'] and not profile['slow']:
+                continue
+
+            view = views.setdefault(profile['view_name'] or '-', [0, 0.0, 0])
+            view[0] += 1
+            view[1] += profile['duration_ms']
+            view[2] += profile['sql']['count'] if profile['sql'] else 0
+            for sample in profile['samples']:
+                stack, count = sample['stack'], sample['count']
+                samples += count
+                own[stack[-1]] += count
+                # Recursive functions count once per sample.
+                for frame in set(stack):
+                    total[frame] += count
+
+        if not views:
+            self.stdout.write('No profiles')
+            return
+        self.stdout.write(
+            f'Profiles: {sum(view[0] for view in views.values())}'
+        )
+        self.stdout.write(f'{"view":<28}{"requests":>10}{"avg ms":>10}'
+                          f'{"avg queries":>13}')
+        for view_name, (count, duration, queries) in sorted(
+                views.items(), key=lambda item: -item[1][1]):
+            self.stdout.write(
+                f'{view_name:<28}{count:>10}{duration / count:>10.1f}'
+                f'{queries / count:>13.1f}'
+            )
+        if not samples:
+            return
+        self.stdout.write('')
+        self.stdout.write(f'{"own %":>7}{"total %":>9}  function')
+        for frame, count in own.most_common(options['top']):
+            self.stdout.write('{:>7.1f}{:>9.1f}  {}'.format(
+                count * 100 / samples, total[frame] * 100 / samples, frame
+            ))
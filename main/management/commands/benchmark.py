@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from ...models import Task
+from .load_test import Command as LoadTestCommand, percentile
+
+SERVERS = {
+    'wsgi': ['gunicorn', 'todo.wsgi'],
+    'asgi': ['gunicorn', 'todo.asgi', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def endpoints(user):
+    """Return the paths of the benchmarked pages, keyed by name, for a user
+    with at least one task.
+    """
+    task = Task.objects.filter(user=user).order_by('id').first()
+    if(task is None):
+        raise CommandError(
+            f'"{user}" has no tasks, create some with seed_tasks'
+        )
+    search = '?' + urlencode({'q': task.title.split()[0]})
+    return {
+        'task_list': reverse('main:task_list'),
+        'done_task_list': reverse('main:done_task_list'),
+        'task_detail': task.get_absolute_url(),
+        'task_search': reverse('main:task_search') + search,
+        'api_task_list': reverse('api:task_list'),
+        'api_task_counts': reverse('api:task_counts'),
+        'api_task_search': reverse('api:task_search') + search,
+    }
+
+
+class Command(LoadTestCommand):
+    help = (
+        'Benchmark the task pages and API of a user with concurrent clients '
+        'and save the latencies and throughput of every endpoint as JSON. '
+        'Starts a gunicorn server on the current settings unless --url is '
+        'given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', required=True,
+            help='Username to send the requests as, e.g. seed1 after '
+                 'running seed_tasks.'
+        )
+        parser.add_argument(
+            '--url',
+            help='Benchmark the server running at this URL instead of '
+                 'starting one, e.g. http://127.0.0.1:8000/'
+        )
+        parser.add_argument(
+            '--server', choices=sorted(SERVERS), default='wsgi',
+            help='The server to start.'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests sent to each endpoint.'
+        )
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Only benchmark this endpoint, can be repeated.'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Where to save the results.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Results of a previous run to compare with.'
+        )
+
+    def handle(self, *args, **options):
+        if(options['concurrency'] < 1 or options['requests'] < 1
+                or options['workers'] < 1):
+            raise CommandError(
+                '--concurrency, --requests and --workers must be positive'
+            )
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: options['user']})
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+        paths = endpoints(user)
+        if(options['endpoints']):
+            unknown = set(options['endpoints']) - set(paths)
+            if(unknown):
+                raise CommandError('Unknown endpoints: {}. Choose from {}'.format(
+                    ', '.join(sorted(unknown)), ', '.join(paths)
+                ))
+            paths = {name: paths[name] for name in options['endpoints']}
+        previous = None
+        if(options['compare']):
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        cookie = '{}={}'.format(
+            settings.SESSION_COOKIE_NAME, self.login(options['user'])
+        )
+        server = None
+        url = options['url']
+        if(url is None):
+            server, url = self.start_server(
+                options['server'], options['workers']
+            )
+        try:
+            results = self.benchmark(
+                urlsplit(url), paths, cookie,
+                options['concurrency'], options['requests']
+            )
+        finally:
+            if(server is not None):
+                server.terminate()
+                server.wait()
+
+        report = {
+            'date': timezone.now().isoformat(),
+            'server': options['server'] if options['url'] is None else url,
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'tasks': Task.objects.filter(user=user).count(),
+            'endpoints': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.write_report(results, previous)
+        self.stdout.write(f'Results saved to {options["output"]}')
+
+    def benchmark(self, url, paths, cookie, concurrency, total):
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only http:// URLs are supported')
+        prefix = url.path.rstrip('/')
+        results = {}
+        for name, path in paths.items():
+            target = urlsplit(f'http://{url.netloc}{prefix}{path}')
+            request = self.build_request(target, cookie)
+            # Untimed, so every worker has loaded the code and connected to
+            # the database first.
+            asyncio.run(self.run(
+                url.hostname, url.port or 80, request, concurrency,
+                concurrency
+            ))
+            timings, statuses, elapsed = asyncio.run(self.run(
+                url.hostname, url.port or 80, request, concurrency, total
+            ))
+            timings.sort()
+            results[name] = {
+                'path': path,
+                'requests_per_second': round(len(timings) / elapsed, 1),
+                'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+                'max_ms': round(timings[-1] * 1000, 2),
+                'statuses': {
+                    str(status): count
+                    for status, count in sorted(statuses.items())
+                },
+            }
+        return results
+
+    def write_report(self, results, previous=None):
+        previous = (previous or {}).get('endpoints', {})
+        self.stdout.write(
+            f'{"endpoint":<18}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}'
+            f'{"p99 ms":>10}  statuses'
+        )
+        for name, result in results.items():
+            line = '{:<18}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}  {}'.format(
+                name, result['requests_per_second'], result['p50_ms'],
+                result['p95_ms'], result['p99_ms'],
+                ', '.join(f'{status} x{count}'
+                          for status, count in result['statuses'].items())
+            )
+            before = previous.get(name)
+            if(before):
+                line += '  (req/s {:+.0%}, p95 {:+.0%})'.format(
+                    result['requests_per_second']
+                    / before['requests_per_second'] - 1,
+                    result['p95_ms'] / before['p95_ms'] - 1
+                )
+            failed = any(not 200 <= int(status) < 400
+                         for status in result['statuses'])
+            self.stdout.write(self.style.WARNING(line) if failed else line)
+
+    def start_server(self, server, workers):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        command = [
+            sys.executable, '-m', *SERVERS[server],
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--log-level', 'warning',
+        ]
+        process = subprocess.Popen(command, env=os.environ.copy())
+        deadline = time.monotonic() + 30
+        while True:
+            if(process.poll() is not None):
+                raise CommandError(f'{" ".join(command)} exited')
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                break
+            except OSError:
+                if(time.monotonic() > deadline):
+                    process.terminate()
+                    raise CommandError('The server did not start in time')
+                time.sleep(0.2)
+        self.stdout.write(f'Started {server} server on port {port}')
+        return process, f'http://127.0.0.1:{port}/'
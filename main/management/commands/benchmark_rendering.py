@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from ...models import Task, generate_slug
+from ...templatetags.task_rows import render_rows
+
+# The task_rows markup as the template loop the snippets used before the tag.
+TEMPLATE_ROWS = '''{% for task in tasks %}
+		<div class="row" id="task_{{task.id}}">
+			<div class="col-md-5 col-sm-12 h4">
+				<input type="checkbox" name="slugs" value="{{task.slug}}">
+				<a href="{{task.get_absolute_url}}">{{task.title}}</a>
+			</div>
+			<div class="col-md-4  col-sm-12">DATE</div>
+			{% if task.done %}
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-success" href="{{ task.get_undo_url }}">Undone</a>
+			</div>
+			{% else %}
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-success" href="{{ task.get_do_url }}">Done</a>
+			</div>
+			{% endif %}
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-info" href="{{ task.get_update_url }}">Update</a>
+			</div>
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-danger" href="{{ task.get_delete_url }}">Delete</a>
+			</div>
+		</div>
+	{% endfor %}'''
+
+
+TEMPLATE_DATES = {
+    'deadline': '{{task.do_before}} (<b>{{task.do_before|timeuntil}}</b> left)',
+    'finished': '{{task.finished_on}} (<b>{{task.finished_on|timesince}}</b> '
+                'ago)',
+}
+
+
+def rows_template(column):
+    return engines['django'].from_string(
+        TEMPLATE_ROWS.replace('DATE', TEMPLATE_DATES[column])
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rendering the rows of a task list as a template with the '
+        'task_rows tag. The tasks are built in memory, nothing is saved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100, 1000, 10000]
+        )
+        parser.add_argument(
+            '--column', choices=['deadline', 'finished'], default='deadline'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per measurement, the fastest one is reported.'
+        )
+
+    def handle(self, *args, **options):
+        column = options['column']
+        # Compiled once, as the cached template loader keeps it.
+        template = rows_template(column)
+        now = timezone.now()
+        tasks = [
+            Task(
+                id=i + 1,
+                title=f'Task number {i}',
+                slug=generate_slug(f'Task number {i}'),
+                do_before=now + timedelta(minutes=i),
+                finished_on=now - timedelta(minutes=i),
+                done=i % 3 == 0,
+            )
+            for i in range(max(options['sizes']))
+        ]
+
+        self.stdout.write(
+            f'{"rows":>8} {"template":>12} {"task_rows":>12} {"speedup":>8}'
+        )
+        for size in sorted(options['sizes']):
+            rows = tasks[:size]
+            slow = self.measure(
+                lambda: template.render({'tasks': rows}), options['repeat']
+            )
+            fast = self.measure(
+                lambda: render_rows(rows, column), options['repeat']
+            )
+            self.stdout.write(
+                f'{size:>8} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms '
+                f'{slow / fast:>7.1f}x'
+            )
+
+    def measure(self, func, repeat):
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ...api.serializers import (
+    FIELD_PRESETS, TaskSerializer, TaskValuesSerializer
+)
+from ...models import Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare TaskSerializer with the values() based TaskValuesSerializer '
+        'when listing many tasks. The tasks are created inside a transaction '
+        'which is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+        )
+        parser.add_argument(
+            '--fields', choices=sorted(FIELD_PRESETS), default='full'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per measurement, the fastest one is reported.'
+        )
+
+    def handle(self, *args, **options):
+        fields = FIELD_PRESETS[options['fields']]
+        try:
+            with transaction.atomic():
+                self.run(options['sizes'], fields, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, fields, repeat):
+        user = get_user_model().objects.create_user(
+            username='benchmark-serializers'
+        )
+        now = timezone.now()
+        created = 0
+
+        self.stdout.write(
+            f'{"tasks":>8} {"TaskSerializer":>16} '
+            f'{"values() path":>16} {"speedup":>8}'
+        )
+        for size in sorted(sizes):
+            Task.objects.bulk_create(
+                (
+                    Task(
+                        title=f'Task number {i}',
+                        description='Some description text. ' * 4,
+                        do_before=now + timedelta(minutes=i),
+                        finished_on=now if i % 3 == 0 else None,
+                        done=i % 3 == 0,
+                        user=user,
+                    )
+                    for i in range(created, size)
+                )
+            )
+            created = size
+            tasks = Task.objects.filter(user=user).order_by('pk')
+
+            def model_path():
+                return JSONRenderer().render(
+                    TaskSerializer(tasks, many=True, fields=fields).data
+                )
+
+            def values_path():
+                return JSONRenderer().render(
+                    TaskValuesSerializer(fields=fields).to_representation(
+                        tasks.values(*fields)
+                    )
+                )
+
+            slow = self.measure(model_path, repeat)
+            fast = self.measure(values_path, repeat)
+            self.stdout.write(
+                f'{size:>8} {slow * 1000:>14.1f}ms '
+                f'{fast * 1000:>14.1f}ms {slow / fast:>7.1f}x'
+            )
+
+    def measure(self, func, repeat):
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
@@ -0,0 +1,221 @@
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ...models import Task, TaskImport
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+
+
+# The readers yield the line number each row starts on with the row.
+
+def read_ndjson(stream):
+    # Lines are decoded in Command.build() so rows skipped on resume are
+    # never parsed.
+    return (
+        (number, line) for number, line in enumerate(stream, start=1)
+        if line.strip()
+    )
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    # Reads the header, so line_num is the last line of the previous row.
+    reader.fieldnames
+    while True:
+        number = reader.line_num + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        yield number, row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def parse_date(value, field):
+    if value in (None, ''):
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string')
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'{field} is not a valid datetime: {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def clean_field(name, value):
+    """Run the model field's validation, e.g. the title's max_length, which
+    the database would otherwise enforce by failing the whole batch.
+    """
+    try:
+        return Task._meta.get_field(name).clean(value, None)
+    except ValidationError as e:
+        raise ValueError(f'{name}: {" ".join(e.messages)}')
+
+
+def build_task(row, user):
+    title = row.get('title')
+    if not title:
+        raise ValueError('title is required')
+    do_before = parse_date(row.get('do_before'), 'do_before')
+    if do_before is None:
+        raise ValueError('do_before is required')
+    return Task(
+        title=clean_field('title', title),
+        description=clean_field('description', row.get('description') or ''),
+        do_before=do_before,
+        done=parse_bool(row.get('done', False)),
+        finished_on=parse_date(row.get('finished_on'), 'finished_on'),
+        user=user,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tasks for a user from an NDJSON or CSV file (as written by '
+        'the task export), committing one bulk insert per batch.'
+    )
+    stealth_options = ('stdin',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument(
+            '--user', required=True,
+            help='Username of the user who will own the tasks.'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Input format, guessed from the file extension by default.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Name under which the database records how many rows have '
+                 'been committed. Defaults to the absolute path of the file.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the rows committed by a previous, failed run.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        user = self.get_user(options['user'])
+        input_format = options['format'] or self.guess_format(path)
+        checkpoint = options['checkpoint']
+        if checkpoint is None and path != '-':
+            checkpoint = os.path.abspath(path)
+        max_length = TaskImport._meta.get_field('name').max_length
+        if checkpoint is not None and len(checkpoint) > max_length:
+            raise CommandError(
+                f'The checkpoint name is longer than {max_length} '
+                f'characters, set a shorter one with --checkpoint'
+            )
+
+        skip = 0
+        if options['resume']:
+            if checkpoint is None:
+                raise CommandError('--resume needs --checkpoint with stdin')
+            skip = self.read_checkpoint(user, checkpoint)
+            self.stdout.write(f'Resuming after {skip} committed rows')
+
+        if path == '-':
+            stream = options.get('stdin', sys.stdin)
+            imported = self.import_rows(
+                stream, input_format, user, batch_size, skip, checkpoint
+            )
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                imported = self.import_rows(
+                    stream, input_format, user, batch_size, skip, checkpoint
+                )
+
+        if checkpoint is not None:
+            TaskImport.objects.filter(user=user, name=checkpoint).delete()
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} tasks'))
+
+    def import_rows(self, stream, input_format, user, batch_size, skip,
+                    checkpoint):
+        rows = enumerate(READERS[input_format](stream), start=1)
+        committed = skip
+        started = time.monotonic()
+
+        for _, (line, row) in itertools.islice(rows, skip, None):
+            batch = [self.build(line, row, user, committed)]
+            for _, (line, row) in itertools.islice(rows, batch_size - 1):
+                batch.append(self.build(line, row, user, committed))
+
+            committed += len(batch)
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+                if checkpoint is not None:
+                    TaskImport.objects.update_or_create(
+                        user=user, name=checkpoint,
+                        defaults={'committed': committed}
+                    )
+
+            elapsed = time.monotonic() - started
+            rate = (committed - skip) / elapsed if elapsed else 0
+            self.stdout.write(
+                f'Committed {committed} rows ({rate:.0f} rows/s)'
+            )
+        return committed - skip
+
+    def build(self, line, row, user, committed):
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            return build_task(row, user)
+        except (AttributeError, ValueError) as e:
+            raise CommandError(
+                f'Line {line}: {e}. {committed} rows were committed, fix '
+                f'the row and rerun with --resume to continue.'
+            )
+
+    def get_user(self, username):
+        User = get_user_model()
+        try:
+            return User.objects.get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            raise CommandError(f'User "{username}" does not exist')
+
+    def guess_format(self, path):
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        if extension == 'jsonl':
+            extension = 'ndjson'
+        if extension not in READERS:
+            raise CommandError('Cannot guess the input format, use --format')
+        return extension
+
+    def read_checkpoint(self, user, checkpoint):
+        committed = TaskImport.objects.filter(
+            user=user, name=checkpoint
+        ).values_list('committed', flat=True).first()
+        return committed or 0
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Send GET requests to a running server from many concurrent clients '
+        'and report the throughput and latencies, e.g. to compare the WSGI '
+        'and ASGI setups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://127.0.0.1:8000/')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--user',
+            help='Username to send the requests as. A session is created for '
+                 'them in the database the server uses.'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only http:// URLs are supported')
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+
+        cookie = None
+        if options['user']:
+            cookie = '{}={}'.format(
+                settings.SESSION_COOKIE_NAME,
+                self.login(options['user'])
+            )
+        request = self.build_request(url, cookie)
+
+        timings, statuses, elapsed = asyncio.run(self.run(
+            url.hostname, url.port or 80, request,
+            options['concurrency'], options['requests']
+        ))
+
+        timings.sort()
+        failed = sum(count for status, count in statuses.items()
+                     if not 200 <= status < 400)
+        self.stdout.write(
+            f'{len(timings)} requests with {options["concurrency"]} clients '
+            f'in {elapsed:.2f}s: {len(timings) / elapsed:.1f} requests/s'
+        )
+        self.stdout.write(
+            'latency p50 {:.1f}ms, p95 {:.1f}ms, p99 {:.1f}ms, '
+            'max {:.1f}ms'.format(
+                *(percentile(timings, fraction) * 1000
+                  for fraction in (0.5, 0.95, 0.99, 1))
+            )
+        )
+        self.stdout.write('status codes: {}'.format(', '.join(
+            f'{status} x{count}' for status, count in sorted(statuses.items())
+        )))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} failed requests'))
+
+    def login(self, username):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            raise CommandError(f'User "{username}" does not exist')
+        # The same session django.test.Client.force_login() creates.
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def build_request(self, url, cookie):
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        lines = [
+            f'GET {path} HTTP/1.1',
+            f'Host: {url.netloc}',
+            'Accept: */*',
+            'Connection: close',
+        ]
+        if cookie:
+            lines.append(f'Cookie: {cookie}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+    async def run(self, host, port, request, concurrency, total):
+        timings = []
+        statuses = {}
+        remaining = iter(range(total))
+
+        async def client():
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await self.fetch(host, port, request)
+                except (OSError, IndexError, ValueError):
+                    status = 0
+                timings.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return timings, statuses, time.perf_counter() - started
+
+    async def fetch(self, host, port, request):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            # Read the whole response, the server closes the connection.
+            while await reader.read(65536):
+                pass
+        finally:
+            writer.close()
+        return int(status_line.split()[1])
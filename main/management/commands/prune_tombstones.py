@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ...models import TaskTombstone
+from ...sync import retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the tombstones of the tasks deleted more than '
+        'TASKS_SYNC_RETENTION_DAYS ago, which the sync cursors still '
+        'accepted no longer need. Run it daily, e.g. from cron.'
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = TaskTombstone.objects.filter(
+            deleted_on__lt=retention_cutoff()
+        ).delete()
+        self.stdout.write(f'Deleted {deleted} tombstones')
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from ...models import Task, TaskCounter
+
+
+def true_counts(tasks):
+    """Return `{user_id: (open, done)}` counted from the task rows."""
+    counts = {}
+    rows = tasks.order_by().values_list('user_id', 'done').annotate(
+        count=Count('pk')
+    )
+    for user_id, done, count in rows:
+        open_count, done_count = counts.get(user_id, (0, 0))
+        if(done):
+            done_count = count
+        else:
+            open_count = count
+        counts[user_id] = (open_count, done_count)
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Check the per-user task counters against the tasks and rebuild the '
+        'wrong ones. With --check, only report them and fail if there are '
+        'any.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Report the wrong counters without changing them.'
+        )
+
+    def handle(self, *args, **options):
+        counted = true_counts(Task.objects.all())
+        stored = {
+            user_id: (open_count, done_count)
+            for user_id, open_count, done_count in
+            TaskCounter.objects.values_list(
+                'user_id', 'open_count', 'done_count'
+            )
+        }
+        wrong = sorted(
+            user_id for user_id in set(counted) | set(stored)
+            if counted.get(user_id, (0, 0)) != stored.get(user_id, (0, 0))
+        )
+        for user_id in wrong:
+            self.stdout.write(
+                'User {}: counted {} open and {} done, stored {} open and {} '
+                'done'.format(
+                    user_id,
+                    *counted.get(user_id, (0, 0)),
+                    *stored.get(user_id, (0, 0))
+                )
+            )
+        summary = 'Checked the counters of {} users, {} wrong'.format(
+            len(set(counted) | set(stored)), len(wrong)
+        )
+        if(options['check']):
+            if(wrong):
+                raise CommandError(summary)
+            self.stdout.write(summary)
+            return
+
+        for user_id in wrong:
+            self.rebuild(user_id)
+        self.stdout.write(summary + ', rebuilt')
+
+    def rebuild(self, user_id):
+        # Writers adjust the counter after changing their rows, in the same
+        # transaction. Counting while holding the counter's lock therefore
+        # sees every write that already adjusted it, and the writes still in
+        # progress adjust the rebuilt value once the lock is released.
+        with transaction.atomic():
+            TaskCounter.objects.get_or_create(user_id=user_id)
+            counter = TaskCounter.objects.select_for_update().get(
+                user_id=user_id
+            )
+            counter.open_count, counter.done_count = true_counts(
+                Task.objects.filter(user_id=user_id)
+            ).get(user_id, (0, 0))
+            counter.save()
@@ -0,0 +1,147 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from ...models import Task
+
+VERBS = [
+    'Buy', 'Call', 'Clean', 'Email', 'Fix', 'Finish', 'Pay', 'Plan', 'Read',
+    'Renew', 'Review', 'Schedule', 'Send', 'Update', 'Water', 'Write',
+]
+OBJECTS = [
+    'the report', 'groceries', 'the plumber', 'the car insurance',
+    'the garden', 'mom', 'the quarterly taxes', 'the slides', 'the bike',
+    'the library books', 'the dentist', 'the invoice', 'the blog post',
+    'the passport', 'the kitchen', 'the budget', 'the plants', 'the contract',
+]
+DESCRIPTIONS = [
+    '', '', '',
+    'Before the meeting.',
+    'Ask about the discount first.',
+    'Check the notes from last week and follow up with everyone involved.',
+    'Keep the receipt.',
+    'See the shared folder for the details.',
+]
+
+CREATED_BEFORE_DEADLINE = timedelta(days=7)
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users with generated tasks to reproduce a large database '
+        'locally, e.g. before running the benchmark command.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tasks-per-user', type=int, default=100)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='The users are named <prefix>1, <prefix>2, ... Existing '
+                 'users with those names get more tasks.'
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Password of the created users.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--seed', type=int,
+            help='Seed of the random generator, to generate the same data '
+                 'again.'
+        )
+
+    def handle(self, *args, **options):
+        if(options['users'] < 1 or options['tasks_per_user'] < 0
+                or options['batch_size'] < 1):
+            raise CommandError(
+                '--users and --batch-size must be positive, '
+                '--tasks-per-user can not be negative'
+            )
+        rng = random.Random(options['seed'])
+        user_ids = self.create_users(
+            options['prefix'], options['users'], options['password']
+        )
+
+        started = time.monotonic()
+        created = 0
+        now = timezone.now()
+        tasks = self.generate_tasks(
+            rng, user_ids, options['tasks_per_user'], now
+        )
+        while True:
+            batch = [task for _, task in zip(range(options['batch_size']), tasks)]
+            if(not batch):
+                break
+            self.create_tasks(batch, now)
+            created += len(batch)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Created {created} tasks ({created / elapsed:.0f} tasks/s)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users with {created} tasks'
+        ))
+
+    def create_users(self, prefix, count, password):
+        User = get_user_model()
+        usernames = [f'{prefix}{i}' for i in range(1, count + 1)]
+        # Hashing is slow on purpose, every user shares the same hash.
+        password = make_password(password)
+        User.objects.bulk_create([
+            User(
+                username=username, email=f'{username}@example.com',
+                password=password
+            )
+            for username in usernames
+        ], ignore_conflicts=True)
+        return list(User.objects.filter(
+            username__in=usernames
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def generate_tasks(self, rng, user_ids, tasks_per_user, now):
+        for user_id in user_ids:
+            for _ in range(tasks_per_user):
+                # Deadlines from two months ago to three months ahead, most
+                # past ones done.
+                do_before = now + timedelta(
+                    minutes=rng.randint(-60 * 24 * 60, 60 * 24 * 90)
+                )
+                done = rng.random() < (0.8 if do_before < now else 0.1)
+                finished_on = None
+                if(done):
+                    # Between the creation, see create_tasks(), and the
+                    # deadline.
+                    created_on = min(do_before - CREATED_BEFORE_DEADLINE, now)
+                    finished_on = created_on + rng.random() * (
+                        min(do_before, now) - created_on
+                    )
+                yield Task(
+                    title='{} {}'.format(
+                        rng.choice(VERBS), rng.choice(OBJECTS)
+                    ),
+                    description=rng.choice(DESCRIPTIONS),
+                    do_before=do_before,
+                    done=done,
+                    finished_on=finished_on,
+                    user_id=user_id,
+                )
+
+    def create_tasks(self, tasks, now):
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            # created_on is always set to the time of the insert, backdate
+            # the tasks to a week before their deadline.
+            Task._base_manager.filter(pk__in=[task.pk for task in tasks]).update(
+                created_on=Least(
+                    F('do_before') - CREATED_BEFORE_DEADLINE, Value(now)
+                )
+            )
@@ -0,0 +1,183 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import dateformat, timezone
+from django.utils.formats import get_format
+
+from ...models import Task
+
+REMINDER_FIELDS = (
+    'pk', 'title', 'slug', 'do_before', 'user__username', 'user__email'
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Email the owners of the open tasks due in the next --window '
+        'minutes, once per task. The tasks are claimed and emailed in '
+        'batches over a single mail server connection.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int,
+            default=getattr(settings, 'TASKS_REMINDER_WINDOW', 60),
+            help='Remind about the tasks due in this many minutes.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'TASKS_REMINDER_BATCH_SIZE', 500)
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep running and check again every --interval seconds, '
+                 'e.g. as a worker process.'
+        )
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        if(options['window'] < 1 or options['batch_size'] < 1
+                or options['interval'] < 1):
+            raise CommandError(
+                '--window, --batch-size and --interval must be positive'
+            )
+        window = timedelta(minutes=options['window'])
+        while True:
+            try:
+                tasks, emails, failed = self.send_reminders(
+                    window, options['batch_size']
+                )
+            except Exception:
+                if(not options['loop']):
+                    raise
+                # The next run tries again, e.g. once the mail server or
+                # the database is back.
+                logger.exception('Could not send the reminders')
+            else:
+                self.stdout.write(
+                    f'Reminded {tasks} tasks in {emails} emails'
+                    + (f', {failed} tasks failed' if failed else '')
+                )
+            if(not options['loop']):
+                break
+            time.sleep(options['interval'])
+
+    def send_reminders(self, window, batch_size):
+        """Email the due tasks and return the number of tasks reminded, of
+        emails sent and of tasks whose email failed.
+
+        Every batch is claimed and committed before its emails are sent, so
+        no lock is held while talking to the mail server; a run stopped in
+        between loses that batch's reminders rather than sending them twice.
+        The tasks of an email that failed are released at the end of the
+        run for the next one to retry, without holding up the other users.
+        """
+        site = Site.objects.get_current()
+        tasks = emails = 0
+        failed = []
+        after = None
+        mail_connection = get_connection()
+        try:
+            while True:
+                with transaction.atomic():
+                    rows = self.claim(window, batch_size, after)
+                if(not rows):
+                    break
+                after = rows[-1]['do_before']
+                for message, pks in self.build_messages(rows, site):
+                    try:
+                        # Reopens the connection after a failed email.
+                        mail_connection.open()
+                        mail_connection.send_messages([message])
+                    except Exception:
+                        logger.exception(
+                            'Could not send the reminder of the tasks %s', pks
+                        )
+                        failed.extend(pks)
+                        mail_connection.close()
+                    else:
+                        tasks += len(pks)
+                        emails += 1
+        finally:
+            mail_connection.close()
+            if(failed):
+                Task._base_manager.filter(pk__in=failed).update(
+                    reminded_on=None
+                )
+        return tasks, emails, len(failed)
+
+    def claim(self, window, batch_size, after=None):
+        """Mark the next batch of due tasks reminded and return their rows.
+
+        Marked tasks leave the partial index the query scans, but their old
+        index entries stay until the table is vacuumed, so each batch starts
+        from the deadline the previous one stopped at instead of rescanning
+        them. Concurrent runs skip the rows another one has locked.
+        """
+        now = timezone.now()
+        tasks = Task.objects.due_for_reminder(window, now)
+        if(after is not None):
+            tasks = tasks.filter(do_before__gte=after)
+        if(connection.features.has_select_for_update_skip_locked):
+            tasks = tasks.select_for_update(skip_locked=True, of=('self',))
+        rows = list(tasks.values(*REMINDER_FIELDS)[:batch_size])
+        if(rows):
+            # A plain UPDATE: reminders don't change the task lists, so no
+            # cache, counter or event needs to know.
+            Task._base_manager.filter(
+                pk__in=[row['pk'] for row in rows]
+            ).update(reminded_on=now)
+        return rows
+
+    def build_messages(self, rows, site):
+        """Return one email per user, listing their tasks in `rows`, with
+        the primary keys of those tasks.
+        """
+        protocol = getattr(settings, 'ACCOUNT_DEFAULT_HTTP_PROTOCOL', 'http')
+        # Looked up once, the date filter would do it for every task.
+        datetime_format = get_format('DATETIME_FORMAT')
+        tasks_by_user = {}
+        for row in rows:
+            if(not row['user__email']):
+                continue
+            tasks_by_user.setdefault(
+                (row['user__username'], row['user__email']), []
+            ).append({
+                'pk': row['pk'],
+                'title': row['title'],
+                'do_before': dateformat.format(
+                    timezone.localtime(row['do_before']), datetime_format
+                ),
+                'url': '{}://{}{}'.format(
+                    protocol, site.domain,
+                    reverse('main:task_detail', args=[row['slug']])
+                ),
+            })
+
+        messages = []
+        for (username, email), tasks in tasks_by_user.items():
+            context = {
+                'username': username,
+                'tasks': tasks,
+                'site_name': site.name,
+                'site_domain': site.domain,
+            }
+            subject = render_to_string(
+                'main/email/reminder_subject.txt', context
+            )
+            messages.append((EmailMessage(
+                ' '.join(subject.splitlines()).strip(),
+                render_to_string('main/email/reminder_message.txt', context),
+                to=[email]
+            ), [task['pk'] for task in tasks]))
+        return messages
@@ -0,0 +1,123 @@
+"""Prometheus metrics, served at /metrics.
+
+MetricsMiddleware records the latency, response size and SQL queries of
+every request by URL name. The task cache counts its hits and misses, and
+every committed task write counts its events by type.
+
+Each gunicorn worker is a separate process with its own counters. Set the
+PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory shared
+by the workers: every process then writes its samples there and /metrics
+adds them up, whichever worker serves it. gunicorn.conf.py empties the
+directory when gunicorn starts and tells the client about exited workers.
+"""
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10
+)
+
+REQUEST_LATENCY = Histogram(
+    'todo_request_duration_seconds', 'Time to build the response.',
+    ['view', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'todo_requests', 'Responses by status code.',
+    ['view', 'method', 'status']
+)
+RESPONSE_SIZE = Histogram(
+    'todo_response_size_bytes', 'Size of the non-streaming responses.',
+    ['view'], buckets=[256 * 4 ** i for i in range(9)]
+)
+DB_QUERIES = Histogram(
+    'todo_request_db_queries', 'SQL queries run by a request.',
+    ['view'], buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50, 100)
+)
+DB_DURATION = Histogram(
+    'todo_request_db_duration_seconds', 'Time spent in SQL queries.',
+    ['view'], buckets=LATENCY_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    'todo_task_cache_requests', 'Task list fragment cache lookups.',
+    ['result']
+)
+TASK_EVENTS = Counter(
+    'todo_task_events', 'Committed task changes by event type.', ['event']
+)
+
+
+def view_label(request):
+    match = request.resolver_match
+    # Unresolved paths share one label, so scanners can't add series.
+    return match.view_name if match else 'unresolved'
+
+
+class MetricsMiddleware:
+    """Record the request metrics. It runs inside QueryCountMiddleware,
+    which has counted the queries by the time the response comes back.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, duration):
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(duration)
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            DB_QUERIES.labels(view).observe(stats.count)
+            DB_DURATION.labels(view).observe(stats.duration)
+
+
+def metrics(request):
+    """Serve the metrics in the Prometheus text format. Scrapers must send
+    TASKS_METRICS_TOKEN as a bearer token; without one the metrics are only
+    served with DEBUG on.
+    """
+    token = getattr(settings, 'TASKS_METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    else:
+        authorization = request.headers.get('Authorization', '')
+        if not constant_time_compare(authorization, f'Bearer {token}'):
+            raise Http404
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,111 @@
+"""Per-request SQL instrumentation.
+
+QueryCountMiddleware counts the queries each request runs and the time spent
+in them. It reports them in a Server-Timing header, which browsers show in
+their developer tools, and in the `main.queries` log.
+
+The queries are counted by an execute wrapper installed on every database
+connection when it opens. The wrapper adds to the QueryStats of the current
+request, held in a context variable, so the queries the async views run in
+sync_to_async() threads are counted too. Queries run while a streaming
+response is consumed, e.g. by the export, happen after the request is
+reported and are not counted.
+"""
+import contextvars
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('main.queries')
+
+_current_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.started = time.perf_counter()
+        # Set to a dict to also collect `[count, duration]` per SQL
+        # statement, e.g. by the profiler.
+        self.statements = None
+
+
+def count_queries(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stats.count += 1
+        stats.duration += duration
+        if stats.statements is not None:
+            statement = stats.statements.setdefault(sql, [0, 0.0])
+            statement[0] += 1
+            statement[1] += duration
+
+
+@receiver(connection_created)
+def install_query_counter(connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class QueryCountMiddleware:
+    """Count the queries of every request, see the module docstring. The
+    counts are also left on the request as `request.query_stats`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = request.query_stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = request.query_stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    def report(self, request, response, stats):
+        db_ms = stats.duration * 1000
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        if getattr(settings, 'TASKS_SERVER_TIMING', True):
+            timing = 'db;desc="{} queries";dur={:.1f}, total;dur={:.1f}'.format(
+                stats.count, db_ms, total_ms
+            )
+            if response.has_header('Server-Timing'):
+                timing = response['Server-Timing'] + ', ' + timing
+            response['Server-Timing'] = timing
+        match = request.resolver_match
+        logger.info(
+            '%s %s (%s): %d queries in %.1fms, %.1fms total',
+            request.method, request.path, match.view_name if match else '-',
+            stats.count, db_ms, total_ms
+        )
@@ -0,0 +1,20 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_finished_on(apps, schema_editor):
+    Task = apps.get_model('main', 'Task')
+    Task.objects.filter(done=True, finished_on__isnull=True).update(
+        finished_on=F('updated_on')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_auto_20190526_0306'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_finished_on, migrations.RunPython.noop),
+    ]
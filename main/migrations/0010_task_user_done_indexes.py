@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_backfill_task_finished_on'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'done', 'do_before', 'id'], name='task_user_done_do_before_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'done', 'finished_on', 'id'], name='task_user_done_finished_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# `slug__iexact` compiles to `UPPER(slug::text) = UPPER(%s)` on PostgreSQL and
+# to `slug LIKE %s ESCAPE '\'` on SQLite, neither of which can use the plain
+# unique index on `slug`. Build an index matching each backend's expression,
+# led by `user_id` since every view also scopes the lookup to request.user.
+INDEX_NAME = 'task_slug_iexact_idx'
+
+CREATE_INDEX_SQL = {
+    'postgresql': (
+        'CREATE INDEX {} ON main_task '
+        '(user_id, UPPER(slug::text))'.format(INDEX_NAME)
+    ),
+    'sqlite': (
+        'CREATE INDEX {} ON main_task '
+        '(user_id, slug COLLATE NOCASE)'.format(INDEX_NAME)
+    ),
+}
+
+
+def create_index(apps, schema_editor):
+    sql = CREATE_INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_INDEX_SQL:
+        schema_editor.execute('DROP INDEX {}'.format(INDEX_NAME))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_task_user_done_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_task_tombstone'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_done_do_before_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_done_finished_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('done', False)), fields=['user', 'do_before', 'id'], name='task_user_done_do_before_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('done', True)), fields=['user', 'finished_on', 'id'], name='task_user_done_finished_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_task_counters(apps, schema_editor):
+    Task = apps.get_model('main', 'Task')
+    TaskCounter = apps.get_model('main', 'TaskCounter')
+    counters = {}
+    rows = Task.objects.order_by().values_list('user_id', 'done').annotate(
+        count=models.Count('pk')
+    )
+    for user_id, done, count in rows:
+        counter = counters.setdefault(user_id, TaskCounter(user_id=user_id))
+        if done:
+            counter.done_count = count
+        else:
+            counter.open_count = count
+    TaskCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0013_task_user_done_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_task_counters, migrations.RunPython.noop
+        ),
+    ]
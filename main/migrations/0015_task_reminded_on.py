@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_task_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='reminded_on',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('done', False), ('reminded_on__isnull', True)), fields=['do_before', 'id'], name='task_reminder_due_idx'),
+        ),
+    ]
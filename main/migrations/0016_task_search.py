@@ -0,0 +1,92 @@
+from django.db import migrations
+
+# Full-text search over the title and description of tasks, see main/search.py.
+#
+# PostgreSQL: a generated tsvector column, so every write path keeps it up to
+# date, with a GIN index. With the btree_gin extension the index is led by
+# user_id and a search only reads the postings of the user's own tasks.
+#
+# SQLite: an external content FTS5 table, kept in sync with main_task by
+# triggers. Migrations that make SQLite remake main_task drop the triggers,
+# main.search.restore_sqlite_triggers() creates them again after migrate.
+POSTGRESQL_COLUMN_SQL = (
+    "ALTER TABLE main_task ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english'::regconfig, title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, description), 'B')"
+    ") STORED"
+)
+
+SQLITE_SQL = [
+    "CREATE VIRTUAL TABLE main_task_fts USING fts5("
+    "title, description, content='main_task', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER main_task_fts_insert AFTER INSERT ON main_task BEGIN "
+    "INSERT INTO main_task_fts (rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER main_task_fts_delete AFTER DELETE ON main_task BEGIN "
+    "INSERT INTO main_task_fts (main_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER main_task_fts_update "
+    "AFTER UPDATE OF title, description ON main_task BEGIN "
+    "INSERT INTO main_task_fts (main_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO main_task_fts (rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO main_task_fts (main_task_fts) VALUES ('rebuild')",
+]
+
+
+def create_postgresql_index(schema_editor):
+    schema_editor.execute(POSTGRESQL_COLUMN_SQL)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'btree_gin'"
+        )
+        has_btree_gin = cursor.fetchone() is not None
+    if has_btree_gin:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+        columns = 'user_id, search_vector'
+    else:
+        columns = 'search_vector'
+    schema_editor.execute(
+        'CREATE INDEX task_search_idx ON main_task '
+        'USING gin ({})'.format(columns)
+    )
+
+
+def create_sqlite_index(schema_editor):
+    for sql in SQLITE_SQL:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        create_postgresql_index(schema_editor)
+    elif vendor == 'sqlite':
+        create_sqlite_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX task_search_idx')
+        schema_editor.execute('ALTER TABLE main_task DROP COLUMN search_vector')
+    elif vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(
+                'DROP TRIGGER main_task_fts_{}'.format(trigger)
+            )
+        schema_editor.execute('DROP TABLE main_task_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_task_reminded_on'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
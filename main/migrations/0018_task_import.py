@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0017_task_created_on_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskImport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('committed', models.PositiveIntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskimport',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='task_import_user_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_task_import'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'do_before', 'id'], name='task_user_do_before_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:03
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+# Replaces the index 0011 built with raw SQL for slug__iexact. The task pages
+# now look slugs up with `Task.objects.with_slug()`, which compares UPPER(slug)
+# on every backend and matches this declared index.
+RAW_INDEX_NAME = 'task_slug_iexact_idx'
+
+CREATE_RAW_INDEX_SQL = {
+    'postgresql': (
+        'CREATE INDEX {} ON main_task '
+        '(user_id, UPPER(slug::text))'.format(RAW_INDEX_NAME)
+    ),
+    'sqlite': (
+        'CREATE INDEX {} ON main_task '
+        '(user_id, slug COLLATE NOCASE)'.format(RAW_INDEX_NAME)
+    ),
+}
+
+
+def drop_raw_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_RAW_INDEX_SQL:
+        schema_editor.execute('DROP INDEX {}'.format(RAW_INDEX_NAME))
+
+
+def create_raw_index(apps, schema_editor):
+    sql = CREATE_RAW_INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_task_user_do_before_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_raw_index, create_raw_index),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(models.F('user'), django.db.models.functions.text.Upper('slug'), name='task_user_slug_upper_idx'),
+        ),
+    ]
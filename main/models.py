@@ -1,11 +1,296 @@
 # -*- coding: utf-8 -*-
+import secrets
+
 from django.urls import reverse
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, OuterRef, Subquery, sql
+from django.db.models.deletion import Collector
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
 
+from . import cache, events
+
 User = settings.AUTH_USER_MODEL
 
+# 8 random bytes give 64 bits of entropy, enough to make a slug collision
+# practically impossible without ever reading the table before an insert.
+SLUG_TOKEN_BYTES = 8
+
+BULK_ACTIONS = ('do', 'undo', 'delete')
+
+
+def generate_slug(title, max_length=255):
+    token = secrets.token_hex(SLUG_TOKEN_BYTES)
+    title_length = max_length - len(token) - 1
+    slug = '{}-{}'.format(
+        token,
+        slugify(title, allow_unicode=True)[:title_length]
+    )
+    return slug.rstrip('-')
+
+
+def can_return_rows_from_update(connection):
+    """Whether the database supports UPDATE ... RETURNING: PostgreSQL, and
+    SQLite from 3.35. MariaDB only supports RETURNING on INSERT and DELETE,
+    and MySQL not at all.
+    """
+    if(connection.vendor == 'postgresql'):
+        return True
+    return (
+        connection.vendor == 'sqlite' and
+        connection.Database.sqlite_version_info >= (3, 35)
+    )
+
+
+def counter_deltas(rows, sign=1):
+    """Return the `{user_id: (open, done)}` counter changes for adding
+    (`sign=1`) or removing (`sign=-1`) the tasks given as `(user_id, done)`
+    rows.
+    """
+    deltas = {}
+    for user_id, done in rows:
+        open_delta, done_delta = deltas.get(user_id, (0, 0))
+        if(done):
+            done_delta += sign
+        else:
+            open_delta += sign
+        deltas[user_id] = (open_delta, done_delta)
+    return deltas
+
+
+def transition_deltas(user_ids, done):
+    """Return the counter changes for doing (or undoing, with `done=False`)
+    one task of each of `user_ids`.
+    """
+    step = 1 if done else -1
+    deltas = {}
+    for user_id in user_ids:
+        open_delta, done_delta = deltas.get(user_id, (0, 0))
+        deltas[user_id] = (open_delta - step, done_delta + step)
+    return deltas
+
+
+class TaskQuerySet(models.QuerySet):
+    """Keeps the per-user counters, cache and task events in step with
+    writes.
+
+    Updates and deletes read back the owner and slug of every row they
+    change, with RETURNING where the database supports it, to know whose
+    counters to adjust, whose cache to invalidate and which events to
+    publish.
+    """
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def with_slug(self, slug):
+        """Match the slug case-insensitively, on the expression of the
+        `task_user_slug_upper_idx` index.
+        """
+        return self.alias(slug_upper=Upper('slug')).filter(
+            slug_upper=Upper(models.Value(slug))
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            if(not obj.pk):
+                obj.fill_derived_fields(creating=True)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super(TaskQuerySet, self).bulk_create(
+                objs, *args, **kwargs
+            )
+            TaskCounter.objects.using(self.db).adjust(
+                counter_deltas((obj.user_id, obj.done) for obj in objs)
+            )
+        cache.invalidate(obj.user_id for obj in objs)
+        events.publish(
+            'created', [(obj.user_id, obj.slug) for obj in objs], using=self.db
+        )
+        return created
+
+    def update(self, **kwargs):
+        # UPDATE statements skip auto_now, sync needs updated_on to follow
+        # every change.
+        kwargs.setdefault('updated_on', timezone.now())
+        if('do_before' in kwargs):
+            kwargs.setdefault('reminded_on', None)
+        if('done' not in kwargs):
+            return self._update_and_publish('updated', **kwargs)
+        # The rows whose done flag flips move between the counters, so they
+        # are updated separately.
+        done = bool(kwargs['done'])
+        with transaction.atomic(using=self.db, savepoint=False):
+            return self.filter(done=done)._update_and_publish(
+                'updated', **kwargs
+            ) + self.filter(done=not done)._update_and_publish(
+                'done' if done else 'undone', **kwargs
+            )
+
+    def _update_and_publish(self, event_type, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = self._update_returning(kwargs)
+            if(event_type in ('done', 'undone')):
+                TaskCounter.objects.using(self.db).adjust(transition_deltas(
+                    (user_id for user_id, slug in rows),
+                    done=event_type == 'done'
+                ))
+        cache.invalidate(user_id for user_id, slug in rows)
+        events.publish(event_type, rows, using=self.db)
+        return len(rows)
+
+    def _update_returning(self, values):
+        """Run update(**values) and return the `(user_id, slug)` of the
+        updated rows.
+        """
+        self._not_support_combined_queries('update')
+        if(self.query.is_sliced):
+            raise TypeError('Cannot update a query once a slice has been taken.')
+        self._for_write = True
+        connection = connections[self.db]
+        if(not can_return_rows_from_update(connection)):
+            rows = list(self.select_for_update().order_by().values_list(
+                'pk', 'user_id', 'slug'
+            ))
+            models.QuerySet.update(
+                self.model._base_manager.using(self.db).filter(
+                    pk__in=[pk for pk, user_id, slug in rows]
+                ),
+                **values
+            )
+            return [(user_id, slug) for pk, user_id, slug in rows]
+
+        # Built like QuerySet.update() builds its query.
+        query = self._chain().query.chain(sql.UpdateQuery)
+        query.add_update_values(values)
+        query.clear_ordering(force=True)
+        query.annotations = {}
+        update_sql, params = query.get_compiler(self.db).as_sql()
+        if(not update_sql):
+            return []
+        quote = connection.ops.quote_name
+        with transaction.mark_for_rollback_on_error(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute('{} RETURNING {}, {}'.format(
+                    update_sql, quote('user_id'), quote('slug')
+                ), params)
+                return cursor.fetchall()
+
+    def delete(self):
+        """Delete the matching tasks, leaving a TaskTombstone for each.
+
+        On PostgreSQL a single statement deletes the rows and inserts their
+        tombstones, which skips the pre_delete and post_delete signals and
+        the cascades of QuerySet.delete(). It is only used while Task has no
+        delete signal receivers and nothing to cascade to.
+        """
+        assert self.query.can_filter(), \
+            "Cannot use 'limit' or 'offset' with delete."
+        fast = (
+            connections[self.db].vendor == 'postgresql' and
+            Collector(using=self.db).can_fast_delete(self)
+        )
+        with transaction.atomic(using=self.db):
+            if(fast):
+                rows = self._delete_returning_tombstones()
+            else:
+                rows = self._delete_then_tombstones()
+            TaskCounter.objects.using(self.db).adjust(counter_deltas(
+                ((user_id, done) for user_id, slug, done in rows), sign=-1
+            ))
+        cache.invalidate(user_id for user_id, slug, done in rows)
+        events.publish(
+            'deleted', [(user_id, slug) for user_id, slug, done in rows],
+            using=self.db
+        )
+        return len(rows), {self.model._meta.label: len(rows)}
+
+    def _delete_returning_tombstones(self):
+        # Data-modifying CTEs delete the rows and insert their tombstones in
+        # a single statement.
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        select_sql, params = self.order_by().values('pk').query.get_compiler(
+            self.db
+        ).as_sql()
+        sql = (
+            'WITH deleted AS ('
+            'DELETE FROM {task} WHERE {pk} IN ({select}) '
+            'RETURNING {user}, {slug}, {done}), '
+            'tombstones AS ('
+            'INSERT INTO {tombstone} ({user}, {slug}, {deleted_on}) '
+            'SELECT {user}, {slug}, %s FROM deleted) '
+            'SELECT {user}, {slug}, {done} FROM deleted'
+        ).format(
+            task=quote(Task._meta.db_table),
+            tombstone=quote(TaskTombstone._meta.db_table),
+            pk=quote(Task._meta.pk.column),
+            user=quote('user_id'),
+            slug=quote('slug'),
+            done=quote('done'),
+            deleted_on=quote('deleted_on'),
+            select=select_sql,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + (timezone.now(),))
+            return cursor.fetchall()
+
+    def _delete_then_tombstones(self):
+        rows = list(
+            self.order_by().values_list('pk', 'user_id', 'slug', 'done')
+        )
+        if(not rows):
+            return []
+        now = timezone.now()
+        TaskTombstone.objects.bulk_create([
+            TaskTombstone(user_id=user_id, slug=slug, deleted_on=now)
+            for pk, user_id, slug, done in rows
+        ])
+        models.QuerySet.delete(
+            self.model._base_manager.using(self.db).filter(
+                pk__in=[pk for pk, user_id, slug, done in rows]
+            )
+        )
+        return [(user_id, slug, done) for pk, user_id, slug, done in rows]
+
+    def mark_done(self):
+        """Mark every matching task done with a single UPDATE."""
+        now = timezone.now()
+        return self.filter(done=False)._update_and_publish(
+            'done', done=True, finished_on=now, updated_on=now
+        )
+
+    def mark_undone(self):
+        """Mark every matching task not done with a single UPDATE."""
+        return self.filter(done=True)._update_and_publish(
+            'undone', done=False, finished_on=None, updated_on=timezone.now()
+        )
+
+    def due_for_reminder(self, window, now=None):
+        """Return the open tasks due in the next `window` whose reminder was
+        not sent yet, in deadline order.
+        """
+        now = now or timezone.now()
+        return self.filter(
+            done=False, reminded_on__isnull=True,
+            do_before__gt=now, do_before__lte=now + window
+        ).order_by('do_before', 'id')
+
+    def bulk_action(self, action):
+        """Run one of BULK_ACTIONS on the matching tasks and return the
+        number of tasks it changed.
+        """
+        if(action == 'do'):
+            return self.mark_done()
+        elif(action == 'undo'):
+            return self.mark_undone()
+        elif(action == 'delete'):
+            deleted, _ = self.delete()
+            return deleted
+        raise ValueError('Unknown bulk action: {}'.format(action))
+
 
 class Task(models.Model):
     title = models.CharField(max_length=255)
@@ -16,6 +301,8 @@ class Task(models.Model):
     do_before = models.DateTimeField()
     finished_on = models.DateTimeField(null=True)
     done = models.BooleanField(default=False)
+    # When the deadline reminder was sent, see the send_reminders command.
+    reminded_on = models.DateTimeField(null=True, editable=False)
 
     user = models.ForeignKey(
         User,
@@ -23,26 +310,143 @@ class Task(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['do_before']
+        indexes = [
+            # Partial indexes: `done=False` is compiled to `NOT done`, which
+            # SQLite can only match against an index condition.
+            models.Index(
+                fields=['user', 'do_before', 'id'],
+                condition=models.Q(done=False),
+                name='task_user_done_do_before_idx'
+            ),
+            models.Index(
+                fields=['user', 'finished_on', 'id'],
+                condition=models.Q(done=True),
+                name='task_user_done_finished_idx'
+            ),
+            # For the API task list, which pages through all the tasks.
+            models.Index(
+                fields=['user', 'do_before', 'id'],
+                name='task_user_do_before_idx'
+            ),
+            models.Index(
+                fields=['user', 'updated_on'],
+                name='task_user_updated_on_idx'
+            ),
+            # For the case-insensitive slug lookups of the task pages.
+            models.Index(
+                'user', Upper('slug'), name='task_user_slug_upper_idx'
+            ),
+            # For the admin's date hierarchy.
+            models.Index(fields=['created_on'], name='task_created_on_idx'),
+            # Only holds the open tasks still waiting for their reminder.
+            models.Index(
+                fields=['do_before', 'id'],
+                condition=models.Q(done=False, reminded_on__isnull=True),
+                name='task_reminder_due_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super(Task, cls).from_db(db, field_names, values)
+        # Remember the stored state, so save() can tell doing and undoing a
+        # task from other updates, and notice a moved deadline.
+        stored = dict(zip(field_names, values))
+        task._stored_done = stored.get('done')
+        task._stored_do_before = stored.get('do_before')
+        return task
+
     def save(self, *args, **kwargs):
-        if(not self.id):
-            try:
-                last_task = Task.objects.latest('pk')
-                next_id = last_task.id + 1
-            except Task.DoesNotExist:
-                next_id = 1
+        creating = not self.id
+        self.fill_derived_fields(creating=creating)
+        using = kwargs.get('using') or self._state.db
+        with transaction.atomic(using=using, savepoint=False):
+            super(Task, self).save(*args, **kwargs)
+            # Deleted meanwhile, the save inserted it again.
+            creating = creating or getattr(self, '_stored_done', None) is None
+            TaskCounter.objects.using(self._state.db).adjust(
+                self.save_counter_deltas(creating)
+            )
+        cache.invalidate([self.user_id])
+        events.publish(
+            self.save_event_type(creating), [(self.user_id, self.slug)],
+            using=self._state.db
+        )
+        self._stored_done = self.done
+        self._stored_do_before = self.do_before
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        """Update the row only while its done flag is the one this instance
+        was loaded with, like mark_done() and mark_undone(), so save() knows
+        how the counters move without reading the row first.
+        """
+        stored_done = getattr(self, '_stored_done', None)
+        if(stored_done is not None):
+            if(super(Task, self)._do_update(
+                base_qs.filter(done=stored_done), using, pk_val,
+                values, update_fields, forced_update
+            )):
+                return True
+        # Changed by a concurrent request, or deleted: compare against the
+        # stored row, locked until the commit.
+        self._stored_done = base_qs.select_for_update().filter(
+            pk=pk_val
+        ).values_list('done', flat=True).first()
+        return super(Task, self)._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+    def save_counter_deltas(self, creating):
+        if(creating):
+            return counter_deltas([(self.user_id, self.done)])
+        stored_done = getattr(self, '_stored_done', None)
+        if(stored_done is not None and stored_done != self.done):
+            return transition_deltas([self.user_id], done=self.done)
+        return {}
+
+    def save_event_type(self, creating):
+        if(creating):
+            return 'created'
+        stored_done = getattr(self, '_stored_done', None)
+        if(stored_done is not None and stored_done != self.done):
+            return 'done' if self.done else 'undone'
+        return 'updated'
+
+    def delete(self, using=None, keep_parents=False):
+        """Delete the task through TaskQuerySet.delete(), so the counters
+        and the tombstone follow the row the DELETE removed, if any.
+        """
+        deleted = Task.objects.using(using or self._state.db).filter(
+            pk=self.pk
+        ).delete()
+        self.id = None
+        return deleted
 
-            self.slug = '{}-{}'.format(
-                next_id,
-                slugify(self.title, allow_unicode=True)
+    def fill_derived_fields(self, creating=False):
+        """Set the fields computed from the others, shared by save() and
+        bulk_create() so both insert paths produce the same rows.
+        """
+        if(creating):
+            self.slug = generate_slug(
+                self.title,
+                max_length=self._meta.get_field('slug').max_length
             )
 
-        super(Task, self).save(*args, **kwargs)
+        if(self.done and self.finished_on is None):
+            self.finished_on = timezone.now()
+
+        stored_do_before = getattr(self, '_stored_do_before', None)
+        if(stored_do_before is not None and stored_do_before != self.do_before):
+            # A new deadline gets a new reminder.
+            self.reminded_on = None
 
     def get_absolute_url(self):
         return reverse('main:task_detail', args=[self.slug])
@@ -58,3 +462,152 @@ class Task(models.Model):
 
     def get_undo_url(self):
         return reverse('main:task_undo', args=[self.slug])
+
+
+
+class TaskTombstone(models.Model):
+    """Left behind when a task is deleted, so that clients polling for
+    changes can learn about the deletion.
+    """
+    slug = models.SlugField(max_length=255, allow_unicode=True, db_index=False)
+    deleted_on = models.DateTimeField(default=timezone.now)
+
+    user = models.ForeignKey(
+        User,
+        related_name='task_tombstones',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'deleted_on'],
+                name='tombstone_user_deleted_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.slug
+
+
+class TaskCounterQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        """Add `{user_id: (open, done)}` deltas to the users' counters,
+        creating the missing ones.
+
+        A single upsert changes all of them, in user order so that concurrent
+        transactions lock the rows in the same order.
+        """
+        deltas = sorted(
+            (user_id, open_delta, done_delta)
+            for user_id, (open_delta, done_delta) in deltas.items()
+            if open_delta or done_delta
+        )
+        if(not deltas):
+            return
+        connection = connections[self.db]
+        if(not connection.features.supports_update_conflicts_with_target):
+            for user_id, open_delta, done_delta in deltas:
+                self.get_or_create(user_id=user_id)
+                self.filter(user_id=user_id).update(
+                    open_count=models.F('open_count') + open_delta,
+                    done_count=models.F('done_count') + done_delta
+                )
+            return
+
+        quote = connection.ops.quote_name
+        sql = (
+            'INSERT INTO {table} ({user}, {open}, {done}) VALUES {values} '
+            'ON CONFLICT ({user}) DO UPDATE SET '
+            '{open} = {table}.{open} + EXCLUDED.{open}, '
+            '{done} = {table}.{done} + EXCLUDED.{done}'
+        ).format(
+            table=quote(TaskCounter._meta.db_table),
+            user=quote('user_id'),
+            open=quote('open_count'),
+            done=quote('done_count'),
+            values=', '.join(['(%s, %s, %s)'] * len(deltas)),
+        )
+        with transaction.mark_for_rollback_on_error(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    sql, [value for row in deltas for value in row]
+                )
+
+    def _counts_queryset(self, user):
+        # The overdue count changes with time alone, so it can't be kept in a
+        # counter. It is counted from the open task index instead, in the
+        # same query.
+        overdue = Task.objects.filter(
+            user=OuterRef('user'), done=False, do_before__lt=timezone.now()
+        ).order_by().values('user')
+        return self.filter(user=user).annotate(
+            overdue_count=Subquery(
+                overdue.annotate(count=Count('pk')).values('count'),
+                output_field=models.IntegerField()
+            )
+        ).values('open_count', 'done_count', 'overdue_count')
+
+    def _counts(self, row):
+        row = row or {}
+        return {
+            name: row.get(name + '_count') or 0
+            for name in ('open', 'done', 'overdue')
+        }
+
+    def counts(self, user):
+        """Return the user's open, done and overdue task counts."""
+        return self._counts(self._counts_queryset(user).first())
+
+    async def acounts(self, user):
+        return self._counts(await self._counts_queryset(user).afirst())
+
+
+class TaskCounter(models.Model):
+    """The number of open and done tasks of a user.
+
+    Every write to tasks adjusts the counters in its own transaction, so
+    pages can show the counts without counting the rows. The
+    rebuild_task_counters command checks them against the tasks.
+    """
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='task_counter',
+        on_delete=models.CASCADE
+    )
+    open_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+
+    objects = TaskCounterQuerySet.as_manager()
+
+    def __str__(self):
+        return '{} open, {} done'.format(self.open_count, self.done_count)
+
+
+class TaskImport(models.Model):
+    """The progress of an import_tasks run, named after its input file.
+
+    It is saved in the transaction of every batch, so the rows counted as
+    committed are exactly the rows inserted, and --resume never inserts a
+    row twice.
+    """
+    name = models.CharField(max_length=255)
+    committed = models.PositiveIntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    user = models.ForeignKey(
+        User,
+        related_name='task_imports',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'], name='task_import_user_name_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return '{}: {} rows'.format(self.name, self.committed)
@@ -0,0 +1,201 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginate a queryset on a unique, ordered key instead of an OFFSET.
+
+    `ordering` is a sequence of field names (optionally prefixed with '-'),
+    the last of which must be unique (usually 'id'). They may name
+    annotations, e.g. a search rank. The queryset may be a values() queryset
+    as long as it selects those fields. Each page is fetched
+    with a `WHERE key > cursor ORDER BY key LIMIT n` query, so the cost of a
+    page does not depend on how deep into the list it is.
+    """
+
+    def __init__(self, queryset, ordering, per_page=None):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page or getattr(settings, 'TASKS_PER_PAGE', 50)
+        self.fields = []
+        self.attnames = []
+        for name in self.ordering:
+            name = name.lstrip('-')
+            if name in queryset.query.annotations:
+                self.fields.append(queryset.query.annotations[name].output_field)
+                self.attnames.append(name)
+            else:
+                field = queryset.model._meta.get_field(name)
+                self.fields.append(field)
+                self.attnames.append(field.attname)
+
+    def page(self, cursor=None):
+        queryset, backwards, values = self._page_queryset(cursor)
+        return self._make_page(list(queryset), backwards, values)
+
+    async def apage(self, cursor=None):
+        """Async version of page(), fetching the rows with the async ORM."""
+        queryset, backwards, values = self._page_queryset(cursor)
+        rows = [row async for row in queryset]
+        return self._make_page(rows, backwards, values)
+
+    def _page_queryset(self, cursor):
+        direction, values = 'next', None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+
+        backwards = direction == 'previous'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        ordering = self._reverse(self.ordering) if backwards else self.ordering
+        return (
+            queryset.order_by(*ordering)[:self.per_page + 1], backwards, values
+        )
+
+    def _make_page(self, rows, backwards, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor('next', rows[-1])
+            if (has_more and backwards) or (values is not None and not backwards):
+                previous_cursor = self.encode_cursor('previous', rows[0])
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else str(value)
+            for value in self._key_values(obj)
+        ]
+        payload = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            payload = base64.urlsafe_b64decode(cursor + padding)
+            direction, values = json.loads(payload.decode())
+            if direction not in ('next', 'previous'):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+        if any(value is None for value in values):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _key_values(self, obj):
+        # Rows of a values() queryset are dicts keyed by the field names.
+        if isinstance(obj, dict):
+            return [obj[attname] for attname in self.attnames]
+        return [getattr(obj, attname) for attname in self.attnames]
+
+    def _seek(self, values, backwards):
+        """Build `(a, b, ...) > (va, vb, ...)` honouring each field's
+        direction, expanded as `a > va OR (a = va AND b > vb) ...`.
+        """
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            if backwards:
+                descending = not descending
+            lookup = 'lt' if descending else 'gt'
+            term = Q(**{
+                '{}__{}'.format(name.lstrip('-'), lookup): values[i]
+            })
+            for previous_name, value in zip(self.ordering[:i], values):
+                term &= Q(**{previous_name.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    @staticmethod
+    def _reverse(ordering):
+        return [
+            name[1:] if name.startswith('-') else '-' + name
+            for name in ordering
+        ]
+
+
+def estimate_count(queryset):
+    """Return the number of rows the planner expects `queryset` to return,
+    or None on databases without estimates.
+
+    The estimate comes from the table statistics kept by ANALYZE and
+    autovacuum, so it is only as fresh as they are.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """A Paginator that estimates the number of objects of large querysets
+    instead of counting them, which reads every matching row.
+
+    Querysets estimated to hold fewer than `exact_count_limit` objects are
+    counted exactly. Without estimates, e.g. on SQLite, it always counts.
+    """
+
+    def __init__(self, *args, exact_count_limit=None, **kwargs):
+        super(EstimatedCountPaginator, self).__init__(*args, **kwargs)
+        if exact_count_limit is None:
+            exact_count_limit = getattr(
+                settings, 'TASKS_ADMIN_EXACT_COUNT_LIMIT', 10000
+            )
+        self.exact_count_limit = exact_count_limit
+
+    @cached_property
+    def count(self):
+        estimate = None
+        if hasattr(self.object_list, 'query'):
+            estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_limit:
+            return super(EstimatedCountPaginator, self).count
+        return estimate
@@ -0,0 +1,201 @@
+"""Opt-in profiling of production requests.
+
+ProfilingMiddleware is only used when TASKS_PROFILE_DIR is set. It samples
+the stack of the thread serving every request each
+TASKS_PROFILE_INTERVAL_MS, which costs far less than tracing every call
+with cProfile. Two kinds of request keep their profile:
+
+- a random TASKS_PROFILE_SAMPLE_RATE share of all requests, and
+- every request slower than TASKS_PROFILE_SLOW_MS.
+
+Each profile is a JSON file in TASKS_PROFILE_DIR, holding:
+
+- the URL name, the user and the duration;
+- the SQL summary from QueryCountMiddleware, with the slowest statements;
+- the sampled stacks.
+
+Only the newest TASKS_PROFILE_MAX_FILES are kept. The aggregate_profiles
+command reports the hottest functions across them.
+
+Async requests share the event loop thread, so their stacks can't be told
+apart; they are passed through unprofiled.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+# Statements saved with a profile, the slowest first.
+TOP_STATEMENTS = 10
+
+
+def frame_name(code):
+    return '{}:{}({})'.format(
+        code.co_filename, code.co_firstlineno, code.co_name
+    )
+
+
+class StackSampler:
+    """Samples the stacks of the threads it watches from a daemon thread.
+
+    The samples of a thread are counted by stack, a tuple of frame names
+    from the outermost call to the running function.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._thread = None
+
+    def watch(self, ident):
+        with self._lock:
+            self._samples[ident] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='task-profiler', daemon=True
+                )
+                self._thread.start()
+
+    def unwatch(self, ident):
+        with self._lock:
+            return self._samples.pop(ident)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._samples:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._samples.items():
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame_name(frame.f_code))
+                        frame = frame.f_back
+                    if stack:
+                        samples[tuple(reversed(stack))] += 1
+
+
+def write_profile(directory, profile, max_files):
+    """Save `profile` in `directory` and delete the oldest profiles over
+    `max_files`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = '{}-{}-{}.json'.format(
+        timezone.now().strftime('%Y%m%dT%H%M%S%f'),
+        (profile['view_name'] or 'unresolved').replace(':', '-'),
+        uuid.uuid4().hex[:8]
+    )
+    # Written then renamed, so readers never see a partial profile.
+    temporary = os.path.join(directory, '.' + name)
+    with open(temporary, 'w') as f:
+        json.dump(profile, f)
+    os.replace(temporary, os.path.join(directory, name))
+
+    profiles = read_profile_names(directory)
+    for old in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            # Rotated by another process.
+            pass
+
+
+def read_profile_names(directory):
+    """Return the file names of the profiles in `directory`, oldest first."""
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.endswith('.json') and not name.startswith('.')
+    )
+
+
+class ProfilingMiddleware:
+    """Profile sampled and slow requests, see the module docstring."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.directory = getattr(settings, 'TASKS_PROFILE_DIR', None)
+        if not self.directory:
+            raise MiddlewareNotUsed
+        self.sample_rate = getattr(settings, 'TASKS_PROFILE_SAMPLE_RATE', 0.01)
+        self.slow = getattr(settings, 'TASKS_PROFILE_SLOW_MS', 500) / 1000
+        self.max_files = getattr(settings, 'TASKS_PROFILE_MAX_FILES', 500)
+        self.sampler = StackSampler(
+            getattr(settings, 'TASKS_PROFILE_INTERVAL_MS', 5) / 1000
+        )
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.get_response(request)
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            stats.statements = {}
+        ident = threading.get_ident()
+        started = time.perf_counter()
+        self.sampler.watch(ident)
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = self.sampler.unwatch(ident)
+        duration = time.perf_counter() - started
+        if duration >= self.slow or random.random() < self.sample_rate:
+            write_profile(
+                self.directory,
+                self.build_profile(request, response, duration, samples),
+                self.max_files
+            )
+        return response
+
+    def build_profile(self, request, response, duration, samples):
+        user = getattr(request, 'user', None)
+        match = request.resolver_match
+        stats = getattr(request, 'query_stats', None)
+        sql = None
+        if stats is not None:
+            statements = sorted(
+                (stats.statements or {}).items(),
+                key=lambda item: item[1][1], reverse=True
+            )
+            sql = {
+                'count': stats.count,
+                'duration_ms': round(stats.duration * 1000, 2),
+                'statements': [
+                    {'sql': statement, 'count': count,
+                     'duration_ms': round(statement_duration * 1000, 2)}
+                    for statement, (count, statement_duration)
+                    in statements[:TOP_STATEMENTS]
+                ],
+            }
+        return {
+            'date': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view_name': match.view_name if match else None,
+            'user': user.get_username() if user and user.is_authenticated
+            else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'slow': duration >= self.slow,
+            'interval_ms': self.sampler.interval * 1000,
+            'sql': sql,
+            'samples': [
+                {'stack': list(stack), 'count': count}
+                for stack, count in samples.most_common()
+            ],
+        }
@@ -0,0 +1,145 @@
+"""Ranked full-text search over the title and description of tasks.
+
+Migration 0016 builds the index the search runs on:
+
+- PostgreSQL: the generated `search_vector` column, weighting the title
+  above the description, with a GIN index. The query is parsed with
+  websearch_to_tsquery(), so any user input is valid, and ranked with
+  ts_rank().
+- SQLite: the `main_task_fts` FTS5 table, for development and tests. Every
+  word of the query must match, the rank is bm25() with the title weighted
+  like on PostgreSQL.
+
+Other databases fall back to an unranked icontains filter.
+
+The column and table are not model fields, so loading tasks never reads
+them.
+
+SQLite drops the triggers that keep `main_task_fts` in sync whenever a
+migration remakes `main_task`, e.g. to alter a column. After every migrate,
+restore_sqlite_triggers() creates the missing ones again.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVectorField
+)
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+
+# bm25() weights of the title and description columns.
+SQLITE_WEIGHTS = (10.0, 1.0)
+
+WORD_RE = re.compile(r'\w+')
+
+# The triggers of migration 0016.
+SQLITE_TRIGGERS = {
+    'main_task_fts_insert': (
+        "CREATE TRIGGER main_task_fts_insert AFTER INSERT ON main_task BEGIN "
+        "INSERT INTO main_task_fts (rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END"
+    ),
+    'main_task_fts_delete': (
+        "CREATE TRIGGER main_task_fts_delete AFTER DELETE ON main_task BEGIN "
+        "INSERT INTO main_task_fts (main_task_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END"
+    ),
+    'main_task_fts_update': (
+        "CREATE TRIGGER main_task_fts_update "
+        "AFTER UPDATE OF title, description ON main_task BEGIN "
+        "INSERT INTO main_task_fts (main_task_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO main_task_fts (rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END"
+    ),
+}
+
+
+def search_tasks(queryset, query):
+    """Return the tasks of `queryset` matching `query`, annotated with their
+    `rank`, higher for better matches. Order them by `('-rank', 'id')`.
+    """
+    vendor = connections[queryset.db].vendor
+    if(vendor == 'postgresql'):
+        return _search_postgresql(queryset, query)
+    words = WORD_RE.findall(query)
+    if(not words):
+        return queryset.none().annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+    if(vendor == 'sqlite'):
+        return _search_sqlite(queryset, words)
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition).annotate(
+        rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def _search_postgresql(queryset, query):
+    table = connections[queryset.db].ops.quote_name(
+        queryset.model._meta.db_table
+    )
+    vector = RawSQL(
+        '{}.search_vector'.format(table), [], output_field=SearchVectorField()
+    )
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type='websearch'
+    )
+    return queryset.alias(search_vector=vector).filter(
+        search_vector=search_query
+    ).annotate(
+        # ts_rank() returns a real, cast to compare pagination cursors with
+        # the exact value.
+        rank=Cast(SearchRank(vector, search_query), FloatField())
+    )
+
+
+def _search_sqlite(queryset, words):
+    # Quoting every word keeps FTS5 query syntax out of user input.
+    match = ' '.join('"{}"'.format(word) for word in words)
+    table = queryset.model._meta.db_table
+    matches = RawSQL(
+        'SELECT rowid FROM main_task_fts WHERE main_task_fts MATCH %s',
+        [match]
+    )
+    # bm25() is lower for better matches.
+    rank = RawSQL(
+        '(SELECT -bm25(main_task_fts, %s, %s) FROM main_task_fts '
+        'WHERE main_task_fts MATCH %s AND rowid = "{}"."id")'.format(table),
+        [*SQLITE_WEIGHTS, match], output_field=FloatField()
+    )
+    return queryset.filter(pk__in=matches).annotate(rank=rank)
+
+
+def restore_sqlite_triggers(using='default', **kwargs):
+    """Create the missing `main_task_fts` triggers and rebuild the index,
+    which missed the writes made without them. Connected to post_migrate.
+    """
+    connection = connections[using]
+    if(connection.vendor != 'sqlite'):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'main_task_fts' "
+            "OR (type = 'trigger' AND tbl_name = 'main_task')"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if('main_task_fts' not in existing):
+            # Before migration 0016, or after unapplying it.
+            return
+        missing = [
+            sql for name, sql in SQLITE_TRIGGERS.items()
+            if name not in existing
+        ]
+        for sql in missing:
+            cursor.execute(sql)
+        if(missing):
+            cursor.execute(
+                "INSERT INTO main_task_fts (main_task_fts) VALUES ('rebuild')"
+            )
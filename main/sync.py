@@ -0,0 +1,155 @@
+"""Incremental sync of a user's tasks.
+
+A sync cursor is a signed timestamp issued by the server. Syncing with a
+cursor only returns the tasks whose updated_on is later than it and the slugs
+of the tasks deleted since, read from TaskTombstone, so a client learns about
+one change by downloading one row.
+
+The changed tasks are sent TASKS_SYNC_PAGE_SIZE at a time, in updated_on
+order with the keyset pagination of the task lists, and so are the deleted
+slugs, in deleted_on order. Until the last page the cursor also holds the
+position of the next page of both, and the response says there is more to
+fetch. A position stays after the last row sent once its list is
+exhausted, so the rows added while the other list is still being paged are
+sent too.
+
+Only the writes that set updated_on are synced. save() and TaskQuerySet's
+update() always do. Updates through the plain QuerySet, e.g.
+Task._base_manager.update(), are invisible to sync unless they set it too.
+
+A row's updated_on is set before its transaction commits, so a change can
+become visible after a sync which started later than its timestamp. Issued
+cursors are therefore moved back by TASKS_SYNC_MARGIN seconds, from the
+start of the sync's first page. A change may be sent twice, and it is never
+skipped as long as its transaction took less than TASKS_SYNC_MARGIN seconds
+to commit.
+
+Tombstones are kept for TASKS_SYNC_RETENTION_DAYS and then removed by the
+prune_tombstones command, so older cursors are refused: their clients have
+to sync again from scratch.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Task, TaskTombstone
+from .pagination import InvalidCursor, KeysetPaginator
+
+CURSOR_SALT = 'main.sync'
+
+
+class InvalidSyncCursor(Exception):
+    pass
+
+
+def retention_cutoff():
+    """Return the time before which the tombstones may be pruned."""
+    days = getattr(settings, 'TASKS_SYNC_RETENTION_DAYS', 30)
+    return timezone.now() - timedelta(days=days)
+
+
+def encode_cursor(since, until=None, page=None, deleted_page=None):
+    """`until`, `page` and `deleted_page` are only set between the pages of
+    a sync: the time to issue the next cursor from and the keyset cursors of
+    the next page of tasks and of deleted slugs.
+    """
+    payload = [
+        since and since.isoformat(), until and until.isoformat(), page,
+        deleted_page
+    ]
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """Return the `(since, until, page, deleted_page)` of a cursor."""
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+        if isinstance(payload, str):
+            # Issued before the syncs were paginated.
+            payload = [payload]
+        # Cursors issued before the deleted slugs were paginated hold three
+        # values.
+        payload = payload + [None] * (4 - len(payload))
+        since, until, page, deleted_page = payload
+        since = since and parse_datetime(since)
+        until = until and parse_datetime(until)
+    except (signing.BadSignature, TypeError, ValueError) as e:
+        raise InvalidSyncCursor(cursor) from e
+    if since is None and (page is None or deleted_page is not None):
+        raise InvalidSyncCursor(cursor)
+    if since is not None and since < retention_cutoff():
+        # Deletions since then may have been pruned.
+        raise InvalidSyncCursor(cursor)
+    return since, until, page, deleted_page
+
+
+def sync_start():
+    margin = getattr(settings, 'TASKS_SYNC_MARGIN', 5)
+    return timezone.now() - timedelta(seconds=margin)
+
+
+def current_cursor():
+    """Return a cursor for the changes made from now on."""
+    return encode_cursor(sync_start())
+
+
+def changes_since(user, cursor=None, fields=('slug',)):
+    """Return `(tasks, deleted, cursor, more)`: the values() rows of the
+    next page of tasks changed since `cursor`, the next page of the slugs of
+    the tasks deleted since then, the cursor to send next time and whether
+    it fetches more changes right away. Without a cursor every task is
+    returned.
+    """
+    since = until = page = deleted_page = None
+    if cursor is not None:
+        since, until, page, deleted_page = decode_cursor(cursor)
+    if until is None:
+        until = sync_start()
+    per_page = getattr(settings, 'TASKS_SYNC_PAGE_SIZE', 500)
+
+    tasks = Task.objects.filter(user=user)
+    if since is not None:
+        tasks = tasks.filter(updated_on__gt=since)
+    tasks, page, more = next_page(
+        KeysetPaginator(
+            tasks.values('id', 'updated_on', *fields), ['updated_on', 'id'],
+            per_page=per_page
+        ),
+        page, cursor
+    )
+    deleted = []
+    if since is not None:
+        tombstones = TaskTombstone.objects.filter(
+            user=user, deleted_on__gt=since
+        ).values('id', 'deleted_on', 'slug')
+        tombstones, deleted_page, more_deleted = next_page(
+            KeysetPaginator(
+                tombstones, ['deleted_on', 'id'], per_page=per_page
+            ),
+            deleted_page, cursor
+        )
+        deleted = [tombstone['slug'] for tombstone in tombstones]
+        more = more or more_deleted
+    if more:
+        return (
+            tasks, deleted, encode_cursor(since, until, page, deleted_page),
+            True
+        )
+    return tasks, deleted, encode_cursor(until), False
+
+
+def next_page(paginator, position, cursor):
+    """Return the rows of the page at `position`, the position after them
+    and whether the list goes on.
+    """
+    try:
+        page = paginator.page(position)
+    except InvalidCursor as e:
+        raise InvalidSyncCursor(cursor) from e
+    rows = page.object_list
+    if rows:
+        position = paginator.encode_cursor('next', rows[-1])
+    return rows, position, page.has_next()
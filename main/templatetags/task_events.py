@@ -0,0 +1,19 @@
+"""Links the task lists to the stream of task events."""
+from django import template
+from django.core.handlers.asgi import ASGIRequest
+from django.urls import reverse
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def task_events_attribute(context):
+    """Return the attribute that makes the page open the event stream.
+
+    The stream is only served under ASGI, so under WSGI the page doesn't
+    open it and doesn't update live.
+    """
+    if not isinstance(context.get('request'), ASGIRequest):
+        return ''
+    return format_html(' data-events-url="{}"', reverse('main:task_events'))
@@ -0,0 +1,122 @@
+"""Fast rendering of the rows of the task lists.
+
+Rendering a row with template tags costs a reverse() per link and a
+template variable lookup per field, which adds up on long lists. The
+`task_rows` tag reverses every link once per list, with a placeholder
+slug, and fills a precompiled fragment with plain string formatting. The
+output is the same as rendering the row markup as a template.
+"""
+from urllib.parse import quote
+
+from django import template
+from django.urls import reverse
+from django.utils import formats, timezone
+from django.utils.html import conditional_escape, escape
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+from django.utils.timesince import timesince, timeuntil
+
+register = template.Library()
+
+SLUG_PLACEHOLDER = 'task-slug'
+
+ROW = '''
+		<div class="row" id="task_{id}">
+			<div class="col-md-5 col-sm-12 h4">
+				<input type="checkbox" name="slugs" value="{slug}">
+				<a href="{detail_url}">{title}</a>
+			</div>
+			<div class="col-md-4  col-sm-12">{date}</div>
+			{toggle}
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-info" href="{update_url}">Update</a>
+			</div>
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-danger" href="{delete_url}">Delete</a>
+			</div>
+		</div>
+	'''
+UNDO = '''
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-success" href="{url}">Undone</a>
+			</div>
+			'''
+DO = '''
+			<div class="col-md-1  col-sm-4">
+				<a class="btn btn-block btn-success" href="{url}">Done</a>
+			</div>
+			'''
+
+# The date column of each list: the field shown, the function telling
+# the time to or from it, and the text around that time.
+COLUMNS = {
+    'deadline': ('do_before', timeuntil, ' (<b>{}</b> left)'),
+    'finished': ('finished_on', timesince, ' (<b>{}</b> ago)'),
+}
+
+
+class TaskURLs:
+    """The links of a row, reversed once for all rows."""
+    names = ['detail', 'update', 'delete', 'do', 'undo']
+
+    def __init__(self):
+        self.templates = {}
+        for name in self.names:
+            url = reverse(f'main:task_{name}', args=[SLUG_PLACEHOLDER])
+            prefix, placeholder, suffix = url.rpartition(SLUG_PLACEHOLDER)
+            self.templates[name] = (escape(prefix), escape(suffix))
+
+    def get(self, name, quoted_slug):
+        prefix, suffix = self.templates[name]
+        return prefix + quoted_slug + suffix
+
+
+def format_date(value, relative, date_suffix, now):
+    if not value:
+        return escape(value) + date_suffix.format('')
+    try:
+        since = relative(value, now)
+    except (ValueError, TypeError):
+        since = ''
+    return escape(
+        formats.localize(timezone.template_localtime(value))
+    ) + date_suffix.format(since)
+
+
+def render_rows(tasks, column):
+    """Return the HTML of the rows of `tasks`, with the `column` date."""
+    field, relative, date_suffix = COLUMNS[column]
+    urls = TaskURLs()
+    now = timezone.now()
+    # With one `now` for the list, tasks sharing a date share its text.
+    dates = {}
+    rows = []
+    for task in tasks:
+        # The same quoting as reverse().
+        quoted_slug = escape(
+            quote(task.slug, safe=RFC3986_SUBDELIMS + '/~:@')
+        )
+        value = getattr(task, field)
+        date = dates.get(value)
+        if date is None:
+            date = dates[value] = format_date(
+                value, relative, date_suffix, now
+            )
+        rows.append(ROW.format(
+            id=task.id,
+            slug=escape(task.slug),
+            title=conditional_escape(task.title),
+            detail_url=urls.get('detail', quoted_slug),
+            date=date,
+            toggle=(UNDO if task.done else DO).format(
+                url=urls.get('undo' if task.done else 'do', quoted_slug)
+            ),
+            update_url=urls.get('update', quoted_slug),
+            delete_url=urls.get('delete', quoted_slug),
+        ))
+    return ''.join(rows)
+
+
+@register.simple_tag
+def task_rows(tasks, column='deadline'):
+    return mark_safe(render_rows(tasks, column))
@@ -0,0 +1,91 @@
+"""Query budgets of the main and API views.
+
+Test cases using QueryBudgetClient as their `client_class` fail as soon as a
+view runs more queries than its budget, so an N+1 or an extra lookup added to
+a view breaks the build. The queries are counted by QueryCountMiddleware and
+include the session and user lookups, which the client always takes from the
+cache, as in production with a shared cache, whatever the settings module.
+Every main and API view needs a budget; raise one only together with the
+change that needs it.
+"""
+from django.test import Client, override_settings
+
+BUDGET_SETTINGS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'TASKS_USER_CACHE_TIMEOUT': 300,
+}
+
+# The queries of a cache miss, the session and the user being cached. The
+# list pages add the counts and the conditional GET validator, writes the
+# counter upsert and the tombstones. SQLite needs more queries for updates
+# and deletes, having no UPDATE/DELETE ... RETURNING.
+QUERY_BUDGETS = {
+    'main:task_list': 4,
+    'main:done_task_list': 4,
+    'main:task_search': 2,
+    'main:task_detail': 3,
+    'main:task_create': 3,
+    'main:task_update': 4,
+    'main:task_delete': 8,
+    'main:task_do': 3,
+    'main:task_undo': 3,
+    'main:task_bulk_action': 7,
+    'main:task_export': 1,
+    'main:task_events': 0,
+    'api:task_list': 3,
+    'api:task_bulk_create': 4,
+    'api:task_bulk_action': 6,
+    'api:task_sync': 2,
+    'api:task_counts': 2,
+    'api:task_search': 2,
+}
+
+BUDGETED_NAMESPACES = ('main', 'api')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def check_query_budget(response):
+    request = getattr(response, 'wsgi_request', None)
+    stats = getattr(request, 'query_stats', None)
+    match = getattr(response, 'resolver_match', None)
+    if stats is None or match is None:
+        return
+    if match.namespace not in BUDGETED_NAMESPACES:
+        return
+    budget = QUERY_BUDGETS.get(match.view_name)
+    if budget is None:
+        raise QueryBudgetExceeded(
+            f'{match.view_name} has no query budget, add it to '
+            f'main/tests/query_budgets.py ({stats.count} queries)'
+        )
+    if stats.count > budget:
+        raise QueryBudgetExceeded(
+            f'{request.method} {request.path} ({match.view_name}) ran '
+            f'{stats.count} queries, over its budget of {budget}'
+        )
+
+
+class QueryBudgetClient(Client):
+    """A test client checking every response against QUERY_BUDGETS."""
+
+    def request(self, **request):
+        with override_settings(**BUDGET_SETTINGS):
+            response = super(QueryBudgetClient, self).request(**request)
+        check_query_budget(response)
+        return response
+
+    def _login(self, user, backend=None):
+        with override_settings(**BUDGET_SETTINGS):
+            super(QueryBudgetClient, self)._login(user, backend)
+
+    def logout(self):
+        with override_settings(**BUDGET_SETTINGS):
+            super(QueryBudgetClient, self).logout()
+
+    @property
+    def session(self):
+        with override_settings(**BUDGET_SETTINGS):
+            return super(QueryBudgetClient, self).session
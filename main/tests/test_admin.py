@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..pagination import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class TaskAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@domain.com', password='APQMwn0$'
+        )
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMw2Zn0$'
+        )
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}', description='Water the plants' * (i == 3),
+                do_before=timezone.now() + timedelta(days=i), user=cls.user1
+            )
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        return self.client.get(
+            reverse('admin:main_task_changelist'), params
+        ).context['cl']
+
+    def test_changelist_counts_exactly_by_default(self):
+        cl = self.changelist()
+        self.assertTrue(cl.model_admin.show_full_result_count)
+        self.assertEqual(cl.result_count, 5)
+        self.assertEqual(cl.full_result_count, 5)
+        self.assertEqual(len(cl.filter_specs), 3)
+
+    def test_changelist_loads_the_users_in_the_same_query(self):
+        tasks = self.changelist().result_list
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                {task.user.username for task in tasks}, {'user1'}
+            )
+
+    @override_settings(TASKS_ADMIN_PERFORMANCE_MODE=True)
+    def test_performance_mode(self):
+        cl = self.changelist()
+        self.assertIsInstance(cl.paginator, EstimatedCountPaginator)
+        self.assertIsNone(cl.full_result_count)
+        self.assertEqual(
+            [spec.field_path for spec in cl.filter_specs], ['done']
+        )
+        self.assertEqual(
+            [task.title for task in cl.result_list],
+            [f'Task {i}' for i in reversed(range(5))]
+        )
+
+    @override_settings(TASKS_ADMIN_PERFORMANCE_MODE=True)
+    def test_performance_mode_searches_the_full_text_index(self):
+        cl = self.changelist(q='plant')
+        self.assertEqual([task.title for task in cl.result_list], ['Task 3'])
+
+    @override_settings(
+        TASKS_ADMIN_PERFORMANCE_MODE=True, TASKS_ADMIN_EXACT_COUNT_LIMIT=0
+    )
+    def test_performance_mode_does_not_count_the_tasks(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Only PostgreSQL has row estimates')
+        with CaptureQueriesContext(connection) as queries:
+            self.changelist()
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql'] and 'main_task' in query['sql']
+        ])
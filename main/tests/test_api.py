@@ -0,0 +1,487 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ..api.views import task_bulk_action, task_bulk_create, task_list
+from ..models import Task, TaskTombstone
+from ..sync import CURSOR_SALT, decode_cursor, encode_cursor
+from .query_budgets import BUDGET_SETTINGS, QueryBudgetClient
+
+User = get_user_model()
+
+
+class TaskListApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def test_post_creates_a_task_for_the_user(self):
+        request = self.factory.post('/api/', {
+            'title': 'Do the task',
+            'do_before': '2029-02-23T22:45:01Z'
+        }, format='json')
+        force_authenticate(request, user=self.user1)
+        response = task_list(request)
+
+        self.assertEqual(response.status_code, 201)
+        task = Task.objects.get()
+        self.assertEqual(task.user, self.user1)
+        self.assertEqual(response.data['slug'], task.slug)
+
+    def test_post_returns_validation_errors(self):
+        request = self.factory.post('/api/', {'title': ''}, format='json')
+        force_authenticate(request, user=self.user1)
+        response = task_list(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.data)
+        self.assertIn('do_before', response.data)
+
+
+class TaskBulkCreateApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def bulk_create(self, data, user=None):
+        request = self.factory.post('/api/bulk/', data, format='json')
+        force_authenticate(request, user=user or self.user1)
+        return task_bulk_create(request)
+
+    def test_bulk_create_inserts_all_tasks_in_one_query(self):
+        data = [
+            {'title': f'Task {i}', 'do_before': '2029-02-23T22:45:01Z'}
+            for i in range(100)
+        ]
+        # SQLite allows 999 parameters per statement, 10 per row, so Django
+        # splits the INSERT in two there.
+        inserts = 2 if connection.vendor == 'sqlite' else 1
+        # SAVEPOINT, INSERT, counter upsert, RELEASE SAVEPOINT
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk_create(data)
+        self.assertEqual(len(queries), 3 + inserts)
+        self.assertEqual(len([
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "main_task" (')
+        ]), inserts)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(Task.objects.filter(user=self.user1).count(), 100)
+        self.assertEqual(
+            sorted(task['slug'] for task in response.data),
+            sorted(Task.objects.values_list('slug', flat=True))
+        )
+
+    def test_bulk_create_returns_per_item_errors(self):
+        data = [
+            {'title': 'Valid task', 'do_before': '2029-02-23T22:45:01Z'},
+            {'title': '', 'do_before': '2029-02-23T22:45:01Z'},
+            {'title': 'No deadline'},
+        ]
+        response = self.bulk_create(data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertIn('do_before', response.data[2])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_create_rejects_a_non_list_payload(self):
+        response = self.bulk_create(
+            {'title': 'Task', 'do_before': '2029-02-23T22:45:01Z'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_enforces_the_size_limit(self):
+        data = [
+            {'title': f'Task {i}', 'do_before': '2029-02-23T22:45:01Z'}
+            for i in range(3)
+        ]
+        with self.settings(TASKS_BULK_LIMIT=2):
+            response = self.bulk_create(data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_create_requires_authentication(self):
+        request = self.factory.post('/api/bulk/', [], format='json')
+        response = task_bulk_create(request)
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskBulkActionApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for user in (cls.user1, cls.user2):
+            Task.objects.bulk_create([
+                Task(
+                    title=f'Task {i}',
+                    do_before=timezone.now() + timedelta(days=3),
+                    user=user
+                )
+                for i in range(10)
+            ])
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.slugs = list(Task.objects.values_list('slug', flat=True))
+
+    def bulk_action(self, data):
+        request = self.factory.post('/api/bulk/action/', data, format='json')
+        force_authenticate(request, user=self.user1)
+        return task_bulk_action(request)
+
+    def test_bulk_do_runs_a_single_update(self):
+        # UPDATE and the counter upsert
+        with self.assertNumQueries(2):
+            response = self.bulk_action({'action': 'do', 'slugs': self.slugs})
+        self.assertEqual(response.data, {'action': 'do', 'count': 10})
+        self.assertEqual(Task.objects.filter(done=True).count(), 10)
+        self.assertFalse(
+            Task.objects.filter(user=self.user2, done=True).exists()
+        )
+
+    def test_bulk_delete_leaves_tombstones(self):
+        user1_slugs = set(
+            Task.objects.filter(user=self.user1).values_list('slug', flat=True)
+        )
+        response = self.bulk_action({'action': 'delete', 'slugs': self.slugs})
+
+        self.assertEqual(response.data, {'action': 'delete', 'count': 10})
+        self.assertFalse(Task.objects.filter(user=self.user1).exists())
+        self.assertEqual(Task.objects.filter(user=self.user2).count(), 10)
+        self.assertEqual(
+            set(TaskTombstone.objects.filter(user=self.user1)
+                .values_list('slug', flat=True)),
+            user1_slugs
+        )
+        self.assertFalse(
+            TaskTombstone.objects.filter(user=self.user2).exists()
+        )
+
+    def test_bulk_undo_accepts_upper_case_slugs(self):
+        Task.objects.filter(user=self.user1).mark_done()
+        response = self.bulk_action({
+            'action': 'undo',
+            'slugs': [slug.upper() for slug in self.slugs]
+        })
+        self.assertEqual(response.data['count'], 10)
+
+    def test_bulk_action_validates_the_payload(self):
+        response = self.bulk_action({'action': 'archive', 'slugs': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('action', response.data)
+        self.assertIn('slugs', response.data)
+
+
+class TaskListApiGetTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for i in range(5):
+            Task.objects.create(
+                title=f'Task {i}',
+                description='A long description nobody asked for.',
+                do_before=timezone.now() + timedelta(days=i + 1),
+                user=cls.user1
+            )
+        Task.objects.create(
+            title='Not yours',
+            do_before=timezone.now() + timedelta(days=1),
+            user=cls.user2
+        )
+
+    def setUp(self):
+        self.client.login(
+            email=TaskListApiGetTest.user1_credentials['email'],
+            password=TaskListApiGetTest.user1_credentials['password']
+        )
+
+    def test_api_is_mounted(self):
+        self.assertEqual(reverse('api:task_list'), '/api/')
+        response = self.client.get('/api/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(reverse('api:task_list'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_api_lists_only_the_users_tasks(self):
+        response = self.client.get(reverse('api:task_list'))
+        titles = [task['title'] for task in response.json()['results']]
+        self.assertEqual(titles, [f'Task {i}' for i in range(5)])
+
+    def test_api_paginates_with_a_cursor(self):
+        with self.settings(TASKS_PER_PAGE=2):
+            titles = []
+            url = reverse('api:task_list')
+            while url:
+                data = self.client.get(url).json()
+                titles.extend(task['title'] for task in data['results'])
+                url = data['next']
+        self.assertEqual(titles, [f'Task {i}' for i in range(5)])
+
+    def test_api_basic_fields_preset(self):
+        response = self.client.get(reverse('api:task_list'), {'fields': 'basic'})
+        task = response.json()['results'][0]
+        self.assertEqual(
+            set(task), {'title', 'slug', 'created_on', 'do_before', 'done',
+                        'finished_on'}
+        )
+
+    def test_api_custom_fields_skip_the_description_column(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('api:task_list'), {'fields': 'title,slug,do_before'}
+            )
+        task = response.json()['results'][0]
+        self.assertEqual(set(task), {'title', 'slug', 'do_before'})
+        self.assertFalse([
+            query for query in queries
+            if '"main_task"."description"' in query['sql']
+        ])
+
+    def test_api_rejects_unknown_fields(self):
+        response = self.client.get(
+            reverse('api:task_list'), {'fields': 'title,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+
+@override_settings(TASKS_SYNC_MARGIN=0)
+class TaskSyncApiTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for user in (cls.user1, cls.user2):
+            Task.objects.bulk_create([
+                Task(
+                    title=f'Task {i}',
+                    do_before=timezone.now() + timedelta(days=3),
+                    user=user
+                )
+                for i in range(50)
+            ])
+
+    def setUp(self):
+        self.client.login(
+            email=TaskSyncApiTest.user1_credentials['email'],
+            password=TaskSyncApiTest.user1_credentials['password']
+        )
+
+    def sync(self, cursor=None, **params):
+        if cursor is not None:
+            params['cursor'] = cursor
+        return self.client.get(reverse('api:task_sync'), params)
+
+    def test_sync_without_a_cursor_returns_every_task(self):
+        data = self.sync().json()
+        self.assertEqual(len(data['tasks']), 50)
+        self.assertEqual(data['deleted'], [])
+        self.assertTrue(data['cursor'])
+
+    def test_sync_returns_only_the_changed_task(self):
+        cursor = self.sync().json()['cursor']
+        task = Task.objects.filter(user=self.user1).first()
+        task.title = 'Changed'
+        task.save()
+        Task.objects.filter(user=self.user2).mark_done()
+
+        data = self.sync(cursor).json()
+        self.assertEqual(
+            [(row['slug'], row['title']) for row in data['tasks']],
+            [(task.slug, 'Changed')]
+        )
+        self.assertEqual(data['deleted'], [])
+
+        data = self.sync(data['cursor']).json()
+        self.assertEqual(data['tasks'], [])
+
+    def test_sync_returns_the_tasks_changed_by_queryset_updates(self):
+        cursor = self.sync().json()['cursor']
+        task = Task.objects.filter(user=self.user1).first()
+        Task.objects.filter(pk=task.pk).update(title='Changed')
+
+        data = self.sync(cursor).json()
+        self.assertEqual(
+            [(row['slug'], row['title']) for row in data['tasks']],
+            [(task.slug, 'Changed')]
+        )
+
+    def test_sync_returns_deleted_slugs(self):
+        cursor = self.sync().json()['cursor']
+        first, second = Task.objects.filter(user=self.user1)[:2]
+        first.delete()
+        Task.objects.filter(pk=second.pk).delete()
+        Task.objects.filter(user=self.user2)[:1].get().delete()
+
+        data = self.sync(cursor).json()
+        self.assertEqual(data['tasks'], [])
+        self.assertEqual(data['deleted'], [first.slug, second.slug])
+
+    def test_sync_always_includes_the_slug(self):
+        data = self.sync(fields='title').json()
+        self.assertEqual(set(data['tasks'][0]), {'slug', 'title'})
+
+    def test_sync_rejects_a_tampered_cursor(self):
+        cursor = self.sync().json()['cursor']
+        response = self.sync(cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_sync_rejects_an_expired_cursor(self):
+        cursor = encode_cursor(timezone.now() - timedelta(days=31))
+        self.assertEqual(self.sync(cursor).status_code, 404)
+
+    @override_settings(TASKS_SYNC_PAGE_SIZE=20)
+    def test_sync_is_paginated(self):
+        slugs = []
+        cursor = None
+        for size, more in [(20, True), (20, True), (10, False)]:
+            data = self.sync(cursor).json()
+            self.assertEqual(len(data['tasks']), size)
+            self.assertEqual(data['more'], more)
+            slugs += [row['slug'] for row in data['tasks']]
+            cursor = data['cursor']
+        self.assertCountEqual(
+            slugs, Task.objects.filter(user=self.user1).values_list(
+                'slug', flat=True
+            )
+        )
+        data = self.sync(cursor).json()
+        self.assertEqual((data['tasks'], data['more']), ([], False))
+
+    @override_settings(TASKS_SYNC_PAGE_SIZE=20)
+    def test_deleted_slugs_are_paginated(self):
+        with self.settings(TASKS_SYNC_PAGE_SIZE=50):
+            cursor = self.sync().json()['cursor']
+        deleted = list(
+            Task.objects.filter(user=self.user1).order_by('id')[:30]
+        )
+        for task in deleted:
+            task.delete()
+
+        slugs = []
+        for size, more in [(20, True), (10, False)]:
+            data = self.sync(cursor).json()
+            self.assertEqual(data['tasks'], [])
+            self.assertEqual(len(data['deleted']), size)
+            self.assertEqual(data['more'], more)
+            slugs += data['deleted']
+            cursor = data['cursor']
+        self.assertEqual(slugs, [task.slug for task in deleted])
+
+    def test_sync_accepts_a_cursor_from_before_deletions_were_paginated(self):
+        since = decode_cursor(self.sync().json()['cursor'])[0]
+        # The same cursor, as issued before.
+        cursor = signing.dumps(
+            [since.isoformat(), None, None], salt=CURSOR_SALT, compress=True
+        )
+        Task.objects.filter(user=self.user1)[:1].get().delete()
+        data = self.sync(cursor).json()
+        self.assertEqual(len(data['deleted']), 1)
+        self.assertFalse(data['more'])
+
+    @override_settings(TASKS_SYNC_PAGE_SIZE=20)
+    def test_changes_between_pages_are_sent(self):
+        with self.settings(TASKS_SYNC_PAGE_SIZE=50):
+            cursor = self.sync().json()['cursor']
+        changed = Task.objects.filter(user=self.user1)[:30]
+        for task in changed:
+            task.title = 'Changed'
+            task.save()
+        first, second = Task.objects.filter(user=self.user1)[30:32]
+        first.delete()
+
+        data = self.sync(cursor).json()
+        self.assertTrue(data['more'])
+        self.assertEqual(data['deleted'], [first.slug])
+        second.title = 'Changed between pages'
+        second.save()
+        data = self.sync(data['cursor']).json()
+        self.assertFalse(data['more'])
+        self.assertEqual(data['deleted'], [])
+        self.assertEqual(
+            data['tasks'][-1]['title'], 'Changed between pages'
+        )
+
+        # The next sync starts from the time of the first page, so the task
+        # changed in between is sent again.
+        data = self.sync(data['cursor']).json()
+        self.assertEqual(len(data['tasks']), 1)
+
+
+class TaskCountsApiTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        past = timezone.now() - timedelta(days=1)
+        Task.objects.bulk_create([
+            Task(title='Overdue', do_before=past, user=cls.user1),
+            Task(title='Open', do_before=timezone.now() + timedelta(days=1),
+                 user=cls.user1),
+            Task(title='Done', do_before=past, done=True, user=cls.user1),
+        ])
+
+    @override_settings(**BUDGET_SETTINGS)
+    def test_counts(self):
+        self.client.force_login(TaskCountsApiTest.user1)
+        # The user and the counts, the session is cached.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('api:task_counts'))
+        self.assertEqual(
+            response.json(), {'open': 2, 'done': 1, 'overdue': 1}
+        )
+
+    def test_counts_require_authentication(self):
+        response = self.client.get(reverse('api:task_counts'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .. import async_views
+from ..api import async_views as api_async_views
+from ..api import views as api_views
+from ..models import Task
+
+User = get_user_model()
+
+
+class AsyncViewTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for i in range(3):
+            Task.objects.create(
+                title=f'Open task {i}',
+                do_before=timezone.now() + timedelta(days=i + 1),
+                user=cls.user1
+            )
+        Task.objects.create(
+            title='Finished chore',
+            do_before=timezone.now() + timedelta(days=1),
+            done=True,
+            user=cls.user1
+        )
+        cls.other_task = Task.objects.create(
+            title='Not yours',
+            do_before=timezone.now() + timedelta(days=1),
+            user=cls.user2
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    def get(self, path, user=None, **headers):
+        request = self.factory.get(path, headers=headers)
+        request.user = user or self.user1
+        return request
+
+
+@override_settings(TASKS_CACHE_TIMEOUT=60)
+class AsyncTaskViewsTest(AsyncViewTestMixin, TestCase):
+    async def test_task_list_renders_the_open_tasks(self):
+        response = await async_views.task_list(self.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        content = response.content.decode()
+        positions = [content.index(f'Open task {i}') for i in range(3)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertNotIn('Finished chore', content)
+        self.assertNotIn('Not yours', content)
+
+        response = await async_views.task_list(self.get('/'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    async def test_done_task_list_renders_the_done_tasks(self):
+        response = await async_views.done_task_list(self.get('/done-tasks/'))
+        self.assertContains(response, 'Finished chore')
+        self.assertNotContains(response, 'Open task 0')
+
+    async def test_task_list_redirects_anonymous_users(self):
+        request = self.get('/')
+        request.user = AnonymousUser()
+        response = await async_views.task_list(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            response.url, f'{reverse("account_login")}?next=/'
+        )
+
+    async def test_task_list_answers_conditional_gets(self):
+        response = await async_views.task_list(self.get('/'))
+        response = await async_views.task_list(
+            self.get('/', if_none_match=response['ETag'])
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_task_detail_is_limited_to_the_users_tasks(self):
+        task = await Task.objects.filter(user=self.user1).afirst()
+        response = await async_views.task_detail(
+            self.get(task.get_absolute_url()), task.slug.upper()
+        )
+        self.assertContains(response, task.title)
+
+        with self.assertRaises(Http404):
+            await async_views.task_detail(
+                self.get('/'), self.other_task.slug
+            )
+
+
+class AsyncTaskListApiTest(AsyncViewTestMixin, TestCase):
+    def sync_response(self, path, **extra):
+        request = APIRequestFactory().get(path, **extra)
+        force_authenticate(request, user=self.user1)
+        response = api_views.task_list(request)
+        response.render()
+        return response
+
+    async def test_api_task_list_matches_the_drf_view(self):
+        for path in ('/api/', '/api/?fields=basic', '/api/?fields=title'):
+            response = await api_async_views.task_list(
+                self.get(path, accept='application/json')
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(
+                response.content,
+                (await sync_to_async(self.sync_response)(
+                    path, HTTP_ACCEPT='application/json'
+                )).content
+            )
+
+    async def test_api_task_list_answers_conditional_gets(self):
+        response = await api_async_views.task_list(self.get('/api/'))
+        response = await api_async_views.task_list(
+            self.get('/api/', if_none_match=response['ETag'])
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_api_task_list_errors(self):
+        response = await api_async_views.task_list(
+            self.get('/api/?fields=password')
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await api_async_views.task_list(
+            self.get('/api/?cursor=nonsense')
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_api_task_list_hands_other_requests_to_drf(self):
+        request = self.get('/api/')
+        request.user = AnonymousUser()
+        response = await api_async_views.task_list(request)
+        self.assertEqual(response.status_code, 403)
+
+        request = self.factory.post('/api/', {
+            'title': 'Posted',
+            'do_before': '2029-02-23T22:45:01Z'
+        }, content_type='application/json')
+        request.user = self.user1
+        force_authenticate(request, user=self.user1)
+        response = await api_async_views.task_list(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            await Task.objects.filter(title='Posted', user=self.user1).aexists()
+        )
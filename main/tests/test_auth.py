@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from allauth.account.models import EmailAddress
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..auth import _user_key
+from ..models import Task
+
+User = get_user_model()
+
+UNCACHED = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'TASKS_USER_CACHE_TIMEOUT': 0,
+}
+CACHED = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'TASKS_USER_CACHE_TIMEOUT': 300,
+}
+
+
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        EmailAddress.objects.create(
+            user=cls.user1, email=cls.user1.email, verified=True,
+            primary=True
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, **settings):
+        with self.settings(**settings):
+            client = Client()
+            client.force_login(self.user1)
+            # Fills the caches.
+            client.get(reverse('main:task_list'))
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(reverse('main:task_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_cached_session_and_user_save_two_queries(self):
+        self.assertEqual(
+            self.count_queries(**UNCACHED) - self.count_queries(**CACHED), 2
+        )
+
+    def test_password_change_logs_out_other_sessions(self):
+        with self.settings(**CACHED):
+            self.client.force_login(self.user1)
+            self.client.get(reverse('main:task_list'))
+            self.assertIsNotNone(cache.get(_user_key(self.user1.pk)))
+
+            user = User.objects.get(pk=self.user1.pk)
+            user.set_password('n3w-Passw0rd')
+            user.save()
+            response = self.client.get(reverse('main:task_list'))
+        self.assertRedirects(
+            response, f'{reverse("account_login")}?next=/',
+            fetch_redirect_response=False
+        )
+
+    def test_deactivated_user_is_logged_out(self):
+        with self.settings(**CACHED):
+            self.client.force_login(self.user1)
+            self.client.get(reverse('main:task_list'))
+            user = User.objects.get(pk=self.user1.pk)
+            user.is_active = False
+            user.save()
+            response = self.client.get(reverse('main:task_list'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_allauth_login_and_logout(self):
+        with self.settings(**CACHED):
+            response = self.client.post(reverse('account_login'), {
+                'login': self.user1_credentials['email'],
+                'password': self.user1_credentials['password'],
+            })
+            self.assertRedirects(
+                response, reverse('main:task_list'),
+                fetch_redirect_response=False
+            )
+            self.assertEqual(
+                self.client.session[BACKEND_SESSION_KEY],
+                'main.auth.CachedAuthenticationBackend'
+            )
+            response = self.client.get(reverse('main:task_list'))
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Read for 20 mins.')
+
+            self.client.post(reverse('account_logout'))
+            response = self.client.get(reverse('main:task_list'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_cache_can_be_turned_off(self):
+        with self.settings(**UNCACHED):
+            self.client.force_login(self.user1)
+            response = self.client.get(reverse('main:task_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(_user_key(self.user1.pk)))
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import cache as tasks_cache
+from ..models import Task
+from .query_budgets import QueryBudgetClient
+
+User = get_user_model()
+
+
+@override_settings(TASKS_CACHE_TIMEOUT=60)
+class TaskListCacheTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        cls.task = Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(
+            email=TaskListCacheTest.user1_credentials['email'],
+            password=TaskListCacheTest.user1_credentials['password']
+        )
+
+    def get_task_list(self):
+        return self.client.get(reverse('main:task_list'))
+
+    def assertCacheStatus(self, response, status):
+        self.assertEqual(response['X-Cache'], status)
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.assertCacheStatus(self.get_task_list(), 'MISS')
+        hits = tasks_cache.stats['hits']
+
+        response = self.get_task_list()
+        self.assertCacheStatus(response, 'HIT')
+        self.assertContains(response, TaskListCacheTest.task.title)
+        self.assertEqual(tasks_cache.stats['hits'], hits + 1)
+
+    def test_cache_can_be_turned_off(self):
+        with self.settings(TASKS_CACHE_TIMEOUT=0):
+            self.assertCacheStatus(self.get_task_list(), 'MISS')
+            self.assertCacheStatus(self.get_task_list(), 'MISS')
+
+    def test_cache_hit_skips_the_task_query(self):
+        self.get_task_list()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_task_list()
+        # Only the conditional GET validator aggregate may touch the table.
+        self.assertFalse([
+            query for query in queries if '"main_task"."id"' in query['sql']
+        ])
+
+    def test_saving_a_task_invalidates_the_cache(self):
+        self.get_task_list()
+        task = Task.objects.get(pk=TaskListCacheTest.task.pk)
+        task.title = 'Read for 40 mins.'
+        task.save()
+
+        response = self.get_task_list()
+        self.assertCacheStatus(response, 'MISS')
+        self.assertContains(response, 'Read for 40 mins.')
+
+    def test_bulk_update_invalidates_the_cache(self):
+        self.get_task_list()
+        Task.objects.filter(pk=TaskListCacheTest.task.pk).mark_done()
+
+        response = self.get_task_list()
+        self.assertCacheStatus(response, 'MISS')
+        self.assertNotContains(response, TaskListCacheTest.task.title)
+
+    def test_bulk_create_and_delete_invalidate_the_cache(self):
+        self.get_task_list()
+        Task.objects.bulk_create([Task(
+            title='Bulk created',
+            do_before=timezone.now() + timedelta(days=1),
+            user=TaskListCacheTest.user1
+        )])
+        self.assertContains(self.get_task_list(), 'Bulk created')
+
+        Task.objects.for_user(TaskListCacheTest.user1).delete()
+        self.assertNotContains(self.get_task_list(), 'Bulk created')
+
+    def test_other_users_changes_keep_the_cache(self):
+        self.get_task_list()
+        Task.objects.create(
+            title='Not yours',
+            do_before=timezone.now() + timedelta(days=1),
+            user=TaskListCacheTest.user2
+        )
+        self.assertCacheStatus(self.get_task_list(), 'HIT')
+
+    def test_pages_are_cached_separately(self):
+        for i in range(3):
+            Task.objects.create(
+                title=f'Task {i}',
+                do_before=timezone.now() + timedelta(days=4 + i),
+                user=TaskListCacheTest.user1
+            )
+        with self.settings(TASKS_PER_PAGE=2):
+            first = self.get_task_list()
+            cursor = first.context['page'].next_cursor
+            second = self.client.get(
+                reverse('main:task_list'), {'cursor': cursor}
+            )
+        self.assertCacheStatus(second, 'MISS')
+        self.assertContains(second, 'Task 2')
+        self.assertNotContains(second, TaskListCacheTest.task.title)
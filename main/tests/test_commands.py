@@ -0,0 +1,523 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase
+from django.utils import timezone
+
+from ..management.commands.send_reminders import (
+    Command as SendRemindersCommand
+)
+from ..models import Task, TaskCounter, TaskImport, TaskTombstone
+
+User = get_user_model()
+
+
+class ImportTasksCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def ndjson(self, count, start=0):
+        do_before = (timezone.now() + timedelta(days=3)).isoformat()
+        return ''.join(
+            json.dumps({'title': f'Task {i}', 'do_before': do_before}) + '\n'
+            for i in range(start, start + count)
+        )
+
+    def call(self, *args, **kwargs):
+        out = io.StringIO()
+        call_command('import_tasks', *args, user='user1', stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_import_ndjson_in_batches(self):
+        path = self.write('tasks.ndjson', self.ndjson(25))
+        out = self.call(path, batch_size=10)
+
+        self.assertEqual(Task.objects.filter(user=self.user1).count(), 25)
+        self.assertEqual(out.count('Committed'), 3)
+        self.assertIn('Imported 25 tasks', out)
+        self.assertFalse(TaskImport.objects.exists())
+        self.assertEqual(
+            len(set(Task.objects.values_list('slug', flat=True))), 25
+        )
+
+    def test_import_csv(self):
+        path = self.write('tasks.csv', (
+            'title,description,do_before,done,finished_on\n'
+            '"Read, then write","Line one\nLine two",2029-02-23 22:45:01,False,\n'
+            'Done already,,2019-02-23T22:45:01+00:00,True,'
+            '2019-02-22T10:00:00+00:00\n'
+        ))
+        self.call(path)
+
+        first = Task.objects.get(title='Read, then write')
+        self.assertEqual(first.description, 'Line one\nLine two')
+        self.assertFalse(first.done)
+        second = Task.objects.get(title='Done already')
+        self.assertTrue(second.done)
+        self.assertEqual(second.finished_on.day, 22)
+
+    def test_import_from_stdin(self):
+        self.call('-', format='ndjson', stdin=io.StringIO(self.ndjson(3)))
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_import_resumes_after_the_last_committed_batch(self):
+        content = self.ndjson(10) + '{"title": "Broken"}\n' + self.ndjson(4, 10)
+        path = self.write('tasks.ndjson', content)
+
+        with self.assertRaisesMessage(CommandError, 'Line 11'):
+            self.call(path, batch_size=5)
+        self.assertEqual(Task.objects.count(), 10)
+        self.assertEqual(TaskImport.objects.get().committed, 10)
+
+        lines = content.splitlines()
+        do_before = json.loads(lines[0])['do_before']
+        lines[10] = json.dumps({'title': 'Fixed', 'do_before': do_before})
+        self.write('tasks.ndjson', '\n'.join(lines))
+
+        out = self.call(path, batch_size=5, resume=True)
+        self.assertIn('Resuming after 10 committed rows', out)
+        self.assertEqual(Task.objects.count(), 15)
+        self.assertEqual(Task.objects.filter(title='Task 0').count(), 1)
+        self.assertTrue(Task.objects.filter(title='Fixed').exists())
+
+    def test_checkpoint_is_committed_with_its_batch(self):
+        path = self.write('tasks.ndjson', self.ndjson(15))
+        update_or_create = TaskImport.objects.update_or_create
+        calls = []
+
+        def fail_on_the_second_batch(**kwargs):
+            calls.append(kwargs)
+            if(len(calls) == 2):
+                raise OSError('Killed')
+            return update_or_create(**kwargs)
+
+        with mock.patch.object(
+            TaskImport.objects, 'update_or_create',
+            side_effect=fail_on_the_second_batch
+        ):
+            with self.assertRaises(OSError):
+                self.call(path, batch_size=5)
+        # The second batch was rolled back with its checkpoint.
+        self.assertEqual(Task.objects.count(), 5)
+
+        self.call(path, batch_size=5, resume=True)
+        self.assertEqual(Task.objects.count(), 15)
+        self.assertEqual(
+            len(set(Task.objects.values_list('title', flat=True))), 15
+        )
+
+    def test_invalid_rows_are_reported_with_their_line(self):
+        do_before = (timezone.now() + timedelta(days=3)).isoformat()
+        path = self.write('tasks.ndjson', self.ndjson(2) + '\n' + json.dumps(
+            {'title': 'x' * 256, 'do_before': do_before}
+        ) + '\n')
+        with self.assertRaisesMessage(
+            CommandError, 'Line 4: title: Ensure this value has at most 255'
+        ):
+            self.call(path)
+        self.assertFalse(Task.objects.exists())
+
+        path = self.write('tasks.csv', (
+            'title,description,do_before\n'
+            '"Two","Line one\nLine two",2029-02-23 22:45:01\n'
+            ',,2029-02-23 22:45:01\n'
+        ))
+        with self.assertRaisesMessage(
+            CommandError, 'Line 4: title is required'
+        ):
+            self.call(path)
+
+    def test_import_round_trips_an_export(self):
+        Task.objects.create(
+            title='Exported',
+            description='Some text',
+            do_before=timezone.now() + timedelta(days=3),
+            user=self.user1
+        )
+        self.client.login(email='user1@domain.com', password='APQMwn0$')
+        response = self.client.get('/export/', {'format': 'csv'})
+        path = self.write(
+            'tasks.csv', b''.join(response.streaming_content).decode()
+        )
+        self.call(path)
+
+        original, imported = Task.objects.order_by('pk')
+        self.assertEqual(imported.title, original.title)
+        self.assertEqual(imported.description, original.description)
+        self.assertEqual(imported.do_before, original.do_before)
+        self.assertNotEqual(imported.slug, original.slug)
+
+    def test_import_rejects_unknown_users(self):
+        path = self.write('tasks.ndjson', self.ndjson(1))
+        with self.assertRaisesMessage(CommandError, 'does not exist'):
+            call_command('import_tasks', path, user='nobody')
+
+
+class RebuildTaskCountersCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for user in (cls.user1, cls.user2):
+            Task.objects.bulk_create([
+                Task(title=f'Task {i}', do_before=timezone.now(),
+                     done=i == 0, user=user)
+                for i in range(3)
+            ])
+
+    def call(self, *args):
+        out = io.StringIO()
+        call_command('rebuild_task_counters', *args, stdout=out)
+        return out.getvalue()
+
+    def test_check_passes_for_maintained_counters(self):
+        out = self.call('--check')
+        self.assertIn('Checked the counters of 2 users, 0 wrong', out)
+
+    def test_check_reports_wrong_counters(self):
+        TaskCounter.objects.filter(user=self.user1).update(open_count=7)
+        with self.assertRaisesMessage(CommandError, '1 wrong'):
+            self.call('--check')
+        self.assertEqual(
+            TaskCounter.objects.get(user=self.user1).open_count, 7
+        )
+
+    def test_rebuild_fixes_wrong_and_missing_counters(self):
+        TaskCounter.objects.filter(user=self.user1).update(done_count=0)
+        TaskCounter.objects.filter(user=self.user2).delete()
+        out = self.call()
+        self.assertIn(
+            f'User {self.user1.pk}: counted 2 open and 1 done, '
+            'stored 2 open and 0 done', out
+        )
+        self.assertIn('2 wrong, rebuilt', out)
+        for user in (self.user1, self.user2):
+            counter = TaskCounter.objects.get(user=user)
+            self.assertEqual((counter.open_count, counter.done_count), (2, 1))
+        self.assertIn('0 wrong', self.call('--check'))
+
+
+class SendRemindersCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        now = timezone.now()
+        cls.due = [
+            Task.objects.create(
+                title=f'Due task {i}',
+                do_before=now + timedelta(minutes=10 + i),
+                user=cls.user1 if i < 3 else cls.user2
+            )
+            for i in range(5)
+        ]
+        Task.objects.create(
+            title='Done task', do_before=now + timedelta(minutes=5),
+            done=True, user=cls.user1
+        )
+        Task.objects.create(
+            title='Later task', do_before=now + timedelta(days=2),
+            user=cls.user1
+        )
+        Task.objects.create(
+            title='Overdue task', do_before=now - timedelta(minutes=5),
+            user=cls.user1
+        )
+
+    def call(self, *args, **kwargs):
+        out = io.StringIO()
+        call_command('send_reminders', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_emails_the_due_tasks_in_batches_over_one_connection(self):
+        with mock.patch(
+            'main.management.commands.send_reminders.get_connection',
+            wraps=mail.get_connection
+        ) as get_connection:
+            out = self.call(window=60, batch_size=2)
+
+        get_connection.assert_called_once()
+        self.assertIn('Reminded 5 tasks in 4 emails', out)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['user1@domain.com', 'user1@domain.com',
+             'user2@domain.com', 'user2@domain.com']
+        )
+        body = ''.join(message.body for message in mail.outbox)
+        for task in self.due:
+            self.assertIn(task.title, body)
+            self.assertIn(task.get_absolute_url(), body)
+        self.assertNotIn('Done task', body)
+        self.assertNotIn('Later task', body)
+        self.assertNotIn('Overdue task', body)
+        self.assertEqual(
+            set(Task.objects.filter(reminded_on__isnull=False)),
+            set(self.due)
+        )
+
+    def test_tasks_are_reminded_once(self):
+        self.call(window=60)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, '3 tasks due soon')
+        self.assertIn('Reminded 0 tasks in 0 emails', self.call(window=60))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_a_moved_deadline_gets_a_new_reminder(self):
+        self.call(window=60)
+        task = Task.objects.get(pk=self.due[0].pk)
+        task.do_before = timezone.now() + timedelta(minutes=30)
+        task.save()
+        Task.objects.filter(pk=self.due[3].pk).update(
+            do_before=timezone.now() + timedelta(minutes=40)
+        )
+        mail.outbox = []
+        self.assertIn('Reminded 2 tasks in 2 emails', self.call(window=60))
+        self.assertEqual(mail.outbox[0].subject, 'Task due soon: Due task 0')
+
+    def test_a_failed_batch_is_retried(self):
+        with mock.patch.object(
+            mail.get_connection().__class__, 'send_messages',
+            side_effect=OSError
+        ), self.assertLogs(
+            'main.management.commands.send_reminders', 'ERROR'
+        ):
+            out = self.call(window=60)
+        self.assertIn('Reminded 0 tasks in 0 emails, 5 tasks failed', out)
+        self.assertFalse(
+            Task.objects.filter(reminded_on__isnull=False).exists()
+        )
+        self.assertIn('Reminded 5 tasks', self.call(window=60))
+
+    def test_a_failed_email_doesnt_hold_up_the_others(self):
+        backend = mail.get_connection().__class__
+        send_messages = backend.send_messages
+
+        def fail_for_user1(connection, messages):
+            if(messages[0].to == ['user1@domain.com']):
+                raise OSError
+            return send_messages(connection, messages)
+
+        with mock.patch.object(
+            backend, 'send_messages', autospec=True,
+            side_effect=fail_for_user1
+        ), self.assertLogs(
+            'main.management.commands.send_reminders', 'ERROR'
+        ):
+            out = self.call(window=60, batch_size=2)
+        self.assertIn('Reminded 2 tasks in 2 emails, 3 tasks failed', out)
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['user2@domain.com'], ['user2@domain.com']]
+        )
+        self.assertEqual(
+            set(Task.objects.filter(reminded_on__isnull=True,
+                                    pk__in=[t.pk for t in self.due])),
+            set(self.due[:3])
+        )
+
+    def test_no_transaction_is_open_while_sending(self):
+        # Only the atomic blocks of the test case.
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def send_messages(backend, messages):
+            depths.append(len(connection.atomic_blocks))
+            return len(messages)
+
+        with mock.patch.object(
+            mail.get_connection().__class__, 'send_messages', autospec=True,
+            side_effect=send_messages
+        ):
+            self.call(window=60)
+        self.assertEqual(depths, [depth, depth])
+
+    def test_loop_keeps_running_after_a_failed_run(self):
+        out = io.StringIO()
+        with mock.patch.object(
+            SendRemindersCommand, 'send_reminders',
+            side_effect=[OSError, (5, 4, 0)]
+        ), mock.patch(
+            'main.management.commands.send_reminders.time.sleep',
+            side_effect=[None, KeyboardInterrupt]
+        ), self.assertLogs(
+            'main.management.commands.send_reminders', 'ERROR'
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('send_reminders', '--loop', stdout=out)
+        self.assertIn('Reminded 5 tasks in 4 emails', out.getvalue())
+
+
+class PruneTombstonesCommandTest(TestCase):
+    def test_only_tombstones_past_the_retention_are_deleted(self):
+        user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        now = timezone.now()
+        TaskTombstone.objects.bulk_create([
+            TaskTombstone(
+                user=user1, slug='old', deleted_on=now - timedelta(days=31)
+            ),
+            TaskTombstone(
+                user=user1, slug='recent', deleted_on=now - timedelta(days=29)
+            ),
+        ])
+        out = io.StringIO()
+        with self.settings(TASKS_SYNC_RETENTION_DAYS=30):
+            call_command('prune_tombstones', stdout=out)
+        self.assertIn('Deleted 1 tombstones', out.getvalue())
+        self.assertEqual(
+            list(TaskTombstone.objects.values_list('slug', flat=True)),
+            ['recent']
+        )
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=self.user1
+        )
+
+    def load_test(self, path, *args):
+        out = io.StringIO()
+        call_command(
+            'load_test', self.live_server_url + path,
+            '--concurrency', '2', '--requests', '6', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_load_test_logs_in_as_the_user(self):
+        output = self.load_test('/api/', '--user', 'user1')
+        self.assertIn('6 requests with 2 clients', output)
+        self.assertIn('status codes: 200 x6', output)
+
+    def test_load_test_reports_failed_requests(self):
+        output = self.load_test('/api/')
+        self.assertIn('status codes: 403 x6', output)
+        self.assertIn('6 failed requests', output)
+
+    def test_load_test_rejects_unknown_users(self):
+        with self.assertRaises(CommandError):
+            self.load_test('/api/', '--user', 'nobody')
+
+
+class SeedTasksCommandTest(TestCase):
+    def seed(self, *args):
+        out = io.StringIO()
+        call_command(
+            'seed_tasks', '--users', '3', '--tasks-per-user', '40',
+            '--batch-size', '50', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_seed_tasks_creates_users_with_tasks(self):
+        self.assertIn('Seeded 3 users with 120 tasks', self.seed())
+        for user in User.objects.all():
+            self.assertEqual(user.username[:4], 'seed')
+            self.assertTrue(user.check_password('password'))
+            self.assertEqual(user.tasks.count(), 40)
+            counts = TaskCounter.objects.counts(user)
+            self.assertEqual(
+                counts['done'], user.tasks.filter(done=True).count()
+            )
+        for task in Task.objects.filter(done=True):
+            self.assertLessEqual(task.created_on, task.finished_on)
+            self.assertLessEqual(task.finished_on, timezone.now())
+
+    def test_seed_tasks_adds_tasks_to_existing_users(self):
+        self.seed()
+        self.seed()
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Task.objects.count(), 240)
+
+    def test_seed_makes_the_data_reproducible(self):
+        self.seed('--seed', '1', '--prefix', 'a')
+        self.seed('--seed', '1', '--prefix', 'b')
+        self.assertEqual(
+            list(Task.objects.filter(user__username='a1').order_by('id')
+                 .values_list('title', 'done')),
+            list(Task.objects.filter(user__username='b1').order_by('id')
+                 .values_list('title', 'done')),
+        )
+
+
+class BenchmarkCommandTest(LiveServerTestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=self.user1
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = os.path.join(directory, 'benchmark.json')
+
+    def benchmark(self, *args):
+        out = io.StringIO()
+        call_command(
+            'benchmark', '--user', 'user1', '--url', self.live_server_url,
+            '--concurrency', '2', '--requests', '4', '--output', self.output,
+            *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_benchmark_saves_the_results_of_every_endpoint(self):
+        output = self.benchmark()
+        with open(self.output) as f:
+            report = json.load(f)
+        self.assertEqual(report['tasks'], 1)
+        self.assertIn('task_search', report['endpoints'])
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['statuses'], {'200': 4}, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertIn(name, output)
+
+    def test_benchmark_compares_with_a_previous_run(self):
+        self.benchmark('--endpoint', 'api_task_list')
+        previous = self.output + '.previous'
+        os.rename(self.output, previous)
+        output = self.benchmark(
+            '--endpoint', 'api_task_list', '--compare', previous
+        )
+        self.assertIn('p95', output.splitlines()[1])
+
+    def test_benchmark_rejects_unknown_endpoints(self):
+        with self.assertRaises(CommandError):
+            self.benchmark('--endpoint', 'nothing')
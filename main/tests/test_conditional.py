@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ..api.views import task_list as api_task_list
+from ..conditional import task_list_validators
+from ..models import Task, TaskTombstone
+from .query_budgets import QueryBudgetClient
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.task = Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+        cls.other_task = Task.objects.create(
+            title='Watch A tv show.',
+            do_before=timezone.now() + timedelta(days=1),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        self.client.login(
+            email=ConditionalGetTest.user1_credentials['email'],
+            password=ConditionalGetTest.user1_credentials['password']
+        )
+
+    def test_validators_use_a_single_query(self):
+        with self.assertNumQueries(1):
+            last_modified, count = task_list_validators(self.user1)
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            last_modified,
+            Task.objects.latest('updated_on').updated_on
+        )
+
+    def test_task_list_returns_304_for_a_matching_etag(self):
+        response = self.client.get(reverse('main:task_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(
+            reverse('main:task_list'),
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_task_list_returns_200_after_a_change(self):
+        etag = self.client.get(reverse('main:done_task_list'))['ETag']
+        Task.objects.filter(pk=self.task.pk).mark_done()
+
+        response = self.client.get(
+            reverse('main:done_task_list'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.task.title)
+
+    def test_if_modified_since_sees_deletions(self):
+        last_modified = self.client.get(
+            reverse('main:task_list')
+        )['Last-Modified']
+        response = self.client.get(
+            reverse('main:task_list'), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+        deleted_on = timezone.now() + timedelta(seconds=5)
+        Task.objects.get(pk=self.other_task.pk).delete()
+        TaskTombstone.objects.update(deleted_on=deleted_on)
+
+        response = self.client.get(
+            reverse('main:task_list'), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.other_task.title)
+
+    def test_task_detail_returns_304_until_the_task_changes(self):
+        url = self.task.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Task.objects.filter(pk=self.task.pk).update(
+            updated_on=timezone.now() + timedelta(seconds=1)
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_task_list_returns_304_without_serializing(self):
+        factory = APIRequestFactory()
+        request = factory.get('/api/')
+        force_authenticate(request, user=self.user1)
+        etag = api_task_list(request)['ETag']
+
+        request = factory.get('/api/', HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.user1)
+        with self.assertNumQueries(1):
+            response = api_task_list(request)
+        self.assertEqual(response.status_code, 304)
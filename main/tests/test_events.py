@@ -0,0 +1,230 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase,
+    override_settings
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import async_views, events
+from ..models import Task
+
+User = get_user_model()
+
+
+class RecordingBackend(events.InProcessBackend):
+    def __init__(self):
+        super(RecordingBackend, self).__init__()
+        self.published = []
+
+    def publish(self, user_id, message):
+        self.published.append((user_id, message['type'], message['slugs']))
+        super(RecordingBackend, self).publish(user_id, message)
+
+
+@override_settings(
+    TASKS_EVENTS_BACKEND='main.tests.test_events.RecordingBackend'
+)
+class TaskEventPublishTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(username='user1')
+        cls.user2 = User.objects.create_user(username='user2')
+
+    def setUp(self):
+        self.backend = events.get_backend()
+        self.backend.published.clear()
+
+    def create_task(self, user, **kwargs):
+        kwargs.setdefault('title', 'A task')
+        kwargs.setdefault('do_before', timezone.now() + timedelta(days=1))
+        return Task.objects.create(user=user, **kwargs)
+
+    def test_events_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            task = self.create_task(self.user1)
+        self.assertEqual(self.backend.published, [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            self.backend.published, [(self.user1.pk, 'created', [task.slug])]
+        )
+
+    def test_save_publishes_the_kind_of_change(self):
+        task = self.create_task(self.user1)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.title = 'Renamed'
+            task.save()
+            task.done = True
+            task.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(pk=task.pk)
+            task.done = False
+            task.save()
+        self.assertEqual([event_type for user_id, event_type, slugs
+                          in self.backend.published],
+                         ['updated', 'done', 'undone'])
+
+    def test_bulk_writes_publish_the_changed_slugs(self):
+        tasks = [self.create_task(self.user1) for i in range(3)]
+        slugs = sorted(task.slug for task in tasks)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.for_user(self.user1).mark_done()
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.for_user(self.user1).mark_undone()
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.for_user(self.user1).delete()
+        self.assertEqual(
+            [(user_id, event_type, sorted(event_slugs)) for
+             user_id, event_type, event_slugs in self.backend.published],
+            [(self.user1.pk, 'done', slugs),
+             (self.user1.pk, 'undone', slugs),
+             (self.user1.pk, 'deleted', slugs)]
+        )
+
+    def test_events_go_to_the_owner_of_each_task(self):
+        task1 = self.create_task(self.user1)
+        task2 = self.create_task(self.user2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk__in=[task1.pk, task2.pk]).update(
+                title='Renamed'
+            )
+        self.assertEqual(sorted(self.backend.published), sorted([
+            (self.user1.pk, 'updated', [task1.slug]),
+            (self.user2.pk, 'updated', [task2.slug]),
+        ]))
+
+    def test_delete_publishes_deleted(self):
+        task = self.create_task(self.user1)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(
+            self.backend.published, [(self.user1.pk, 'deleted', [task.slug])]
+        )
+
+    def test_bulk_create_publishes_created(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks = Task.objects.bulk_create([
+                Task(title='Bulk task', do_before=timezone.now(),
+                     user=self.user1)
+                for i in range(2)
+            ])
+        self.assertEqual(self.backend.published, [
+            (self.user1.pk, 'created', [task.slug for task in tasks])
+        ])
+
+    def test_large_events_are_split_into_messages(self):
+        slugs = ['slug-{}-{}'.format(i, 'x' * 40) for i in range(500)]
+        messages = list(events._messages('deleted', slugs))
+        self.assertGreater(len(messages), 1)
+        for message in messages:
+            self.assertLessEqual(
+                len(json.dumps(dict(message, user=1))),
+                events.MAX_MESSAGE_BYTES + 100
+            )
+        self.assertEqual(
+            [slug for message in messages for slug in message['slugs']], slugs
+        )
+
+
+class InProcessBackendTest(TestCase):
+    async def test_subscribers_receive_their_user_messages(self):
+        backend = events.InProcessBackend()
+        async with backend.subscribe(1) as subscription1, \
+                backend.subscribe(2) as subscription2:
+            await sync_to_async(backend.publish)(
+                1, {'type': 'created', 'slugs': ['a']}
+            )
+            message = await asyncio.wait_for(subscription1.get(), 1)
+            self.assertEqual(message, {'type': 'created', 'slugs': ['a']})
+            self.assertTrue(subscription2.queue.empty())
+        self.assertEqual(backend._subscriptions, {})
+
+
+class TaskEventsViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user1')
+
+    async def test_streams_the_user_events(self):
+        request = AsyncRequestFactory().get('/events/')
+        request.user = self.user
+        response = await async_views.task_events(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        stream = response.streaming_content
+        ready = (await stream.__anext__()).decode()
+        self.assertIn('event: ready\n', ready)
+        events.get_backend().publish(
+            self.user.pk, {'type': 'done', 'slugs': ['a-task']}
+        )
+        self.assertEqual(
+            (await asyncio.wait_for(stream.__anext__(), 1)).decode(),
+            'event: done\ndata: {"slugs":["a-task"]}\n\n'
+        )
+        await stream.aclose()
+
+    async def test_no_content_under_wsgi(self):
+        request = RequestFactory().get('/events/')
+        request.user = self.user
+        response = await async_views.task_events(request)
+        self.assertEqual(response.status_code, 204)
+
+
+class TaskEventsAttributeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user1')
+
+    def test_pages_open_the_stream_under_asgi(self):
+        self.async_client.force_login(self.user)
+        for name in ('main:task_list', 'main:done_task_list'):
+            response = async_to_sync(self.async_client.get)(reverse(name))
+            self.assertContains(
+                response, 'data-events-url="{}"'.format(
+                    reverse('main:task_events')
+                )
+            )
+
+    def test_pages_dont_open_the_stream_under_wsgi(self):
+        self.client.force_login(self.user)
+        for name in ('main:task_list', 'main:done_task_list'):
+            response = self.client.get(reverse(name))
+            self.assertNotContains(response, 'data-events-url')
+
+
+class PostgresBackendSettingsTest(TestCase):
+    def test_listens_on_the_listen_database(self):
+        self.assertEqual(events.PostgresBackend().listen_using, 'default')
+        # e.g. a direct connection while the others go through pgbouncer.
+        with self.settings(TASKS_EVENTS_LISTEN_DATABASE='direct'):
+            backend = events.PostgresBackend()
+        self.assertEqual(backend.using, 'default')
+        self.assertEqual(backend.listen_using, 'direct')
+
+
+@override_settings(TASKS_EVENTS_BACKEND='main.events.PostgresBackend')
+class PostgresBackendTest(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('LISTEN/NOTIFY needs PostgreSQL')
+        self.user = User.objects.create_user(username='user1')
+
+    def tearDown(self):
+        events.get_backend().close()
+
+    async def test_committed_changes_reach_subscribers(self):
+        backend = events.get_backend()
+        async with backend.subscribe(self.user.pk) as subscription:
+            task = await sync_to_async(Task.objects.create)(
+                title='A task', do_before=timezone.now(), user=self.user
+            )
+            message = await asyncio.wait_for(subscription.get(), 5)
+        self.assertEqual(message, {'type': 'created', 'slugs': [task.slug]})
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Task
+from ..search import search_tasks
+
+User = get_user_model()
+
+# The task lists are paginated, their queries always have a LIMIT.
+PAGE_SIZE = 21
+
+
+class TaskIndexTest(TestCase):
+    """Guard the hot-path lookups against regressing to sequential scans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+        # Enough rows for the planner's statistics to tell the indexes apart.
+        user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                do_before=timezone.now() + timedelta(days=i),
+                done=i % 2 == 0,
+                user=cls.user1 if i % 10 == 0 else user2
+            )
+            for i in range(500)
+        ])
+
+    def setUp(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest('No query plan expectations for this backend')
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny, make the planner prefer indexes the
+            # way it would on a real table.
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE main_task')
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_open_task_list_uses_the_composite_index(self):
+        self.assertUsesIndex(
+            Task.objects.filter(user=self.user1, done=False)
+                .order_by('do_before', 'id'),
+            'task_user_done_do_before_idx'
+        )
+
+    def test_done_task_list_uses_the_composite_index(self):
+        self.assertUsesIndex(
+            Task.objects.filter(user=self.user1, done=True)
+                .order_by('-finished_on', '-id'),
+            'task_user_done_finished_idx'
+        )
+
+    def test_task_list_pages_use_the_composite_indexes(self):
+        # As the paginated views run them.
+        self.assertUsesIndex(
+            Task.objects.filter(user=self.user1, done=False)
+                .order_by('do_before', 'id')[:PAGE_SIZE],
+            'task_user_done_do_before_idx'
+        )
+        self.assertUsesIndex(
+            Task.objects.filter(user=self.user1, done=True)
+                .order_by('-finished_on', '-id')[:PAGE_SIZE],
+            'task_user_done_finished_idx'
+        )
+
+    def test_api_task_list_pages_use_the_composite_index(self):
+        # Every task of the user, open or done, in the paginator's order.
+        tasks = Task.objects.filter(user=self.user1).order_by(
+            'do_before', 'id'
+        )
+        self.assertUsesIndex(tasks[:PAGE_SIZE], 'task_user_do_before_idx')
+        self.assertUsesIndex(
+            tasks.filter(do_before__gt=timezone.now())[:PAGE_SIZE],
+            'task_user_do_before_idx'
+        )
+
+    def test_case_insensitive_slug_lookup_uses_the_expression_index(self):
+        # Unordered, as get() runs it.
+        self.assertUsesIndex(
+            Task.objects.with_slug('1-READ-FOR-20-MINS').filter(
+                user=self.user1
+            ).order_by(),
+            'task_user_slug_upper_idx'
+        )
+
+    def test_due_reminders_use_the_partial_index(self):
+        self.assertUsesIndex(
+            Task.objects.due_for_reminder(timedelta(hours=1)),
+            'task_reminder_due_idx'
+        )
+
+    def test_search_uses_the_full_text_index(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('SQLite searches its FTS5 table')
+        self.assertUsesIndex(
+            # Across users: for one user with a handful of tasks the planner
+            # rightly reads them all through the user_id index instead.
+            search_tasks(Task.objects.all(), 'read'),
+            'task_search_idx'
+        )
@@ -0,0 +1,167 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from ..models import Task
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.task = Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user1)
+
+    def get_metrics(self):
+        with self.settings(TASKS_METRICS_TOKEN='s3cret'):
+            return self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret'
+            )
+
+    def test_requests_are_measured_by_url_name(self):
+        labels = {'view': 'main:task_list', 'method': 'GET'}
+        requests = sample('todo_requests_total', status='200', **labels)
+        latency = sample('todo_request_duration_seconds_count', **labels)
+        size = sample('todo_response_size_bytes_sum', view='main:task_list')
+        queries = sample(
+            'todo_request_db_queries_sum', view='main:task_list'
+        )
+
+        response = self.client.get(reverse('main:task_list'))
+
+        self.assertEqual(
+            sample('todo_requests_total', status='200', **labels),
+            requests + 1
+        )
+        self.assertEqual(
+            sample('todo_request_duration_seconds_count', **labels),
+            latency + 1
+        )
+        self.assertEqual(
+            sample('todo_response_size_bytes_sum', view='main:task_list'),
+            size + len(response.content)
+        )
+        self.assertEqual(
+            sample('todo_request_db_queries_sum', view='main:task_list'),
+            queries + response.wsgi_request.query_stats.count
+        )
+
+    def test_unresolved_paths_share_a_label(self):
+        before = sample(
+            'todo_requests_total', view='unresolved', method='GET',
+            status='404'
+        )
+        self.client.get('/no-such-page/')
+        self.client.get('/another-missing-page/')
+        self.assertEqual(
+            sample('todo_requests_total', view='unresolved', method='GET',
+                   status='404'),
+            before + 2
+        )
+
+    def test_cache_hits_and_misses_are_counted(self):
+        hits = sample('todo_task_cache_requests_total', result='hit')
+        misses = sample('todo_task_cache_requests_total', result='miss')
+        with self.settings(TASKS_CACHE_TIMEOUT=60):
+            self.client.get(reverse('main:task_list'))
+            self.client.get(reverse('main:task_list'))
+        self.assertGreater(
+            sample('todo_task_cache_requests_total', result='miss'), misses
+        )
+        self.assertGreater(
+            sample('todo_task_cache_requests_total', result='hit'), hits
+        )
+
+    def test_committed_task_events_are_counted(self):
+        done = sample('todo_task_events_total', event='done')
+        deleted = sample('todo_task_events_total', event='deleted')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=self.task.pk).mark_done()
+        with self.captureOnCommitCallbacks(execute=False):
+            # Never committed.
+            Task.objects.filter(pk=self.task.pk).delete()
+        self.assertEqual(
+            sample('todo_task_events_total', event='done'), done + 1
+        )
+        self.assertEqual(
+            sample('todo_task_events_total', event='deleted'), deleted
+        )
+
+    def test_metrics_are_served_in_the_prometheus_format(self):
+        self.client.get(reverse('main:task_list'))
+        response = self.get_metrics()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            b'todo_request_duration_seconds_bucket{le="0.005",'
+            b'method="GET",view="main:task_list"}',
+            response.content
+        )
+
+    def test_token_is_required_when_set(self):
+        with self.settings(TASKS_METRICS_TOKEN='s3cret'):
+            self.assertEqual(
+                self.client.get(reverse('metrics')).status_code, 404
+            )
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+            )
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret'
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_metrics_without_a_token_are_only_served_in_debug(self):
+        with self.settings(TASKS_METRICS_TOKEN=None):
+            self.assertEqual(
+                self.client.get(reverse('metrics')).status_code, 404
+            )
+            with self.settings(DEBUG=True):
+                self.assertEqual(
+                    self.client.get(reverse('metrics')).status_code, 200
+                )
+
+    def test_metrics_of_all_worker_processes_are_added_up(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        for i in range(2):
+            subprocess.run([
+                sys.executable, '-c',
+                'from main.metrics import TASK_EVENTS; '
+                'TASK_EVENTS.labels("done").inc(2)'
+            ], cwd=settings.BASE_DIR, env=env, check=True)
+
+        with mock.patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+            response = self.get_metrics()
+        self.assertIn(
+            b'todo_task_events_total{event="done"} 4.0', response.content
+        )
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import async_views
+from ..middleware import QueryCountMiddleware
+from ..models import Task
+
+User = get_user_model()
+
+
+class QueryCountMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user1)
+
+    def test_queries_are_reported_in_a_server_timing_header(self):
+        response = self.client.get(reverse('main:task_list'))
+        count = response.wsgi_request.query_stats.count
+        self.assertGreater(count, 0)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;desc="{} queries";dur=[\d.]+, total;dur=[\d.]+$'.format(
+                count
+            )
+        )
+
+    def test_queries_are_logged(self):
+        with self.assertLogs('main.queries', 'INFO') as logs:
+            self.client.get(reverse('api:task_counts'))
+        self.assertRegex(
+            logs.output[0], r'GET /api/counts/ \(api:task_counts\): \d+ queries'
+        )
+
+    def test_server_timing_header_can_be_turned_off(self):
+        with self.settings(TASKS_SERVER_TIMING=False):
+            response = self.client.get(reverse('main:task_list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_existing_server_timing_entries_are_kept(self):
+        def view(request):
+            response = HttpResponse()
+            response['Server-Timing'] = 'cache;desc="hit"'
+            return response
+        response = QueryCountMiddleware(view)(RequestFactory().get('/'))
+        self.assertTrue(
+            response['Server-Timing'].startswith('cache;desc="hit", db;')
+        )
+
+    async def test_queries_of_async_views_are_counted(self):
+        request = AsyncRequestFactory().get('/')
+        request.user = self.user1
+        middleware = QueryCountMiddleware(async_views.task_list)
+        response = await middleware(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(request.query_stats.count, 0)
+        self.assertIn('Server-Timing', response)
@@ -1,10 +1,18 @@
 from datetime import timedelta
 
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import (
+    TestCase, TransactionTestCase, skipUnlessDBFeature
+)
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from ..models import Task
+from ..models import Task, TaskCounter, TaskTombstone, generate_slug
 
 
 class TaskTest(TestCase):
@@ -25,7 +33,7 @@ class TaskTest(TestCase):
             'user': TaskTest.user1
         }
         task1 = Task.objects.create(**task1_data)
-        self.assertEqual(task1.slug, '1-another-task')
+        self.assertRegex(task1.slug, r'^[0-9a-f]{16}-another-task$')
 
         task2_data = {
             'title': 'Another task number 2',
@@ -33,7 +41,39 @@ class TaskTest(TestCase):
             'user': TaskTest.user1
         }
         task2 = Task.objects.create(**task2_data)
-        self.assertEqual(task2.slug, '2-another-task-number-2')
+        self.assertRegex(task2.slug, r'^[0-9a-f]{16}-another-task-number-2$')
+
+    def test_save_method_does_not_query_before_insert(self):
+        # INSERT and the counter upsert
+        with self.assertNumQueries(2):
+            Task.objects.create(
+                title='A task',
+                do_before=timezone.now() + timedelta(days=3),
+                user=TaskTest.user1
+            )
+
+    def test_slug_fits_the_slug_field_for_long_titles(self):
+        task = Task.objects.create(
+            title='a' * 255,
+            do_before=timezone.now() + timedelta(days=3),
+            user=TaskTest.user1
+        )
+        self.assertEqual(len(task.slug), 255)
+
+    def test_bulk_create_generates_unique_slugs(self):
+        tasks = Task.objects.bulk_create([
+            Task(
+                title='Same title',
+                do_before=timezone.now() + timedelta(days=3),
+                user=TaskTest.user1
+            )
+            for i in range(20)
+        ])
+        slugs = {task.slug for task in tasks}
+        self.assertEqual(len(slugs), 20)
+        self.assertEqual(
+            set(Task.objects.values_list('slug', flat=True)), slugs
+        )
 
     def test_str_method_returns_the_task_title(self):
         task_data = {
@@ -54,7 +94,7 @@ class TaskTest(TestCase):
         }
         task = Task.objects.create(**task_data)
 
-        expected_url = '/1-a-task/detail/'
+        expected_url = f'/{task.slug}/detail/'
 
         self.assertEqual(task.get_absolute_url(), expected_url)
 
@@ -67,7 +107,7 @@ class TaskTest(TestCase):
         }
         task = Task.objects.create(**task_data)
 
-        expected_url = '/1-a-task/update/'
+        expected_url = f'/{task.slug}/update/'
 
         self.assertEqual(task.get_update_url(), expected_url)
 
@@ -80,7 +120,7 @@ class TaskTest(TestCase):
         }
         task = Task.objects.create(**task_data)
 
-        expected_url = '/1-a-task/delete/'
+        expected_url = f'/{task.slug}/delete/'
 
         self.assertEqual(task.get_delete_url(), expected_url)
 
@@ -93,7 +133,7 @@ class TaskTest(TestCase):
         }
         task = Task.objects.create(**task_data)
 
-        expected_url = '/1-a-task/undo/'
+        expected_url = f'/{task.slug}/undo/'
 
         self.assertEqual(task.get_undo_url(), expected_url)
 
@@ -106,6 +146,285 @@ class TaskTest(TestCase):
         }
         task = Task.objects.create(**task_data)
 
-        expected_url = '/1-a-task/do/'
+        expected_url = f'/{task.slug}/do/'
 
         self.assertEqual(task.get_do_url(), expected_url)
+
+
+class TaskConcurrentCreateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def test_parallel_callers_get_unique_slugs(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            slugs = list(executor.map(
+                lambda i: generate_slug('Same title'), range(8000)
+            ))
+        self.assertEqual(len(set(slugs)), 8000)
+
+    def test_bulk_create_of_tasks_built_in_parallel(self):
+        # The slugs are made without reading the table, so tasks prepared
+        # by parallel callers don't collide once they are all inserted.
+        do_before = timezone.now() + timedelta(days=3)
+
+        def build_tasks(worker):
+            tasks = [
+                Task(title='Same title', do_before=do_before, user=self.user)
+                for i in range(50)
+            ]
+            for task in tasks:
+                task.fill_derived_fields(creating=True)
+            return tasks
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            batches = list(executor.map(build_tasks, range(8)))
+        for tasks in batches:
+            Task.objects.bulk_create(tasks)
+        slugs = Task.objects.values_list('slug', flat=True)
+        self.assertEqual(len(slugs), 400)
+        self.assertEqual(len(set(slugs)), 400)
+        self.assertEqual(
+            TaskCounter.objects.get(user=self.user).open_count, 400
+        )
+
+
+# Each thread needs its own connection: SQLite's test database is shared in
+# memory and fails concurrent writes with "table is locked".
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class TaskConcurrentConnectionsTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        self.do_before = timezone.now() + timedelta(days=3)
+
+    def run_in_threads(self, function, workers=8):
+        def run(worker):
+            try:
+                function()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run, range(workers)))
+
+    def test_concurrent_creates_get_unique_slugs(self):
+        def create_tasks():
+            for i in range(10):
+                Task.objects.create(
+                    title='Same title', do_before=self.do_before,
+                    user=self.user
+                )
+
+        self.run_in_threads(create_tasks)
+        slugs = Task.objects.values_list('slug', flat=True)
+        self.assertEqual(len(slugs), 80)
+        self.assertEqual(len(set(slugs)), 80)
+
+    def test_concurrent_bulk_creates_get_unique_slugs(self):
+        def bulk_create_tasks():
+            Task.objects.bulk_create([
+                Task(
+                    title='Same title', do_before=self.do_before,
+                    user=self.user
+                )
+                for i in range(50)
+            ])
+
+        self.run_in_threads(bulk_create_tasks)
+        slugs = Task.objects.values_list('slug', flat=True)
+        self.assertEqual(len(slugs), 400)
+        self.assertEqual(len(set(slugs)), 400)
+        self.assertEqual(
+            TaskCounter.objects.get(user=self.user).open_count, 400
+        )
+
+
+class TaskTombstoneTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def create_task(self, title):
+        return Task.objects.create(
+            title=title,
+            do_before=timezone.now() + timedelta(days=3),
+            user=TaskTombstoneTest.user1
+        )
+
+    def test_deleting_a_task_leaves_a_tombstone(self):
+        task = self.create_task('A task')
+        task.delete()
+        tombstone = TaskTombstone.objects.get()
+        self.assertEqual(tombstone.slug, task.slug)
+        self.assertEqual(tombstone.user, TaskTombstoneTest.user1)
+
+    def test_queryset_delete_leaves_a_tombstone_per_task(self):
+        slugs = {self.create_task(f'Task {i}').slug for i in range(3)}
+        kept = self.create_task('Kept')
+        deleted, _ = Task.objects.exclude(pk=kept.pk).delete()
+        self.assertEqual(deleted, 3)
+        self.assertEqual(
+            set(TaskTombstone.objects.values_list('slug', flat=True)), slugs
+        )
+
+    def test_queryset_delete_sends_the_delete_signals(self):
+        slugs = {self.create_task(f'Task {i}').slug for i in range(3)}
+        deleted_slugs = set()
+
+        def receiver(sender, instance, **kwargs):
+            deleted_slugs.add(instance.slug)
+
+        post_delete.connect(receiver, sender=Task)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Task)
+        deleted, _ = Task.objects.all().delete()
+        self.assertEqual(deleted, 3)
+        self.assertEqual(deleted_slugs, slugs)
+        self.assertEqual(
+            set(TaskTombstone.objects.values_list('slug', flat=True)), slugs
+        )
+
+
+class TaskCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+
+    def create_task(self, user=None, **kwargs):
+        kwargs.setdefault('do_before', timezone.now() + timedelta(days=3))
+        return Task.objects.create(
+            title='A task', user=user or TaskCounterTest.user1, **kwargs
+        )
+
+    def assertCounts(self, user, open_count, done_count):
+        counts = TaskCounter.objects.counts(user)
+        self.assertEqual(
+            (counts['open'], counts['done']), (open_count, done_count)
+        )
+        self.assertEqual(
+            (counts['open'], counts['done']),
+            (Task.objects.filter(user=user, done=False).count(),
+             Task.objects.filter(user=user, done=True).count())
+        )
+
+    def test_a_user_without_tasks_has_zero_counts(self):
+        self.assertEqual(
+            TaskCounter.objects.counts(TaskCounterTest.user1),
+            {'open': 0, 'done': 0, 'overdue': 0}
+        )
+
+    def test_save_and_delete_adjust_the_counters(self):
+        task = self.create_task()
+        self.create_task(done=True)
+        self.assertCounts(TaskCounterTest.user1, 1, 1)
+
+        task.done = True
+        task.save()
+        self.assertCounts(TaskCounterTest.user1, 0, 2)
+        task.title = 'Renamed'
+        task.save()
+        self.assertCounts(TaskCounterTest.user1, 0, 2)
+
+        task = Task.objects.get(pk=task.pk)
+        task.done = False
+        task.save()
+        self.assertCounts(TaskCounterTest.user1, 1, 1)
+        task.delete()
+        self.assertCounts(TaskCounterTest.user1, 0, 1)
+
+    def test_save_does_not_read_the_row_first(self):
+        task = Task.objects.get(pk=self.create_task().pk)
+        task.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertEqual(
+            [query['sql'] for query in queries
+             if query['sql'].startswith('SELECT')],
+            []
+        )
+        self.assertCounts(TaskCounterTest.user1, 1, 0)
+
+    def test_stale_instances_only_move_a_task_once(self):
+        task = self.create_task()
+        first = Task.objects.get(pk=task.pk)
+        second = Task.objects.get(pk=task.pk)
+        for stale in (first, second):
+            stale.done = True
+            stale.save()
+        self.assertCounts(TaskCounterTest.user1, 0, 1)
+
+        # Stale the other way: loaded done, undone meanwhile.
+        Task.objects.filter(pk=task.pk).mark_undone()
+        second.title = 'Renamed'
+        second.save()
+        self.assertCounts(TaskCounterTest.user1, 0, 1)
+
+    def test_stale_instances_only_delete_a_task_once(self):
+        task = self.create_task()
+        first = Task.objects.get(pk=task.pk)
+        second = Task.objects.get(pk=task.pk)
+        self.assertEqual(first.delete(), (1, {'main.Task': 1}))
+        self.assertEqual(second.delete(), (0, {'main.Task': 0}))
+        self.assertCounts(TaskCounterTest.user1, 0, 0)
+        self.assertEqual(
+            TaskTombstone.objects.filter(slug=task.slug).count(), 1
+        )
+
+    def test_updates_without_returning_adjust_the_counters(self):
+        for i in range(3):
+            self.create_task()
+        with mock.patch(
+            'main.models.can_return_rows_from_update', return_value=False
+        ):
+            self.assertEqual(Task.objects.mark_done(), 3)
+        self.assertCounts(TaskCounterTest.user1, 0, 3)
+
+    def test_bulk_paths_adjust_the_counters(self):
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', do_before=timezone.now(), done=i < 2,
+                 user=user)
+            for user in (TaskCounterTest.user1, TaskCounterTest.user2)
+            for i in range(5)
+        ])
+        self.assertCounts(TaskCounterTest.user1, 3, 2)
+        self.assertCounts(TaskCounterTest.user2, 3, 2)
+
+        Task.objects.for_user(TaskCounterTest.user1).mark_done()
+        self.assertCounts(TaskCounterTest.user1, 0, 5)
+        pks = Task.objects.filter(
+            user=TaskCounterTest.user1
+        ).values_list('pk', flat=True)
+        Task.objects.filter(pk__in=list(pks[:2])).mark_undone()
+        self.assertCounts(TaskCounterTest.user1, 2, 3)
+
+        Task.objects.update(done=False)
+        self.assertCounts(TaskCounterTest.user1, 5, 0)
+        self.assertCounts(TaskCounterTest.user2, 5, 0)
+
+        pks = Task.objects.filter(
+            user=TaskCounterTest.user2
+        ).values_list('pk', flat=True)
+        Task.objects.filter(pk__in=list(pks[:3])).delete()
+        self.assertCounts(TaskCounterTest.user1, 5, 0)
+        self.assertCounts(TaskCounterTest.user2, 2, 0)
+
+    def test_overdue_counts_the_open_tasks_past_their_deadline(self):
+        past = timezone.now() - timedelta(days=1)
+        self.create_task(do_before=past)
+        self.create_task(do_before=past, done=True)
+        self.create_task()
+        self.create_task(user=TaskCounterTest.user2, do_before=past)
+        self.assertEqual(
+            TaskCounter.objects.counts(TaskCounterTest.user1),
+            {'open': 2, 'done': 1, 'overdue': 1}
+        )
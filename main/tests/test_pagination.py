@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..pagination import (
+    EstimatedCountPaginator, KeysetPaginator, InvalidCursor
+)
+from .query_budgets import QueryBudgetClient
+
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        deadline = timezone.now() + timedelta(days=3)
+        for i in range(7):
+            # Pairs of tasks share a deadline so the id tie-breaker is used.
+            Task.objects.create(
+                title='Task {}'.format(i),
+                do_before=deadline + timedelta(hours=i // 2),
+                user=cls.user1
+            )
+        cls.ordered_ids = list(
+            Task.objects.order_by('do_before', 'id').values_list('id', flat=True)
+        )
+
+    def paginator(self, ordering=('do_before', 'id')):
+        return KeysetPaginator(Task.objects.all(), ordering, per_page=3)
+
+    def test_walking_forward_visits_every_task_once(self):
+        paginator = self.paginator()
+        page = paginator.page()
+        self.assertFalse(page.has_previous())
+        seen = [task.id for task in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            self.assertTrue(page.has_previous())
+            seen.extend(task.id for task in page)
+        self.assertEqual(seen, self.ordered_ids)
+
+    def test_walking_backward_returns_previous_pages(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertFalse(third.has_next())
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertTrue(back.has_next())
+        back = paginator.page(back.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_descending_ordering(self):
+        paginator = self.paginator(['-do_before', '-id'])
+        page = paginator.page()
+        seen = [task.id for task in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen.extend(task.id for task in page)
+        self.assertEqual(seen, self.ordered_ids[::-1])
+
+    def test_page_runs_a_single_query(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_invalid_cursor_raises(self):
+        for cursor in ['garbage', 'W10', 'WyJuZXh0IixbXV0']:
+            with self.assertRaises(InvalidCursor):
+                self.paginator().page(cursor)
+
+
+class TaskListPaginationTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        for i in range(3):
+            Task.objects.create(
+                title='Open task {}'.format(i),
+                do_before=timezone.now() + timedelta(days=i + 1),
+                user=cls.user1
+            )
+            Task.objects.create(
+                title='Done task {}'.format(i),
+                do_before=timezone.now() + timedelta(days=i + 1),
+                finished_on=timezone.now() - timedelta(days=i),
+                done=True,
+                user=cls.user1
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(
+            email=self.user1_credentials['email'],
+            password=self.user1_credentials['password']
+        )
+
+    def test_task_list_links_to_the_next_page(self):
+        with self.settings(TASKS_PER_PAGE=2):
+            response = self.client.get(reverse('main:task_list'))
+            page = response.context['page']
+            self.assertEqual(len(response.context['tasks']), 2)
+            self.assertContains(response, f'href="?cursor={page.next_cursor}"')
+
+            response = self.client.get(
+                reverse('main:task_list'), {'cursor': page.next_cursor}
+            )
+        self.assertEqual(
+            [task.title for task in response.context['tasks']],
+            ['Open task 2']
+        )
+
+    def test_done_task_list_shows_recently_finished_first(self):
+        response = self.client.get(reverse('main:done_task_list'))
+        self.assertEqual(
+            [task.title for task in response.context['tasks']],
+            ['Done task 0', 'Done task 1', 'Done task 2']
+        )
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(
+            reverse('main:task_list'), {'cursor': 'garbage'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', do_before=timezone.now(), user=cls.user1)
+            for i in range(200)
+        ])
+
+    def test_small_results_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(
+            Task.objects.all(), 10, exact_count_limit=1000
+        )
+        self.assertEqual(paginator.count, 200)
+        self.assertEqual(paginator.num_pages, 20)
+
+    def test_large_results_are_estimated(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Only PostgreSQL has row estimates')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE main_task')
+        paginator = EstimatedCountPaginator(
+            Task.objects.all(), 10, exact_count_limit=0
+        )
+        with self.assertNumQueries(1) as queries:
+            count = paginator.count
+        self.assertTrue(queries.captured_queries[0]['sql'].startswith('EXPLAIN'))
+        self.assertAlmostEqual(count, 200, delta=20)
+
+    def test_lists_are_counted(self):
+        paginator = EstimatedCountPaginator(list(range(15)), 10)
+        self.assertEqual(paginator.count, 15)
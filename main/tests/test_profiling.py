@@ -0,0 +1,160 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command, CommandError
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..profiling import (
+    ProfilingMiddleware, StackSampler, read_profile_names, write_profile
+)
+
+User = get_user_model()
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilingTestMixin:
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def profiles(self):
+        profiles = []
+        for name in read_profile_names(self.directory):
+            with open(os.path.join(self.directory, name)) as f:
+                profiles.append(json.load(f))
+        return profiles
+
+
+class ProfilingMiddlewareTest(ProfilingTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.create(
+            title='Read for 20 mins.',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+
+    def setUp(self):
+        super(ProfilingMiddlewareTest, self).setUp()
+        self.client.force_login(self.user1)
+
+    def test_not_used_without_a_directory(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_sampled_requests_are_saved_with_their_sql(self):
+        with self.settings(TASKS_PROFILE_DIR=self.directory,
+                           TASKS_PROFILE_SAMPLE_RATE=1):
+            self.client.get(reverse('main:task_list'))
+        profile, = self.profiles()
+        self.assertEqual(profile['view_name'], 'main:task_list')
+        self.assertEqual(profile['user'], 'user1')
+        self.assertEqual(profile['status'], 200)
+        self.assertFalse(profile['slow'])
+        self.assertGreater(profile['sql']['count'], 0)
+        self.assertEqual(
+            sum(statement['count']
+                for statement in profile['sql']['statements']),
+            profile['sql']['count']
+        )
+
+    def test_fast_requests_are_not_saved(self):
+        with self.settings(TASKS_PROFILE_DIR=self.directory,
+                           TASKS_PROFILE_SAMPLE_RATE=0,
+                           TASKS_PROFILE_SLOW_MS=60000):
+            self.client.get(reverse('main:task_list'))
+        self.assertEqual(self.profiles(), [])
+
+    def test_slow_requests_are_saved(self):
+        with self.settings(TASKS_PROFILE_DIR=self.directory,
+                           TASKS_PROFILE_SAMPLE_RATE=0,
+                           TASKS_PROFILE_SLOW_MS=0):
+            self.client.get(reverse('main:task_list'))
+        profile, = self.profiles()
+        self.assertTrue(profile['slow'])
+
+    def test_only_the_newest_profiles_are_kept(self):
+        for i in range(4):
+            write_profile(
+                self.directory, {'view_name': f'main:view{i}'}, max_files=2
+            )
+        self.assertEqual(
+            [profile['view_name'] for profile in self.profiles()],
+            ['main:view2', 'main:view3']
+        )
+
+
+class StackSamplerTest(TestCase):
+    def test_samples_the_watched_thread(self):
+        sampler = StackSampler(0.001)
+        sampler.watch(threading.get_ident())
+        busy(0.05)
+        samples = sampler.unwatch(threading.get_ident())
+        self.assertGreater(sum(samples.values()), 0)
+        stack = samples.most_common(1)[0][0]
+        self.assertRegex(stack[-1], r'test_profiling\.py:\d+\(busy\)$')
+        self.assertIn('test_samples_the_watched_thread', stack[-2])
+
+
+@override_settings(TASKS_PROFILE_DIR=None)
+class AggregateProfilesCommandTest(ProfilingTestMixin, TestCase):
+    def write(self, view_name, samples, slow=False):
+        write_profile(self.directory, {
+            'view_name': view_name, 'duration_ms': 100.0, 'slow': slow,
+            'sql': {'count': 4, 'duration_ms': 10.0, 'statements': []},
+            'samples': [
+                {'stack': stack, 'count': count} for stack, count in samples
+            ],
+        }, max_files=100)
+
+    def aggregate(self, *args):
+        out = io.StringIO()
+        call_command(
+            'aggregate_profiles', '--dir', self.directory, *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_reports_the_hottest_functions(self):
+        self.write('main:task_list', [
+            (['handler', 'view', 'render'], 6),
+            (['handler', 'view', 'query'], 2),
+        ])
+        self.write('api:task_list', [(['handler', 'query'], 2)], slow=True)
+
+        output = self.aggregate()
+        self.assertIn('Profiles: 2', output)
+        lines = output.splitlines()
+        functions = lines[lines.index('  own %  total %  function') + 1:]
+        self.assertEqual(functions, [
+            '   60.0     60.0  render',
+            '   40.0     40.0  query',
+        ])
+
+        output = self.aggregate('--slow')
+        self.assertIn('Profiles: 1', output)
+        self.assertIn('100.0    100.0  query', output)
+        self.assertIn('main:task_list', self.aggregate('--view', 'main:task_list'))
+
+    def test_requires_a_directory(self):
+        with self.assertRaises(CommandError):
+            call_command('aggregate_profiles', stdout=io.StringIO())
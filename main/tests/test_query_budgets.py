@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from ..models import Task
+from .query_budgets import (
+    BUDGETED_NAMESPACES, QUERY_BUDGETS, QueryBudgetClient, QueryBudgetExceeded
+)
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    """Request every main and API view once with enough tasks on every list
+    for a per-task query to go over the budget.
+    """
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        Task.objects.bulk_create([
+            Task(
+                title=f'Water plant {i}', description='In the kitchen',
+                do_before=timezone.now() + timedelta(days=i), done=i % 2 == 1,
+                user=cls.user1
+            )
+            for i in range(10)
+        ])
+        cls.slugs = list(
+            Task.objects.order_by('id').values_list('slug', flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user1)
+
+    def test_every_view_has_a_budget(self):
+        names = {
+            f'{namespace}:{name}'
+            for namespace in BUDGETED_NAMESPACES
+            for name in get_resolver().namespace_dict[namespace][1].reverse_dict
+            if isinstance(name, str)
+        }
+        self.assertEqual(names - set(QUERY_BUDGETS), set())
+
+    def test_read_views(self):
+        search = {'q': 'plant'}
+        for name, params in [
+                ('main:task_list', {}),
+                ('main:done_task_list', {}),
+                ('main:task_search', search),
+                ('main:task_create', {}),
+                ('main:task_export', {}),
+                ('main:task_events', {}),
+                ('api:task_list', {}),
+                ('api:task_sync', {}),
+                ('api:task_counts', {}),
+                ('api:task_search', search)]:
+            with self.subTest(name):
+                response = self.client.get(reverse(name), params)
+                self.assertLess(response.status_code, 300)
+        for name in ('main:task_detail', 'main:task_update'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=[self.slugs[0]]))
+                self.assertEqual(response.status_code, 200)
+
+    def test_write_views(self):
+        do_before = (timezone.now() + timedelta(days=1)).isoformat()
+        self.client.post(reverse('main:task_create'), {
+            'title': 'New', 'do_before': do_before
+        })
+        self.client.post(reverse('main:task_update', args=[self.slugs[0]]), {
+            'title': 'Changed', 'do_before': do_before
+        })
+        self.client.get(reverse('main:task_do', args=[self.slugs[0]]))
+        self.client.get(reverse('main:task_undo', args=[self.slugs[1]]))
+        self.client.get(reverse('main:task_delete', args=[self.slugs[2]]))
+        self.client.post(reverse('main:task_bulk_action'), {
+            'action': 'do', 'slugs': self.slugs[3:]
+        })
+        self.client.post(reverse('api:task_list'), {
+            'title': 'New', 'do_before': do_before
+        }, content_type='application/json')
+        self.client.post(reverse('api:task_bulk_create'), [
+            {'title': f'New {i}', 'do_before': do_before} for i in range(10)
+        ], content_type='application/json')
+        response = self.client.post(reverse('api:task_bulk_action'), {
+            'action': 'delete', 'slugs': self.slugs[3:]
+        }, content_type='application/json')
+        self.assertEqual(response.json()['count'], 7)
+
+    def test_going_over_the_budget_fails(self):
+        with mock.patch.dict(QUERY_BUDGETS, {'main:task_list': 1}):
+            with self.assertRaisesMessage(
+                    QueryBudgetExceeded, 'over its budget of 1'):
+                self.client.get(reverse('main:task_list'))
+
+    def test_views_without_a_budget_fail(self):
+        with mock.patch.dict(QUERY_BUDGETS):
+            del QUERY_BUDGETS['main:task_list']
+            with self.assertRaisesMessage(
+                    QueryBudgetExceeded, 'has no query budget'):
+                self.client.get(reverse('main:task_list'))
@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..pagination import KeysetPaginator
+from ..search import SQLITE_TRIGGERS, search_tasks
+from .query_budgets import QueryBudgetClient
+
+User = get_user_model()
+
+
+class TaskSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        cls.title_match = cls.create_task(
+            cls.user1, 'Return the library books', 'Before noon'
+        )
+        cls.description_match = cls.create_task(
+            cls.user1, 'Errands', 'Pick up groceries and a book for Sam'
+        )
+        cls.create_task(cls.user1, 'Call the plumber', 'About the sink')
+        cls.create_task(cls.user2, 'Sell old books', 'At the market')
+
+    @classmethod
+    def create_task(cls, user, title, description=''):
+        return Task.objects.create(
+            title=title, description=description, user=user,
+            do_before=timezone.now() + timedelta(days=1)
+        )
+
+    def search(self, query, user=None):
+        return list(search_tasks(
+            Task.objects.filter(user=user or self.user1), query
+        ).order_by('-rank', 'id'))
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(
+            self.search('book'), [self.title_match, self.description_match]
+        )
+
+    def test_search_is_scoped_to_the_queryset(self):
+        self.assertEqual(
+            [task.title for task in self.search('books', self.user2)],
+            ['Sell old books']
+        )
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('book groceries'), [self.description_match])
+        self.assertEqual(self.search('book plumber'), [])
+
+    def test_index_follows_writes(self):
+        task = Task.objects.get(pk=self.title_match.pk)
+        task.title = 'Return the library DVDs'
+        task.save()
+        self.assertEqual(self.search('dvds'), [task])
+        self.assertNotIn(task, self.search('books'))
+
+        Task.objects.filter(pk=task.pk).update(description='Water the garden')
+        self.assertEqual(self.search('garden'), [task])
+
+        task.delete()
+        self.assertEqual(self.search('dvds'), [])
+
+        Task.objects.bulk_create([
+            Task(title='Bulk created chore', do_before=timezone.now(),
+                 user=self.user1)
+        ])
+        self.assertEqual(len(self.search('chore')), 1)
+
+    def test_query_syntax_in_user_input_is_ignored(self):
+        self.assertEqual(self.search('"book* (-'), self.search('book'))
+        self.assertEqual(self.search('*'), [])
+
+    def test_results_paginate_on_rank(self):
+        Task.objects.bulk_create([
+            Task(title=f'Book {i}', description='book ' * (i % 3),
+                 do_before=timezone.now(), user=self.user1)
+            for i in range(7)
+        ])
+        expected = self.search('book')
+        paginator = KeysetPaginator(
+            search_tasks(Task.objects.filter(user=self.user1), 'book'),
+            ['-rank', 'id'], per_page=2
+        )
+        tasks, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            tasks.extend(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(tasks, expected)
+        self.assertEqual(len(tasks), 9)
+
+        previous = paginator.page(paginator.page(
+            paginator.page().next_cursor
+        ).previous_cursor)
+        self.assertEqual(list(previous), expected[:2])
+
+
+class TaskSearchViewsTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        for i in range(3):
+            Task.objects.create(
+                title=f'Water plant {i}', user=cls.user1,
+                do_before=timezone.now() + timedelta(days=1)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user1)
+
+    def test_search_page_lists_the_matches(self):
+        response = self.client.get(reverse('main:task_search'), {'q': 'plants'})
+        self.assertTemplateUsed(response, 'main/task_search.html')
+        self.assertEqual(len(response.context['tasks']), 3)
+        self.assertContains(response, 'Water plant 2')
+
+    def test_search_page_without_a_query(self):
+        response = self.client.get(reverse('main:task_search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page'])
+
+    def test_api_search_paginates_with_cursors(self):
+        with self.settings(TASKS_PER_PAGE=2):
+            data = self.client.get(
+                reverse('api:task_search'), {'q': 'plant', 'fields': 'title'}
+            ).json()
+            self.assertEqual(len(data['results']), 2)
+            self.assertEqual(set(data['results'][0]), {'title'})
+            self.assertIn('q=plant', data['next'])
+            data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNone(data['next'])
+
+    def test_api_search_requires_a_query(self):
+        response = self.client.get(reverse('api:task_search'))
+        self.assertEqual(response.status_code, 400)
+
+
+class SqliteSearchTriggersTest(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Only SQLite keeps the index with triggers')
+        self.user = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+
+    def trigger_names(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = 'main_task'"
+            )
+            return {name for name, in cursor.fetchall()}
+
+    def test_migrate_restores_the_triggers_of_a_remade_table(self):
+        self.assertEqual(self.trigger_names(), set(SQLITE_TRIGGERS))
+        with connection.schema_editor() as schema_editor:
+            # As SQLite alters a column of main_task.
+            schema_editor._remake_table(Task)
+        self.assertEqual(self.trigger_names(), set())
+        task = Task.objects.create(
+            title='Return the library books', user=self.user,
+            do_before=timezone.now() + timedelta(days=1)
+        )
+
+        call_command('migrate', verbosity=0)
+        self.assertEqual(self.trigger_names(), set(SQLITE_TRIGGERS))
+        # The index caught up with the task created without the triggers.
+        self.assertEqual(
+            list(search_tasks(Task.objects.all(), 'books')), [task]
+        )
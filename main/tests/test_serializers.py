@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ..api.serializers import (
+    FIELD_PRESETS, TaskSerializer, TaskValuesSerializer
+)
+from ..models import Task
+
+User = get_user_model()
+
+
+class TaskValuesSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        now = timezone.now().replace(microsecond=123456)
+        Task.objects.create(
+            title='Lire « Guerre et Paix »',
+            description='Line one\nLine two "quoted"',
+            do_before=now + timedelta(days=3),
+            user=cls.user1
+        )
+        Task.objects.create(
+            title='Watch a crashcourse.',
+            do_before=(now - timedelta(days=1)).replace(microsecond=0),
+            finished_on=now - timedelta(days=2),
+            done=True,
+            user=cls.user1
+        )
+
+    def assertSameJSON(self, fields):
+        tasks = Task.objects.order_by('pk')
+        slow = TaskSerializer(tasks, many=True, fields=fields).data
+        fast = TaskValuesSerializer(fields=fields).to_representation(
+            tasks.values(*fields)
+        )
+        self.assertEqual(
+            JSONRenderer().render(fast), JSONRenderer().render(slow)
+        )
+
+    def test_full_fields_match_task_serializer(self):
+        self.assertSameJSON(FIELD_PRESETS['full'])
+
+    def test_basic_fields_match_task_serializer(self):
+        self.assertSameJSON(FIELD_PRESETS['basic'])
+
+    def test_field_subset_matches_task_serializer(self):
+        self.assertSameJSON(['slug', 'finished_on', 'title'])
+
+    def test_dates_use_the_current_timezone(self):
+        with timezone.override('America/New_York'):
+            self.assertSameJSON(FIELD_PRESETS['full'])
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.template import engines
+from django.template.loader import render_to_string
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase
+from django.utils import timezone
+
+from ..management.commands.benchmark_rendering import rows_template
+from ..models import Task
+from ..templatetags.task_rows import render_rows
+
+User = get_user_model()
+
+
+class TaskRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(
+            username='user1', email='user1@domain.com', password='APQMwn0$'
+        )
+        # Half a minute past the minute, so the time left can't change
+        # between two renders.
+        now = timezone.now()
+        cls.tasks = [
+            Task.objects.create(
+                title='Read for 20 mins.',
+                do_before=now + timedelta(days=3, hours=2, seconds=30),
+                user=cls.user1
+            ),
+            Task.objects.create(
+                title='<b>Bold</b> & "quoted"',
+                do_before=now + timedelta(minutes=5, seconds=30),
+                user=cls.user1
+            ),
+            Task.objects.create(
+                title='Écrire à Zoë',
+                do_before=now - timedelta(days=1, seconds=30),
+                finished_on=now - timedelta(hours=4, seconds=30),
+                done=True,
+                user=cls.user1
+            ),
+        ]
+
+    def test_rows_are_the_same_as_the_template_rows(self):
+        for column in ['deadline', 'finished']:
+            with self.subTest(column=column):
+                self.assertEqual(
+                    render_rows(self.tasks, column),
+                    rows_template(column).render({'tasks': self.tasks})
+                )
+
+    def test_links_are_quoted_like_reverse(self):
+        html = render_rows(self.tasks[2:], 'finished')
+        url = self.tasks[2].get_absolute_url()
+        self.assertIn('%C3%A9crire', url)
+        self.assertIn(f'href="{url}"', html)
+        self.assertIn(f'href="{self.tasks[2].get_undo_url()}"', html)
+
+    def test_row_links_dont_submit_the_bulk_form(self):
+        # The rows are inside the bulk action form, where a button would
+        # submit it.
+        html = render_rows(self.tasks, 'deadline')
+        self.assertNotIn('<button', html)
+        self.assertIn(
+            f'<a class="btn btn-block btn-info" '
+            f'href="{self.tasks[0].get_update_url()}">Update</a>', html
+        )
+
+    def test_titles_are_escaped(self):
+        html = render_rows(self.tasks[1:2], 'deadline')
+        self.assertIn('&lt;b&gt;Bold&lt;/b&gt; &amp; &quot;quoted&quot;', html)
+
+    def test_snippet_without_tasks(self):
+        html = render_to_string(
+            'main/snippets/task_list_snippet.html', {'tasks': []}
+        )
+        self.assertIn('No tasks here yet.', html)
+        html = render_to_string(
+            'main/snippets/done_task_list_snippet.html',
+            {'tasks': self.tasks[2:]}
+        )
+        self.assertNotIn('No tasks here yet.', html)
+        self.assertIn(self.tasks[2].get_undo_url(), html)
+
+    def test_templates_are_cached(self):
+        loader, = engines['django'].engine.template_loaders
+        self.assertIsInstance(loader, CachedLoader)
@@ -1,18 +1,28 @@
+import csv
+import io
+import json
 from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
 from django.utils import timezone
 from django.urls import reverse
 
 from ..forms import TaskForm
 from ..models import Task
 from ..views import (
-    task_list, task_detail, task_create, task_update, task_delete
+    task_list, task_detail, task_create, task_update, task_delete,
+    task_export
 )
+from .query_budgets import QueryBudgetClient
 User = get_user_model()
 
 
 class TaskListTest(TestCase):
+    client_class = QueryBudgetClient
+
     @classmethod
     def setUpTestData(cls):
         cls.user1_credentials = {
@@ -50,6 +60,9 @@ class TaskListTest(TestCase):
             user=cls.user1, done=False
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_task_list_exists_at_desired_location(self):
         response = self.client.get('/')
         self.assertEqual(response.resolver_match.func, task_list)
@@ -119,8 +132,23 @@ class TaskListTest(TestCase):
         for link in links:
             self.assertContains(response, link)
 
+    def test_header_shows_the_task_counts(self):
+        self.client.login(
+            email=TaskListTest.user1_credentials['email'],
+            password=TaskListTest.user1_credentials['password']
+        )
+        response = self.client.get(reverse('main:task_list'))
+        self.assertEqual(
+            response.context['task_counts'],
+            {'open': 2, 'done': 1, 'overdue': 0}
+        )
+        self.assertContains(response, '<span class="badge">2</span>', html=True)
+        self.assertContains(response, '<span class="badge">1</span>', html=True)
+
 
 class TaskDetailTest(TestCase):
+    client_class = QueryBudgetClient
+
     @classmethod
     def setUpTestData(cls):
         cls.user1_credentials = {
@@ -236,6 +264,8 @@ class TaskDetailTest(TestCase):
 
 
 class TaskCreateTest(TestCase):
+    client_class = QueryBudgetClient
+
     @classmethod
     def setUpTestData(cls):
         cls.user1_credentials = {
@@ -307,6 +337,8 @@ class TaskCreateTest(TestCase):
 
 
 class TaskUpdateTest(TestCase):
+    client_class = QueryBudgetClient
+
     @classmethod
     def setUpTestData(cls):
         cls.user1_credentials = {
@@ -388,6 +420,8 @@ class TaskUpdateTest(TestCase):
 
 
 class TaskDeleteTest(TestCase):
+    client_class = QueryBudgetClient
+
     @classmethod
     def setUpTestData(cls):
         cls.user1_credentials = {
@@ -441,3 +475,198 @@ class TaskDeleteTest(TestCase):
         self.assertEqual(Task.objects.count(), 0)
 
         self.assertRedirects(response, reverse('main:task_list'))
+
+
+class TaskBulkActionTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        for i in range(5):
+            Task.objects.create(
+                title=f'Task {i}',
+                do_before=timezone.now() + timedelta(days=3),
+                user=cls.user1
+            )
+        cls.other_user_task = Task.objects.create(
+            title='Not yours',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user2
+        )
+
+    def setUp(self):
+        self.client.login(
+            email=TaskBulkActionTest.user1_credentials['email'],
+            password=TaskBulkActionTest.user1_credentials['password']
+        )
+        self.slugs = list(
+            Task.objects.filter(user=TaskBulkActionTest.user1)
+            .values_list('slug', flat=True)
+        )
+
+    def test_bulk_do_marks_tasks_done_with_one_update(self):
+        # UPDATE and the counter upsert
+        with self.assertNumQueries(2):
+            Task.objects.for_user(TaskBulkActionTest.user1).filter(
+                slug__in=self.slugs
+            ).mark_done()
+        self.assertFalse(Task.objects.filter(
+            slug__in=self.slugs, done=False
+        ).exists())
+        self.assertFalse(Task.objects.filter(
+            slug__in=self.slugs, finished_on__isnull=True
+        ).exists())
+
+    def test_bulk_do_view(self):
+        response = self.client.post(reverse('main:task_bulk_action'), {
+            'action': 'do',
+            'slugs': self.slugs[:3],
+            'next': 'task_list'
+        })
+        self.assertRedirects(response, reverse('main:task_list'))
+        self.assertEqual(
+            Task.objects.filter(user=TaskBulkActionTest.user1, done=True)
+            .count(),
+            3
+        )
+
+    def test_bulk_undo_view(self):
+        Task.objects.filter(slug__in=self.slugs).mark_done()
+        response = self.client.post(reverse('main:task_bulk_action'), {
+            'action': 'undo',
+            'slugs': self.slugs,
+            'next': 'done_task_list'
+        })
+        self.assertRedirects(response, reverse('main:done_task_list'))
+        self.assertFalse(Task.objects.filter(
+            user=TaskBulkActionTest.user1, done=True
+        ).exists())
+        self.assertFalse(Task.objects.filter(
+            user=TaskBulkActionTest.user1, finished_on__isnull=False
+        ).exists())
+
+    def test_bulk_delete_view_only_deletes_the_users_tasks(self):
+        self.client.post(reverse('main:task_bulk_action'), {
+            'action': 'delete',
+            'slugs': self.slugs + [TaskBulkActionTest.other_user_task.slug]
+        })
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertTrue(Task.objects.filter(
+            pk=TaskBulkActionTest.other_user_task.pk
+        ).exists())
+
+    def test_bulk_action_rejects_unknown_actions(self):
+        response = self.client.post(reverse('main:task_bulk_action'), {
+            'action': 'archive',
+            'slugs': self.slugs
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_action_requires_post(self):
+        response = self.client.get(reverse('main:task_bulk_action'))
+        self.assertEqual(response.status_code, 405)
+
+
+class TaskExportTest(TestCase):
+    client_class = QueryBudgetClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1_credentials = {
+            'username': 'user1',
+            'email': 'user1@domain.com',
+            'password': 'APQMwn0$'
+        }
+        cls.user1 = User.objects.create_user(**cls.user1_credentials)
+        cls.user2 = User.objects.create_user(
+            username='user2', email='user2@domain.com', password='APQMw2Zn0$'
+        )
+        cls.task = Task.objects.create(
+            title='Read "War and Peace", all of it',
+            description='Line one\nLine two',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user1
+        )
+        Task.objects.create(
+            title='Watch a crashcourse.',
+            do_before=timezone.now() - timedelta(days=1),
+            done=True,
+            user=cls.user1
+        )
+        Task.objects.create(
+            title='Not yours',
+            do_before=timezone.now() + timedelta(days=3),
+            user=cls.user2
+        )
+
+    def setUp(self):
+        self.client.login(
+            email=TaskExportTest.user1_credentials['email'],
+            password=TaskExportTest.user1_credentials['password']
+        )
+
+    def test_task_export_redirect_unlogged_in_user(self):
+        self.client.logout()
+        response = self.client.get(reverse('main:task_export'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_task_export_streams_ndjson(self):
+        response = self.client.get(reverse('main:task_export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], TaskExportTest.task.title)
+        self.assertEqual(rows[0]['slug'], TaskExportTest.task.slug)
+        self.assertEqual(rows[0]['description'], 'Line one\nLine two')
+        self.assertTrue(rows[1]['done'])
+
+    def test_task_export_streams_csv(self):
+        response = self.client.get(
+            reverse('main:task_export'), {'format': 'csv'}
+        )
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], TaskExportTest.task.title)
+        self.assertEqual(rows[0]['description'], 'Line one\nLine two')
+        self.assertEqual(
+            rows[0]['do_before'], TaskExportTest.task.do_before.isoformat()
+        )
+
+    def test_task_export_rejects_unknown_formats(self):
+        response = self.client.get(
+            reverse('main:task_export'), {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_task_export_streams_asynchronously_under_asgi(self):
+        request = AsyncRequestFactory().get(
+            reverse('main:task_export'), {'format': 'csv'}
+        )
+        request.user = TaskExportTest.user1
+        response = await sync_to_async(task_export)(request)
+        self.assertTrue(response.is_async)
+        content = b''.join(
+            [chunk async for chunk in response.streaming_content]
+        ).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [row['title'] for row in rows],
+            [TaskExportTest.task.title, 'Watch a crashcourse.']
+        )
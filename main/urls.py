@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path, include
 
-from . import views
+from . import async_views, views
+
+# The read views have async versions for ASGI deployments.
+read_views = async_views if settings.TASKS_ASYNC_VIEWS else views
 
 app_name = 'main'
 urlpatterns = [
@@ -9,10 +13,14 @@ urlpatterns = [
         path('delete/', views.task_delete, name='task_delete'),
         path('do/', views.task_do, name='task_do'),
         path('undo/', views.task_undo, name='task_undo'),
-        path('detail/', views.task_detail, name='task_detail'),
+        path('detail/', read_views.task_detail, name='task_detail'),
 
     ])),
-    path('done-tasks/', views.done_task_list, name='done_task_list'),
+    path('done-tasks/', read_views.done_task_list, name='done_task_list'),
     path('add/', views.task_create, name='task_create'),
-    path('', views.task_list, name='task_list'),
+    path('bulk/', views.task_bulk_action, name='task_bulk_action'),
+    path('export/', views.task_export, name='task_export'),
+    path('search/', views.task_search, name='task_search'),
+    path('events/', async_views.task_events, name='task_events'),
+    path('', read_views.task_list, name='task_list'),
 ]
@@ -1,27 +1,108 @@
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404, HttpResponseBadRequest, StreamingHttpResponse
+)
+from django.views.decorators.http import require_POST
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils import timezone
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 
-from .models import Task
+from .cache import cached_fragment
+from .conditional import task_list_condition, task_detail_condition
+from .models import Task, TaskCounter, BULK_ACTIONS
 from .forms import TaskForm
+from .export import AEXPORTERS, EXPORT_FIELDS, EXPORTERS, CONTENT_TYPES
+from .pagination import KeysetPaginator, InvalidCursor
+from .search import search_tasks
+
+
+def paginate_tasks(request, queryset, ordering):
+    paginator = KeysetPaginator(queryset, ordering)
+    try:
+        return paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+
+
+def render_task_list(request, template_name, fragment_template_name,
+                     queryset, ordering):
+    """Render a paginated task list, taking the rows from the per-user
+    fragment cache when the user's tasks did not change.
+    """
+    def render_fragment():
+        page = paginate_tasks(request, queryset, ordering)
+        return render_to_string(fragment_template_name, {
+            'tasks': page.object_list,
+            'page': page,
+        }, request)
+
+    tasks_html, hit = cached_fragment(request, template_name, render_fragment)
+    return render_task_list_page(
+        request, template_name, tasks_html, hit,
+        TaskCounter.objects.counts(request.user)
+    )
+
+
+def render_task_list_page(request, template_name, tasks_html, hit,
+                          task_counts):
+    response = render(request, template_name, {
+        'tasks_html': mark_safe(tasks_html),
+        'task_counts': task_counts,
+    })
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
 
 
 @login_required
+@task_list_condition
 def task_list(request):
-    tasks = Task.objects.filter(done=False, user=request.user)
-    return render(request, 'main/task_list.html', {'tasks': tasks})
+    return render_task_list(
+        request,
+        'main/task_list.html',
+        'main/snippets/task_list_page.html',
+        Task.objects.filter(done=False, user=request.user),
+        ['do_before', 'id']
+    )
 
 
 @login_required
+def task_search(request):
+    query = request.GET.get('q', '').strip()
+    page = None
+    if(query):
+        page = paginate_tasks(
+            request,
+            search_tasks(Task.objects.filter(user=request.user), query),
+            ['-rank', 'id']
+        )
+    return render(request, 'main/task_search.html', {
+        'query': query,
+        'tasks': page.object_list if page else [],
+        'page': page,
+    })
+
+
+@login_required
+@task_detail_condition
 def task_detail(request, task_slug):
-    task = get_object_or_404(Task, slug__iexact=task_slug, user=request.user)
+    task = get_object_or_404(
+        Task.objects.with_slug(task_slug), user=request.user
+    )
     return render(request, 'main/task_detail.html', {'task': task})
 
 
 @login_required
+@task_list_condition
 def done_task_list(request):
-    tasks = Task.objects.filter(done=True, user=request.user)
-    return render(request, 'main/done_task_list.html', {'tasks': tasks})
+    return render_task_list(
+        request,
+        'main/done_task_list.html',
+        'main/snippets/done_task_list_page.html',
+        Task.objects.filter(done=True, user=request.user),
+        ['-finished_on', '-id']
+    )
 
 
 @login_required
@@ -41,7 +122,9 @@ def task_create(request):
 
 @login_required
 def task_update(request, task_slug):
-    task = get_object_or_404(Task, slug__iexact=task_slug, user=request.user)
+    task = get_object_or_404(
+        Task.objects.with_slug(task_slug), user=request.user
+    )
     form = TaskForm(request.POST or None, instance=task)
 
     if request.method == 'POST':
@@ -54,24 +137,81 @@ def task_update(request, task_slug):
 
 @login_required
 def task_delete(request, task_slug):
-    task = get_object_or_404(Task, slug__iexact=task_slug, user=request.user)
+    task = get_object_or_404(
+        Task.objects.with_slug(task_slug), user=request.user
+    )
     task.delete()
     return redirect('main:task_list')
 
 
 @login_required
 def task_do(request, task_slug):
-    task = get_object_or_404(Task, slug__iexact=task_slug, user=request.user)
-    task.done = True
-    task.finished_on = timezone.now()
-    task.save()
+    task = get_object_or_404(
+        Task.objects.with_slug(task_slug), user=request.user
+    )
+    # A conditional UPDATE, so replayed or concurrent requests only move
+    # the task between the counters once.
+    Task.objects.filter(pk=task.pk).mark_done()
     return redirect(task)
 
 
 @login_required
 def task_undo(request, task_slug):
-    task = get_object_or_404(Task, slug__iexact=task_slug, user=request.user)
-    task.done = False
-    task.finished_on = None
-    task.save()
+    task = get_object_or_404(
+        Task.objects.with_slug(task_slug), user=request.user
+    )
+    Task.objects.filter(pk=task.pk).mark_undone()
     return redirect(task)
+
+
+@login_required
+@require_POST
+def task_bulk_action(request):
+    action = request.POST.get('action')
+    if action not in BULK_ACTIONS:
+        return HttpResponseBadRequest('Unknown action')
+
+    slugs = [slug.lower() for slug in request.POST.getlist('slugs')]
+    if slugs:
+        Task.objects.for_user(request.user).filter(
+            slug__in=slugs
+        ).bulk_action(action)
+
+    if request.POST.get('next') == 'done_task_list':
+        return redirect('main:done_task_list')
+    return redirect('main:task_list')
+
+
+@login_required
+def task_export(request):
+    """Stream every task of the user as NDJSON or CSV.
+
+    Rows are read with a chunked iterator over values() and written out as
+    they arrive, so memory use does not grow with the number of tasks.
+    Under ASGI the response gets an async iterator: Django would read a
+    sync one to the end before sending the first byte.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORTERS:
+        return HttpResponseBadRequest('Unknown export format')
+
+    rows = Task.objects.filter(user=request.user).order_by('pk').values(
+        *EXPORT_FIELDS
+    )
+    chunk_size = getattr(settings, 'TASKS_EXPORT_CHUNK_SIZE', 2000)
+    if(isinstance(request, ASGIRequest)):
+        content = AEXPORTERS[export_format](
+            rows.aiterator(chunk_size=chunk_size)
+        )
+    else:
+        content = EXPORTERS[export_format](
+            rows.iterator(chunk_size=chunk_size)
+        )
+
+    response = StreamingHttpResponse(
+        content, content_type=CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="tasks.{export_format}"'
+    )
+    return response
@@ -1,3 +1,17 @@
 $(document).ready(function(){
 	$('#id_do_before').datepicker();
-});
\ No newline at end of file
+
+	// Reload the task list when its tasks change in another tab or device,
+	// unless tasks are being selected for a bulk action.
+	var tasks = $('form[data-events-url]');
+	if(tasks.length && window.EventSource){
+		var source = new EventSource(tasks.data('events-url'));
+		['created', 'updated', 'done', 'undone', 'deleted'].forEach(function(type){
+			source.addEventListener(type, function(){
+				if(!tasks.find('input[name=slugs]:checked').length){
+					window.location.reload();
+				}
+			});
+		});
+	}
+});
@@ -0,0 +1,18 @@
+"""
+ASGI config for todo project.
+
+It exposes the ASGI callable as a module-level variable named ``application``
+and serves the task read views with their async versions.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "todo.settings")
+os.environ.setdefault("TASKS_ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
@@ -34,9 +34,15 @@ INSTALLED_APPS = [
     'allauth',
     'allauth.account',
     'allauth.socialaccount',
+    'rest_framework',
 ]
 
 MIDDLEWARE = [
+    # First, so the session and user lookups are counted too.
+    'main.middleware.QueryCountMiddleware',
+    # Only used when TASKS_PROFILE_DIR is set.
+    'main.profiling.ProfilingMiddleware',
+    'main.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +61,6 @@ TEMPLATES = [
             os.path.join(BASE_DIR, 'templates'),
             os.path.join(BASE_DIR, 'templates', 'allauth')
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -63,6 +68,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are read and compiled once per process. In
+            # development, the autoreloader clears them when they change.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -98,10 +111,10 @@ TIME_ZONE = 'GMT'
 
 USE_I18N = True
 
-USE_L10N = True
-
 USE_TZ = True
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.11/howto/static-files/
@@ -117,10 +130,17 @@ ALLOW_UNICODE_SLUGS = True
 
 SITE_ID = 1
 
+# Django's and allauth's backends, loading the logged in user from the
+# cache for TASKS_USER_CACHE_TIMEOUT seconds, see main/auth.py. 0 turns the
+# cache off.
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'main.auth.CachedModelBackend',
+    'main.auth.CachedAuthenticationBackend',
 ]
+TASKS_USER_CACHE_TIMEOUT = 300
+# Sessions are read from the cache and written to both the cache and the
+# database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 LOGIN_REDIRECT_URL = 'main:task_list'
 ACCOUNT_AUTHENTICATION_METHOD = 'username_email'
 ACCOUNT_EMAIL_REQUIRED = True
@@ -138,3 +158,58 @@ MESSAGE_TAGS = {
 }
 
 CRISPY_TEMPLATE_PACK = 'bootstrap3'
+
+TASKS_PER_PAGE = 50
+TASKS_BULK_LIMIT = 1000
+TASKS_EXPORT_CHUNK_SIZE = 2000
+# Seconds a sync cursor is moved back to catch slow committing changes.
+TASKS_SYNC_MARGIN = 5
+TASKS_SYNC_PAGE_SIZE = 500
+# Days the tombstones of deleted tasks are kept for syncing clients, older
+# sync cursors are refused.
+TASKS_SYNC_RETENTION_DAYS = 30
+# Serve the task lists, task pages and the API list with their async
+# versions, turned on by todo/asgi.py.
+TASKS_ASYNC_VIEWS = os.environ.get(
+    'TASKS_ASYNC_VIEWS', ''
+).lower() in ('1', 'true', 'yes')
+# Tasks due in the next TASKS_REMINDER_WINDOW minutes get a reminder email,
+# see the send_reminders command.
+TASKS_REMINDER_WINDOW = 60
+TASKS_REMINDER_BATCH_SIZE = 500
+# Delivers task events to the server-sent event streams. InProcessBackend
+# only reaches the streams of the publishing process; use
+# main.events.PostgresBackend with several workers.
+TASKS_EVENTS_BACKEND = 'main.events.InProcessBackend'
+# The database alias PostgresBackend LISTENs on, the default one when unset.
+TASKS_EVENTS_LISTEN_DATABASE = None
+TASKS_EVENTS_STREAM_TIMEOUT = 300
+# Keep the task admin usable on very large tables: estimate the result
+# counts above TASKS_ADMIN_EXACT_COUNT_LIMIT rows and skip the queries that
+# read the whole table.
+TASKS_ADMIN_PERFORMANCE_MODE = False
+TASKS_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Report the number of queries and their duration of every request in a
+# Server-Timing header. They are always logged to the main.queries logger.
+TASKS_SERVER_TIMING = True
+# Save sampled stack profiles of TASKS_PROFILE_SAMPLE_RATE of the requests
+# and of every request slower than TASKS_PROFILE_SLOW_MS in this directory,
+# see main/profiling.py and the aggregate_profiles command.
+TASKS_PROFILE_DIR = None
+TASKS_PROFILE_SAMPLE_RATE = 0.01
+TASKS_PROFILE_SLOW_MS = 500
+TASKS_PROFILE_INTERVAL_MS = 5
+TASKS_PROFILE_MAX_FILES = 500
+# Require this bearer token to read /metrics, which is only served with
+# DEBUG on when unset.
+TASKS_METRICS_TOKEN = None
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+TASKS_CACHE_ALIAS = 'default'
+# Seconds the task list fragments are cached, 0 turns the cache off.
+TASKS_CACHE_TIMEOUT = 60
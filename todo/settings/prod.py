@@ -11,11 +11,86 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '[::1]', '.herokuapp.com']
 
 MIDDLEWARE += 'whitenoise.middleware.WhiteNoiseMiddleware',
 
+# Each worker thread keeps its database connection open for
+# DATABASE_CONN_MAX_AGE seconds, checked before it is reused, instead of
+# connecting for every request. Django 4.2 can't reuse connections under
+# ASGI, where every request runs in new threads, so they are closed after
+# each request there; point DATABASE_URL at a pgbouncer to pool them.
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL')
+        default=config('DATABASE_URL'),
+        conn_max_age=config(
+            'DATABASE_CONN_MAX_AGE', default=0 if TASKS_ASYNC_VIEWS else 600,
+            cast=int
+        )
     )
 }
+DATABASES['default']['CONN_HEALTH_CHECKS'] = config(
+    'DATABASE_CONN_HEALTH_CHECKS', default=True, cast=bool
+)
+if('postgresql' in DATABASES['default']['ENGINE']):
+    options = DATABASES['default'].setdefault('OPTIONS', {})
+    options['connect_timeout'] = config(
+        'DATABASE_CONNECT_TIMEOUT', default=5, cast=int
+    )
+# Behind a pgbouncer in transaction mode, consecutive transactions of a
+# connection can reach different server sessions: cursors can't outlive
+# their transaction, and the task events need a direct connection for
+# LISTEN, given by DATABASE_DIRECT_URL.
+if(config('DATABASE_PGBOUNCER', default=False, cast=bool)):
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+if(config('DATABASE_DIRECT_URL', default='')):
+    DATABASES['direct'] = dj_database_url.parse(config('DATABASE_DIRECT_URL'))
+    TASKS_EVENTS_LISTEN_DATABASE = 'direct'
+
+# CACHE_BACKEND can be any Django cache backend, e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory as
+# CACHE_LOCATION, or django.core.cache.backends.redis.RedisCache with the
+# server address (the redis client is in requirements.txt).
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+# Every worker has its own locmem cache, where a write only invalidates
+# the task list fragments of the worker that made it. They are therefore
+# only cached with a shared backend.
+TASKS_CACHE_TIMEOUT = config(
+    'TASKS_CACHE_TIMEOUT',
+    default=0 if CACHES['default']['BACKEND'].endswith('LocMemCache') else 60,
+    cast=int
+)
+
+# The session and user caches are only safe with a cache shared by all the
+# workers: set CACHE_BACKEND to memcached or redis, then e.g.
+# SESSION_ENGINE=django.contrib.sessions.backends.cached_db and
+# TASKS_USER_CACHE_TIMEOUT=300.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE', default='django.contrib.sessions.backends.db'
+)
+TASKS_USER_CACHE_TIMEOUT = config(
+    'TASKS_USER_CACHE_TIMEOUT', default=0, cast=int
+)
+
+TASKS_EVENTS_BACKEND = config(
+    'TASKS_EVENTS_BACKEND', default='main.events.InProcessBackend'
+)
+
+TASKS_ADMIN_PERFORMANCE_MODE = config(
+    'TASKS_ADMIN_PERFORMANCE_MODE', default=False, cast=bool
+)
+
+TASKS_SERVER_TIMING = config('TASKS_SERVER_TIMING', default=True, cast=bool)
+TASKS_PROFILE_DIR = config('TASKS_PROFILE_DIR', default='') or None
+TASKS_PROFILE_SAMPLE_RATE = config(
+    'TASKS_PROFILE_SAMPLE_RATE', default=0.01, cast=float
+)
+TASKS_PROFILE_SLOW_MS = config('TASKS_PROFILE_SLOW_MS', default=500, cast=int)
+TASKS_METRICS_TOKEN = config('TASKS_METRICS_TOKEN', default='') or None
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -16,8 +16,12 @@ Including another URLconf
 from django.urls import path, include
 from django.contrib import admin
 
+from main.metrics import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('account/', include('allauth.urls')),
+    path('api/', include('main.api.urls', namespace='api')),
+    path('metrics', metrics, name='metrics'),
     path('', include('main.urls', namespace='main')),
 ]